@@ -1,16 +1,25 @@
-from langgraph.graph import StateGraph, START, END
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+from langgraph.graph import START, END
 from typing import TypedDict, Dict, List
 from dotenv import load_dotenv
 import requests
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_factory import get_chat_model
+from shared.llm_cache import cached_chat_model
+from shared.tracing import TracedStateGraph
 load_dotenv()
 
-llm = HuggingFaceEndpoint(
-    endpoint_url="openai/gpt-oss-20b",
-    task="text-generation",
-    )
+# Shared, pooled client (shared/llm_factory.py)
+Model = get_chat_model()
 
-Model = ChatHuggingFace(llm=llm)
+# Semantic Scholar paper search (SEMANTIC_SCHOLAR_URL points it at a stand-in service for benchmarks)
+SEMANTIC_SCHOLAR_URL = os.getenv("SEMANTIC_SCHOLAR_URL", "https://api.semanticscholar.org/graph/v1/paper/search")
+
+# Same prompt, same titles: generate_titles is answered from the persistent cache when LLM_CACHE enables it (shared/llm_cache.py)
+TitleModel = cached_chat_model(Model, 'p1.generate_titles')
 
 # Defining State 
 class PaperInfo(TypedDict):
@@ -27,7 +36,7 @@ class PaperInfo(TypedDict):
 # Function to get papers from Semantic Scholar API
 
 def get_papers(Info :PaperInfo) -> PaperInfo:
-    url = "https://api.semanticscholar.org/graph/v1/paper/search"
+    url = SEMANTIC_SCHOLAR_URL
 
     for i in range(Info['top_search']):
         params = {
@@ -61,7 +70,7 @@ def draft_answer(Info: PaperInfo) -> PaperInfo:
 # Generating Paper Titles
 def generate_titles(Info: PaperInfo) -> PaperInfo:
     prompt = Info['prompt']
-    response = Model.invoke(prompt)
+    response = TitleModel.invoke(prompt)
     titles = response.content.split('\n')
     Info['topic'] = [title.strip() for title in titles if title.strip()]
     return Info
@@ -69,7 +78,8 @@ def generate_titles(Info: PaperInfo) -> PaperInfo:
 
 
 # Graph Definition
-graph = StateGraph(PaperInfo)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(PaperInfo, name='p1.research_paper_graph')
 
 # adding notes
 graph.add_node("generate_titles", generate_titles)
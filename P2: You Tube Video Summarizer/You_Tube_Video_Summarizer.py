@@ -2,13 +2,19 @@
 
 
 # Importing necessary libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import START, END
 from typing import TypedDict, Dict, List
 from youtube_transcript_api import YouTubeTranscriptApi
 from dotenv import load_dotenv
 import requests
 import streamlit as st
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_factory import get_chat_model
+from shared.tracing import TracedStateGraph
 
 
 # ==================================================================================
@@ -18,13 +24,8 @@ load_dotenv()
 
 # ===================================================================================
 
-# Initializing the LLM
-llm = HuggingFaceEndpoint(
-    endpoint_url="openai/gpt-oss-20b",
-    task="text-generation",
-    )
-
-Model = ChatHuggingFace(llm=llm)
+# Initializing the LLM (shared, pooled client from shared/llm_factory.py)
+Model = get_chat_model()
 
 # ===================================================================================
 
@@ -139,7 +140,8 @@ def generate_answers(Info: VideoInfo) -> VideoInfo:
 # ===================================================================================
 
 # Defining the Graph
-graph = StateGraph(VideoInfo)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(VideoInfo, name='p2.YTgraph')
 
 # Adding node to the graph
 graph.add_node("get_video_code", get_video_code)
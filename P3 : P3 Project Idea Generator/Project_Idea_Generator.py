@@ -1,8 +1,7 @@
 # P3 : Project Idea Generator
 
 # Importing necessary libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import START, END
 from typing import TypedDict, Dict, List
 
 # For structured output
@@ -13,18 +12,25 @@ from langchain.prompts import PromptTemplate
 # For web interface
 import streamlit as st
 from dotenv import load_dotenv
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_factory import get_chat_model
+from shared.llm_cache import cached_chat_model
+from shared.semantic_cache import get_semantic_cache, semantic_invoke
+from shared.tracing import TracedStateGraph
 
 load_dotenv()
 
 # ==================================================================================
 
-# Model Initialization
-llm = HuggingFaceEndpoint(
-    endpoint_url="openai/gpt-oss-20b",
-    task="text-generation",
-    )
+# Model Initialization (shared, pooled client from shared/llm_factory.py)
+model = get_chat_model()
 
-model = ChatHuggingFace(llm=llm)
+# final_output only reformats what the other nodes produced, repeated inputs come from the cache when LLM_CACHE enables it (shared/llm_cache.py)
+final_model = cached_chat_model(model, 'p3.final_output')
 
 # ==================================================================================
 
@@ -46,6 +52,9 @@ prompt = PromptTemplate(
 
 structured_output_chain = prompt | model | parser
 
+# Near-duplicate requests (same ideas asked in other words) are answered from shared/semantic_cache.py
+semantic_cache = get_semantic_cache()
+
 # ==================================================================================
 
 # Defining State
@@ -79,12 +88,18 @@ def generate_project_ideas(Info: ProjectInfo) :
     if Info["input_idea"]:
         return {"project_idea": [], "project_description": []}
 
-    response = structured_output_chain.invoke({
+    inputs = {
         "project_domain": Info['project_domain'],
         "skills": Info['skills'],
         "complexity_level": Info['complexity_level'],
         "number_of_ideas": Info['number_of_ideas']
-    })
+    }
+    # domain and skills may be worded differently, complexity and number of ideas must match
+    response = semantic_invoke(
+        semantic_cache, 'p3.project_ideas', structured_output_chain, inputs,
+        text=f"{Info['project_domain']} {Info['skills']}",
+        exact={"complexity_level": Info['complexity_level'], "number_of_ideas": Info['number_of_ideas']}
+    )
 
     return {"project_idea": response.project_idea, "project_description": response.project_description}
 
@@ -134,19 +149,20 @@ def provide_skills_required(Info: ProjectInfo):
 def final_output(Info: ProjectInfo) :
     if Info["input_idea"]:
         prompt = f' For given Project idea: {Info["input_idea"]}\n The Skills Required are: {Info["skills_required"]}\n and Step to follow for project completion are: {Info["steps_to_implement"]}\n\n Now give me well structured and user frinedly ouput as:\n An encoraging message based on the quality of project\n Project Title: \n\n Skills Required: \n\n Steps to follow: \n'
-        output = model.invoke(prompt).content
+        output = final_model.invoke(prompt).content
         
         return {"output": output}
     
     prompt = f'For given input:\n Project domain:{Info["project_domain"]}\n Skills learned:{Info["skills"]}\n\n The generated project ideas are: {Info["project_idea"]} \n and for each these {Info["number_of_ideas"]} project idea, the descriptions are:{Info["project_description"]} \n\n Draft well structured response to user based on the above data, which also include additional skills to learn suggestion\n Additional skills: {Info["other_skills_to_learn"]}\n\n Response:\n Encouraging Message based on input data and complexity level{Info["complexity_level"]} ( Do not mention it is an Encouraging Message)\n Project and short description for all project idea\n Other skills to learn:'
-    output = model.invoke(prompt).content
+    output = final_model.invoke(prompt).content
 
     return {"output": output}
 
 # ==================================================================================
 
 # Intitilising graph
-graph = StateGraph(ProjectInfo)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(ProjectInfo, name='p3.PIG_graph')
 
 # Adding nodes
 graph.add_node("generate_project_ideas", generate_project_ideas)
@@ -4,8 +4,7 @@
 # ==================================================================================
 
 # Importing Libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import START, END
 from typing import TypedDict, Literal
 from dotenv import load_dotenv
 
@@ -16,6 +15,14 @@ from langchain.prompts import PromptTemplate
 
 # For web interface
 import streamlit as st
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_factory import get_chat_model
+from shared.llm_cache import cached_chat_model
+from shared.tracing import TracedStateGraph
 
 load_dotenv()
 
@@ -37,13 +44,8 @@ class linkedIntaskschema(BaseModel):
 
 # ==================================================================================
 
-# Model Initilisation
-llm = HuggingFaceEndpoint( 
-    endpoint_url= "openai/gpt-oss-20b",
-    task="text-generation"
-    )
-
-model = ChatHuggingFace(llm= llm)
+# Model Initilisation (shared, pooled client from shared/llm_factory.py)
+model = get_chat_model()
 
 # Parsers for structured output
 parser1 = PydanticOutputParser(pydantic_object=taskschema)
@@ -64,7 +66,8 @@ prompt2 = PromptTemplate(
     partial_variables={'instruction2': instruction2}
 )
 
-structured_model_chain1 = prompt1 | model | parser1
+# Platform classification of a repeated input comes from the persistent cache when LLM_CACHE enables it (shared/llm_cache.py)
+structured_model_chain1 = prompt1 | cached_chat_model(model, 'p4.get_platform') | parser1
 structured_model_chain2 = prompt2 | model | parser2
 
 # ==================================================================================
@@ -136,7 +139,8 @@ def which_task(State:AssistantState) -> Literal["Generate_post","Generate_messag
 # ==================================================================================
 
 # Initilising graph
-graph = StateGraph(AssistantState)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(AssistantState, name='p4.Apnagraph')
 
 # Adding nodes
 graph.add_node('get_platform',get_platform)
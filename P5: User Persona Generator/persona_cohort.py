@@ -0,0 +1,142 @@
+# P5 User Persona Generator - Cohort Mode
+#     Generates personas for a CSV of user types and streams them to a JSONL file
+#
+# Usage:
+#     python persona_cohort.py users.csv personas.jsonl --product "..." --market "..."
+#
+# Personas are written one JSON object per line as soon as they are generated,
+# so nothing is kept in memory. Re-running the same command after a crash skips
+# the user types that are already in the output file.
+
+# ==================================================================================
+
+# Importing Libraries
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from user_persona_backend import generate_persona
+from profile_dedupe import dedupe_profiles
+
+# ==================================================================================
+
+# Function to read user types from the CSV one row at a time
+def read_user_types(csv_path: str, column: str = 'user'):
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        if not reader.fieldnames:
+            return
+        if column not in reader.fieldnames:
+            column = reader.fieldnames[0]
+
+        for row in reader:
+            user = (row.get(column) or '').strip()
+            if user:
+                yield user
+
+# ==================================================================================
+
+# Function to collect user types which are already written to the output file
+def written_user_types(jsonl_path: str):
+    done = set()
+    if not os.path.exists(jsonl_path):
+        return done
+
+    with open(jsonl_path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                done.add(json.loads(line)['user'])
+            except (ValueError, KeyError):
+                # Half written line from a crashed run
+                continue
+    return done
+
+# Function to drop a half written last line so that appended records stay valid
+def repair_output(jsonl_path: str):
+    if not os.path.exists(jsonl_path):
+        return
+
+    with open(jsonl_path, 'rb+') as file:
+        data = file.read()
+        if data and not data.endswith(b'\n'):
+            file.truncate(data.rfind(b'\n') + 1)
+
+# ==================================================================================
+
+# Function to generate the whole cohort with bounded concurrency
+def run_cohort(csv_path: str, out_path: str, details: dict, concurrency: int = 4, column: str = 'user', dedupe: bool = False):
+    repair_output(out_path)
+    done = written_user_types(out_path)
+    written, skipped, failed = 0, 0, 0
+
+    # Merging near-duplicate user types needs the whole list of names up front
+    user_types = read_user_types(csv_path, column)
+    aliases = {}
+    if dedupe:
+        aliases = dedupe_profiles(list(user_types))
+        user_types = iter(aliases)
+
+    with open(out_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {}
+
+        # Writing the finished personas (only this thread touches the file)
+        def write_finished(futures):
+            nonlocal written, failed
+            for future in futures:
+                user = pending.pop(future)
+                try:
+                    persona = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"Failed to generate persona for '{user}': {e}", file=sys.stderr)
+                    continue
+                record = {'user': user, 'aliases': aliases.get(user, [user]), 'persona': persona.compact()}
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                written += 1
+                print(f"[{written}] {user}")
+
+        for user in user_types:
+            if user in done:
+                skipped += 1
+                continue
+            done.add(user)
+
+            # Never keep more than `concurrency` personas in flight
+            if len(pending) >= concurrency:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                write_finished(finished)
+
+            pending[pool.submit(generate_persona, user, details)] = user
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            write_finished(finished)
+
+    return {'written': written, 'skipped': skipped, 'failed': failed}
+
+# ==================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate user personas for a CSV of user types')
+    parser.add_argument('csv_path', help='CSV file with one user type per row')
+    parser.add_argument('out_path', help='JSONL file to write personas to (appended to on resume)')
+    parser.add_argument('--product', required=True, help='Product or service details')
+    parser.add_argument('--market', required=True, help='Market details')
+    parser.add_argument('--additional', default='', help='Additional details or instructions')
+    parser.add_argument('--column', default='user', help='CSV column with the user type (default: user, else the first column)')
+    parser.add_argument('--dedupe', action='store_true', help='Generate one persona per cluster of near-duplicate user types')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of personas generated at the same time')
+    args = parser.parse_args()
+
+    details = {
+        'product_details': args.product,
+        'market_details': args.market,
+        'aditional_details': args.additional,
+    }
+
+    stats = run_cohort(args.csv_path, args.out_path, details, args.concurrency, args.column, args.dedupe)
+    print(f"Done: {stats['written']} written, {stats['skipped']} already done, {stats['failed']} failed")
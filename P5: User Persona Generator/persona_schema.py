@@ -0,0 +1,123 @@
+# P5 User Persona Generator - Persona Schema
+#     Structured persona (one field per template section) and a parser which
+#     splits a streamed persona into sections as soon as each section is closed.
+
+# ==================================================================================
+
+# Importing Libraries
+import re
+from typing import Dict, List
+
+from pydantic import BaseModel, Field
+
+# ==================================================================================
+
+# Structured persona, descriptions are the section titles of the persona template
+class Persona(BaseModel):
+    user: str = Field(description='User type the persona is written for')
+    basic_info: str = Field(default='', description='Header / Basic Info')
+    background: str = Field(default='', description='Background / Context')
+    goals_and_motivations: str = Field(default='', description='Goals & Motivations')
+    behaviors_and_preferences: str = Field(default='', description='Behaviors & Preferences')
+    pain_points: str = Field(default='', description='Pain Points / Challenges')
+    needs: str = Field(default='', description='Needs')
+    day_in_the_life: str = Field(default='', description='“A Day in the Life” or Scenario / Use-Case')
+    quote: str = Field(default='', description='Quote / Voice')
+    personality: str = Field(default='', description='Personality & Psychographics')
+    constraints: str = Field(default='', description='Technical / Environmental Constraints')
+    channels_and_influences: str = Field(default='', description='Preferred Channels & Influences')
+    opportunities: str = Field(default='', description='Opportunities / Solution Ideas')
+    measuring_success: str = Field(default='', description='Measuring Success')
+    extra: str = Field(default='', description='Text which was not inside any of the sections')
+
+    # Building a persona from {section index: text}
+    @classmethod
+    def from_sections(cls, user: str, sections: Dict[int, str], extra: str = ''):
+        values = {persona_fields[index]: text.strip() for index, text in sections.items()}
+        return cls(user=user, extra=extra.strip(), **values)
+
+    # Section texts in template order
+    def section_texts(self) -> List[str]:
+        return [getattr(self, field) for field in persona_fields]
+
+    # Full persona as markdown, in template order
+    def to_markdown(self):
+        parts = [section_markdown(index, text) for index, text in enumerate(self.section_texts()) if text]
+        if self.extra:
+            parts.append(self.extra)
+        return '\n\n'.join(parts)
+
+    # Compact form for export, empty sections are left out
+    def compact(self):
+        return self.model_dump(exclude_defaults=True)
+
+# Field names of the 13 sections, in template order
+persona_fields = [name for name in Persona.model_fields if name not in ('user', 'extra')]
+
+# ==================================================================================
+
+# Function to render one section with its numbered heading
+def section_markdown(index: int, text: str):
+    title = Persona.model_fields[persona_fields[index]].description
+    return f'**{index+1}. {title}**\n\n{text.strip()}'
+
+# ==================================================================================
+
+# Section headings look like "**3. Goals & Motivations**" or "### 3. Goals & Motivations"
+section_heading = re.compile(r'^\s*(?:#{1,6}\s*)?\*\*\s*(\d{1,2})\.\s*\S|^\s*#{1,6}\s*(\d{1,2})\.\s*\S')
+
+# Parser for a persona which arrives in chunks
+class PersonaStreamParser:
+    def __init__(self):
+        self.buffer = ''
+        self.current = None
+        self.sections = {}
+        self.closed = set()
+        self.extra = ''
+
+    # Function to handle one complete line, returns the section it changed (if any)
+    def _line(self, line: str):
+        heading = section_heading.match(line)
+        if heading:
+            number = int(heading.group(1) or heading.group(2))
+            # Numbers only move forward, so numbered lists inside a section are not headings
+            if 1 <= number <= len(persona_fields) and (self.current is None or number - 1 > self.current):
+                if self.current is not None:
+                    self.closed.add(self.current)
+                self.current = number - 1
+                self.sections[self.current] = ''
+                return self.current
+
+        if self.current is None:
+            self.extra += line + '\n'
+            return None
+
+        self.sections[self.current] += line + '\n'
+        return self.current
+
+    # Function to add a streamed chunk, returns the indexes of the sections which changed
+    def feed(self, chunk: str):
+        self.buffer += chunk
+        *lines, self.buffer = self.buffer.split('\n')
+        changed = {self._line(line) for line in lines}
+        return sorted(index for index in changed if index is not None)
+
+    # Function to flush the last line once the stream has ended
+    def close(self):
+        changed = self.feed('\n')
+        if self.current is not None:
+            self.closed.add(self.current)
+        return changed
+
+    # Function to build the persona from everything parsed so far
+    def persona(self, user: str):
+        return Persona.from_sections(user, self.sections, self.extra)
+
+# ==================================================================================
+
+# Function to parse a complete persona text
+def parse_persona(user: str, text: str):
+    parser = PersonaStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser.persona(user)
@@ -0,0 +1,167 @@
+# P5 User Persona Generator - Profile Dedupe
+#     Clusters near-duplicate user types ("Doctor", "doctors", "Physician", "medical doctor")
+#     so that each cluster needs only one persona.
+#
+# Every user type is reduced to a key (lowercase, punctuation removed, filler words dropped,
+# words singularised and known synonyms folded). Equal keys share a cluster. Other clusters
+# are found with character trigram Jaccard similarity, and joined only when every word that
+# differs is a spelling variant ("develper" / "developer"), so "Junior developer" and
+# "Senior developer" stay apart.
+
+# ==================================================================================
+
+# Importing Libraries
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+# ==================================================================================
+
+# Words which do not change the user type
+filler_words = {'a', 'an', 'the', 'of', 'and', 'or', 'for', 'in', 'at', 'on', 'with', 'user', 'users', 'people', 'professional', 'professionals'}
+
+# Irregular plurals the suffix rules below get wrong
+irregular_words = {
+    'men': 'man', 'women': 'woman', 'children': 'child', 'people': 'person',
+    'staff': 'staff', 'series': 'series', 'analyses': 'analysis', 'bases': 'base',
+    'buses': 'bus', 'statuses': 'status', 'movies': 'movie', 'cookies': 'cookie',
+    'rookies': 'rookie', 'techies': 'techie', 'foodies': 'foodie', 'newbies': 'newbie',
+}
+
+# Words ending in "s" which are not plurals ("news" is not one "new")
+uninflected_words = {
+    'news', 'sales', 'species', 'means', 'diabetes', 'lens', 'gas', 'canvas', 'atlas',
+    'alias', 'bias', 'chaos', 'kudos', 'devops', 'headquarters', 'whereabouts', 'christmas',
+}
+
+# Synonyms folded onto one canonical user type (matched on whole singular phrases)
+synonyms = {
+    'physician': 'doctor',
+    'medical doctor': 'doctor',
+    'medical practitioner': 'doctor',
+    'general practitioner': 'doctor',
+    'gp': 'doctor',
+    'programmer': 'developer',
+    'coder': 'developer',
+    'software developer': 'developer',
+    'software engineer': 'developer',
+    'dev': 'developer',
+    'educator': 'teacher',
+    'instructor': 'teacher',
+    'pupil': 'student',
+    'learner': 'student',
+    'grower': 'farmer',
+    'shop owner': 'shopkeeper',
+    'store owner': 'shopkeeper',
+    'small business owner': 'business owner',
+    'entrepreneur': 'business owner',
+    'freelance': 'freelancer',
+    'nurse practitioner': 'nurse',
+}
+
+# ==================================================================================
+
+# Function to turn a plural word into its singular form
+def lemmatize(word: str):
+    if word in irregular_words:
+        return irregular_words[word]
+    # "physics", "analytics", "economics" are singular as well
+    if word in uninflected_words or len(word) <= 3 or word.endswith(('ss', 'us', 'is', 'ics')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+# Function to build the comparison key of a user type
+def profile_key(profile: str):
+    words = re.sub(r'[^a-z0-9 ]+', ' ', profile.lower()).split()
+    words = [lemmatize(word) for word in words if word not in filler_words]
+    key = ' '.join(words)
+    return synonyms.get(key, key)
+
+# Function to get the character trigrams of a key (padded so that word edges count)
+def trigrams(key: str):
+    padded = f' {key} '
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+# Function to count the edits (insert, delete, substitute, swap two neighbours) between two words
+def edit_distance(first: str, second: str):
+    previous, current = None, list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i-1] != second[j-1]
+            current[j] = min(previous[j] + 1, current[j-1] + 1, previous[j-1] + cost)
+            if i > 1 and j > 1 and first[i-1] == second[j-2] and first[i-2] == second[j-1]:
+                current[j] = min(current[j], before[j-2] + 1)
+    return current[-1]
+
+# Function to tell whether two words are spellings of the same word ("organisation", "organization")
+#     Short words are never variants ("nurse" / "purse"), and typos rarely change the first letter
+#     ("junior" / "senior")
+def spelling_variants(first: str, second: str):
+    if first == second:
+        return True
+    shorter = min(len(first), len(second))
+    if shorter < 5 or first[0] != second[0]:
+        return False
+    return edit_distance(first, second) <= (1 if shorter < 9 else 2)
+
+# Function to tell whether two keys name the same user type: same words up to spelling
+def same_user_type(key: str, other: str):
+    words, other_words = key.split(), other.split()
+    return len(words) == len(other_words) and all(spelling_variants(a, b) for a, b in zip(words, other_words))
+
+# ==================================================================================
+
+# Function to cluster user types, returns {representative: [aliases]} in input order
+def dedupe_profiles(profiles: List[str], threshold: float = 0.4) -> Dict[str, List[str]]:
+    clusters = {}                      # representative -> aliases
+    cluster_keys = {}                  # key -> representative
+    cluster_grams = {}                 # representative -> trigrams of its key
+    representative_keys = {}          # representative -> its key
+    gram_index = defaultdict(set)      # trigram -> representatives having it
+
+    for profile in profiles:
+        profile = profile.strip()
+        if not profile:
+            continue
+        key = profile_key(profile) or profile.lower()
+
+        # Same key, same user type
+        if key in cluster_keys:
+            clusters[cluster_keys[key]].append(profile)
+            continue
+
+        # Spelling variants: best trigram Jaccard among clusters sharing a trigram, whose
+        # differing words are only spelled differently
+        grams = trigrams(key)
+        overlaps = defaultdict(int)
+        for gram in grams:
+            for representative in gram_index[gram]:
+                overlaps[representative] += 1
+
+        best, best_score = None, threshold
+        for representative, overlap in overlaps.items():
+            score = overlap / (len(grams) + len(cluster_grams[representative]) - overlap)
+            if score >= best_score and same_user_type(key, representative_keys[representative]):
+                best, best_score = representative, score
+
+        if best is not None:
+            clusters[best].append(profile)
+            cluster_keys[key] = best
+            continue
+
+        # New cluster
+        clusters[profile] = [profile]
+        cluster_keys[key] = profile
+        cluster_grams[profile] = grams
+        representative_keys[profile] = key
+        for gram in grams:
+            gram_index[gram].add(profile)
+
+    return clusters
@@ -0,0 +1,49 @@
+# Tests for profile_dedupe.py (python -m unittest test_profile_dedupe)
+
+import unittest
+
+from profile_dedupe import dedupe_profiles, lemmatize, profile_key
+
+# ==================================================================================
+
+class LemmatizeTest(unittest.TestCase):
+
+    def test_plurals(self):
+        for plural, singular in [('doctors', 'doctor'), ('nurses', 'nurse'), ('businesses', 'business'),
+                                 ('nannies', 'nanny'), ('women', 'woman'), ('rookies', 'rookie')]:
+            self.assertEqual(lemmatize(plural), singular)
+
+    def test_words_ending_in_s_which_are_not_plurals(self):
+        for word in ['news', 'sales', 'species', 'physics', 'analytics', 'status', 'analysis']:
+            self.assertEqual(lemmatize(word), word)
+
+    def test_news_reporter_is_not_new_reporter(self):
+        self.assertNotEqual(profile_key('News reporter'), profile_key('New reporter'))
+        self.assertEqual(profile_key('Sales managers'), 'sales manager')
+
+class DedupeProfilesTest(unittest.TestCase):
+
+    def test_near_duplicates_are_merged(self):
+        clusters = dedupe_profiles(['Doctor', 'doctors', 'Physician', 'medical doctor', 'Software developer', 'Develper'])
+        self.assertEqual(clusters, {
+            'Doctor': ['Doctor', 'doctors', 'Physician', 'medical doctor'],
+            'Software developer': ['Software developer', 'Develper'],
+        })
+
+    def test_spelling_variants_are_merged(self):
+        clusters = dedupe_profiles(['Data analyst', 'Data analist', 'Organisation manager', 'Organization manager'])
+        self.assertEqual(list(clusters), ['Data analyst', 'Organisation manager'])
+
+    def test_different_user_types_are_kept_apart(self):
+        for pair in [
+            ['Junior developer', 'Senior developer'],
+            ['News reporter', 'New reporter'],
+            ['Sales manager', 'Sale manager'],
+            ['Nurse', 'Purse'],
+            ['Product manager', 'Project manager'],
+            ['Frontend developer', 'Backend developer'],
+        ]:
+            self.assertEqual(len(dedupe_profiles(pair)), 2, pair)
+
+if __name__ == '__main__':
+    unittest.main()
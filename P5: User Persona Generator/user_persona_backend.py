@@ -0,0 +1,243 @@
+# P5 User Persona Generator - Backend (model, state, nodes and graph)
+
+# ==================================================================================
+
+# Importing Libraries
+from langgraph.graph import START, END
+from typing import TypedDict, List, Dict, Annotated
+import operator
+from dotenv import load_dotenv
+
+# For structured output
+from pydantic import BaseModel, Field
+from langchain.output_parsers import PydanticOutputParser
+from langchain.prompts import PromptTemplate
+
+# For merging near-duplicate user types
+from profile_dedupe import dedupe_profiles
+
+# Structured persona
+from persona_schema import Persona, parse_persona
+
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.llm_factory import get_chat_model
+from shared.tracing import TracedStateGraph
+
+load_dotenv()
+
+# ==================================================================================
+
+# Model Initilisation (shared, pooled client from shared/llm_factory.py)
+model = get_chat_model()
+
+# ==================================================================================
+
+# Structured output schema using Pydantic
+class Users(BaseModel):
+    users :List[str] = Field(description='List of prodect users')
+
+parser = PydanticOutputParser(pydantic_object=Users)
+instructions = parser.get_format_instructions()
+
+prompt = PromptTemplate(
+    template='From the givem input text extract the users profile. Examples : Doctor, Engineer, Driver, farmer, and etc\n Input: {profiles}\n\n Instructions: {instructions}',
+    input_variables=['profiles'],
+    partial_variables={'instructions': instructions}
+)
+
+structured_model = prompt | model | parser
+
+# ==================================================================================
+
+# Defining State
+class personaState(TypedDict):
+    product_details: str
+    market_details : str
+    aditional_details : str
+    users : str
+    user_list : List[str]
+    user_aliases : List[List[str]]
+    user_count: int
+    counter :  int = 0
+    user_persona : Annotated[List[Persona], operator.add]
+    parallel_sections : bool
+    persona_sections : Annotated[Dict[int, str], operator.or_]
+# ==================================================================================
+
+# Function to get user profile list
+def get_profiles(state: personaState):
+    users = structured_model.invoke({'profiles': state['users']})
+    user_count = len(users.users)
+    return {'user_list': users.users, 'user_count': user_count}
+
+# Function to merge near-duplicate user types, one persona is generated per cluster
+def dedupe_user_profiles(state: personaState):
+    clusters = dedupe_profiles(state['user_list'])
+    user_list = list(clusters)
+    return {'user_list': user_list, 'user_aliases': list(clusters.values()), 'user_count': len(user_list)}
+
+# ==================================================================================
+
+# Persona template, one entry per section so that sections can be generated in groups
+persona_sections = [
+'''**1. Header / Basic Info**
+
+* Persona Name (a fictional name, e.g. “Tech-Savvy Tara”)
+* Title / Role (e.g. “Teacher”, “Freelancer”, “IT Manager”)
+* Demographics
+
+  * Age
+  * Location / City / Country
+  * Education level
+  * Occupation / Industry
+  * Other relevant demographic traits (income range, gender, etc.)''',
+'''**2. Background / Context**
+
+* A short biography or description: what their life / work is like, what contexts they use your product in.
+* Experience with technology / skill level (beginner / intermediate / expert)
+* Everyday environment: where and how they do tasks (mobile / desktop, on the move, office etc.)''',
+'''**3. Goals & Motivations**
+
+* What they want to achieve using your product or in general (both short-term and long-term goals)
+* What motivates them: why they care about those goals; what drives their behavior''',
+'''**4. Behaviors & Preferences**
+
+* How they use similar products now
+* Frequency of use / when / in which contexts
+* Technology preferences (devices, platforms, level of customisation, etc.)
+* Communication / learning style (do they like video tutorials, reading documentation, hands-on learning, etc.)''',
+'''**5. Pain Points / Challenges**
+
+* What frustrates them / what obstacles prevent them from achieving their goals
+* What problems they regularly face, especially in context of your domain or solution''',
+'''**6. Needs**
+
+* What kind of product features or support would help them most
+* What expectations they have from a solution''',
+'''**7. “A Day in the Life” or Scenario / Use-Case**
+
+* A short narrative: what a typical day looks like, where the product fits in, when and why they would use it
+* Could include what steps they would take to achieve something, showing touchpoints with your product''',
+'''**8. Quote / Voice**
+
+* A quote that captures their attitude or frustration, taken (ideally) from an interview or survey (“I hate waiting for the page to load…” etc.)''',
+'''**9. Personality & Psychographics**
+
+* Traits (e.g. “analytical”, “social”, “organized”, “risk-averse”, etc.)
+* Values / beliefs relevant to product usage
+* Attitudes (towards technology, innovation, change, etc.)''',
+'''**10. Technical / Environmental Constraints**
+
+* Devices used (phone, laptop, etc.) and browser/OS if relevant
+* Network constraints (slow internet, data limits)
+* Accessibility needs (e.g. vision, hearing etc.)''',
+'''**11. Preferred Channels & Influences**
+
+* How they prefer to research / discover tools / get help (forums, social media, recommendations, docs, YouTube etc.)
+* Which influencers, brands or platforms they trust''',
+'''**12. Opportunities / Solution Ideas** *(optional but useful)*
+
+* Key opportunities for design or product improvements based on their challenges and needs
+* Possible features or interventions that might resonate well with this persona''',
+'''**13. Measuring Success** *(optional)*
+
+* What metrics or signals would show that your product is satisfying their needs (e.g. engagement, retention, task completion rate, satisfaction etc.)'''
+]
+
+persona_template = '\n\n'.join(persona_sections)
+
+# Section groups for section-parallel mode (indexes into persona_sections)
+section_groups = [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11, 12]]
+section_nodes = [f'get_sections_{i+1}' for i in range(len(section_groups))]
+
+# ==================================================================================
+
+# Function to build the persona prompt for one user and a (partial) template
+def persona_prompt(state: personaState, user: str, template: str):
+    return f'User has a product, whose details are : {state['product_details']}\n The market details where product is going are : {state['market_details']}\n Analysis the product details, market details and generate User persona for\n User: {user}\n\n {template}\n\n Start every section with its heading exactly as written above (bold, with its number).\n consider additional details provides by user: { state['aditional_details']}\n Response'
+
+# ==================================================================================
+
+def get_persona(state: personaState):
+    counter = state.get('counter',0)
+    user = state['user_list'][counter]
+
+    prompt = persona_prompt(state, user, '\n' + persona_template)
+    
+    result = model.invoke(prompt).content
+    counter = state['counter'] + 1
+    return {'user_persona':[parse_persona(user, result)], 'counter': counter}
+
+# ==================================================================================
+
+# Section-parallel mode: each node writes one group of sections for the current user
+def get_sections(group: int):
+    def section_node(state: personaState):
+        user = state['user_list'][state['counter']]
+        template = '\n\n'.join(persona_sections[i] for i in section_groups[group])
+        prompt = persona_prompt(state, user, f'Only write the following sections of the persona, keep their headings and numbering:\n\n{template}')
+
+        result = model.invoke(prompt).content
+        return {'persona_sections': {group: result}}
+
+    return section_node
+
+# Stitching the section groups back together in template order
+def stitch_persona(state: personaState):
+    user = state['user_list'][state['counter']]
+    sections = state['persona_sections']
+    persona = '\n\n'.join(sections[group] for group in range(len(section_groups)))
+    counter = state['counter'] + 1
+    return {'user_persona': [parse_persona(user, persona)], 'counter': counter}
+
+# ==================================================================================
+
+# Defining Iterating Function
+def interator(state: personaState):
+    if state['counter'] == state['user_count']:
+        return "END"
+    elif state.get('parallel_sections'):
+        return section_nodes
+    else:
+        return 'get_persona'
+    
+# ==================================================================================
+
+# Graph Initilising
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(personaState, name='p5.persona_graph')
+
+# Adding nodes
+graph.add_node('get_profiles', get_profiles)
+graph.add_node('dedupe_user_profiles', dedupe_user_profiles)
+graph.add_node('get_persona', get_persona)
+for i, node in enumerate(section_nodes):
+    graph.add_node(node, get_sections(i))
+graph.add_node('stitch_persona', stitch_persona)
+
+# Adding Edges
+persona_routes = {'END': END, 'get_persona': 'get_persona', **{node: node for node in section_nodes}}
+
+graph.add_edge(START, "get_profiles")
+graph.add_edge('get_profiles', 'dedupe_user_profiles')
+graph.add_conditional_edges('dedupe_user_profiles', interator, persona_routes)
+graph.add_conditional_edges('get_persona', interator, persona_routes)
+for node in section_nodes:
+    graph.add_edge(node, 'stitch_persona')
+graph.add_conditional_edges('stitch_persona', interator, persona_routes)
+
+# Compiling graph
+persona_graph = graph.compile()
+
+# ==================================================================================
+
+# Function to generate a single persona outside of the graph loop (used by cohort mode)
+def generate_persona(user: str, details: dict) -> Persona:
+    state = {**details, 'user_list': [user], 'counter': 0}
+    return get_persona(state)['user_persona'][0]
+
+# ==================================================================================
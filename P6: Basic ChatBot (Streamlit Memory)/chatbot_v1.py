@@ -1,11 +1,22 @@
 # Basic Chat Bot with memory
 
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import START, END
 from langgraph.graph.message import add_messages
-from typing import TypedDict, Annotated, Literal
+from typing import TypedDict, Annotated
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+from langchain_core.runnables import RunnableConfig
 import streamlit as st
+import os
+import sys
+import uuid
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.chat_memory import memory_prompt, remember_reply, summarizer
+from shared.latest_saver import LatestCheckpointSaver
+from shared.llm_factory import get_chat_model
+from shared.response_cache import response_cache_from_env, cached_invoke
+from shared.tracing import TracedStateGraph
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -16,96 +27,128 @@ load_dotenv()
 class ChatState(TypedDict):
 
     messages: Annotated[list[BaseMessage], add_messages]
+    # running summary of messages[:summarized]
+    summary: str
+    summarized: int
+    # token budget window: messages[window_start:] plus the pinned ones, counted up to messages[:counted]
+    window_start: int
+    window_tokens: int
+    counted: int
+    pinned: list[int]
 
-llm = HuggingFaceEndpoint(
-    endpoint_url="openai/gpt-oss-20b",
-    task="text-generation",
-    )
+# Shared, pooled client (shared/llm_factory.py)
+model = get_chat_model()
+
+# Optional cache of replies to repeated questions (CHAT_RESPONSE_CACHE=1), cached so that it survives reruns
+@st.cache_resource
+def get_response_cache():
+    return response_cache_from_env()
 
-model = ChatHuggingFace(llm=llm)
+response_cache = get_response_cache()
 
 # ====================================================================================
 
-def chat_node(state: ChatState):
+def chat_node(state: ChatState, config: RunnableConfig):
+
+    # pick up the summary finished in the background since the last turn, if there is one
+    thread_id = config['configurable']['thread_id']
+    summary = summarizer.collect(thread_id, state)
+    state = {**state, **summary}
+
+    # take user query from state (trimmed or summarized by the memory policy)
+    messages, memory = memory_prompt(state)
 
-    # take user query from state
-    messages = state['messages']
+    # send to llm (a cached reply is replayed instead)
+    response = cached_invoke(response_cache, model, messages)
 
-    # send to llm
-    response = model.invoke(messages)
+    # fold older turns into the summary on a worker thread, the reply does not wait for it
+    summarizer.schedule(thread_id, model, {**state, 'messages': state['messages'] + [response]})
 
-    # response store state
-    return {'messages': [response]}
+    # response store state (with the summary picked up)
+    return {**summary, **remember_reply(memory, response)}
 
 # ====================================================================================
 
-graph = StateGraph(ChatState)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(ChatState, name='p6.chatbot')
 # adding node
 graph.add_node('chat_node', chat_node)
 # adding edges
 graph.add_edge(START, 'chat_node')
 graph.add_edge('chat_node', END)
 # Compiling graph
-chatbot = graph.compile()
+# The checkpointer holds the history of every session (one thread per session), cached so that it survives reruns.
+# Sessions never say when they end, so threads idle for CHAT_SESSION_IDLE_HOURS (default 6) are dropped, and
+# beyond CHAT_MAX_SESSIONS threads (default 1000) the least recently used go first
+@st.cache_resource
+def get_checkpointer():
+    return LatestCheckpointSaver(
+        max_threads=int(os.getenv('CHAT_MAX_SESSIONS', '1000')),
+        idle_ttl=float(os.getenv('CHAT_SESSION_IDLE_HOURS', '6')) * 3600,
+    )
+
+checkpointer = get_checkpointer()
+chatbot = graph.compile(checkpointer=checkpointer)
 
 # ====================================================================================
 
 # Streamlit Web App Interface
 
+# Number of messages drawn per page of history
+PAGE_SIZE = 20
+
 st.title("AI Chatbot v1.0")
 st.write("Chat with your AI assistant")
     
-# Initializing session state for conversation history
-if "conversation" not in st.session_state:
-    st.session_state.conversation = []
-    st.session_state.messages = []
+# Initializing the session: one checkpointer thread per session, which is the only copy of the conversation
+if "thread_id" not in st.session_state:
+    st.session_state.history_pages = 1
+    st.session_state.thread_id = str(uuid.uuid4())
     
 # Sidebar for conversation history management
 with st.sidebar:
     st.subheader("Conversation History")
         
     if st.button("Clear Conversation"):
-        st.session_state.conversation = []
-        st.session_state.messages = []
+        checkpointer.delete_thread(st.session_state.thread_id)
+        st.session_state.history_pages = 1
+        st.session_state.thread_id = str(uuid.uuid4())
         st.rerun()
+
+    if response_cache:
+        stats = response_cache.stats()
+        st.caption(f"Response cache: {stats['hits']} hits ({stats['hit_rate']:.0%}), {stats['latency_saved']:.1f}s saved")
         
 
-# Displaying conversation history
-for message in st.session_state.conversation:
-    with st.chat_message(message["role"]):
-        st.write(message["content"])
+# Displaying conversation history from the checkpointer thread, only the newest pages are read and drawn
+# (load_messages slices the newest messages kept by the saver, the whole conversation is not deserialized on every rerun)
+shown = st.session_state.history_pages * PAGE_SIZE
+page, total = checkpointer.load_messages(st.session_state.thread_id, shown)
+history = [message for message in page if isinstance(message, (HumanMessage, AIMessage))]
+
+if total > shown and st.button("Load earlier messages"):
+    st.session_state.history_pages += 1
+    st.rerun()
+
+for message in history:
+    with st.chat_message("You" if isinstance(message, HumanMessage) else "assistant"):
+        st.write(message.content)
     
 # Chat input
 
 prompt = st.chat_input("Ask: ")
 if prompt:
-    # Add user message to conversation
-    st.session_state.conversation.append({"role": "You", "content": prompt})
     with st.chat_message("You"):
         st.write(prompt)
         
-    # Convert conversation to LangChain messages
-    
-    msg = st.session_state.conversation[-1]
-    if msg["role"] == "You":
-        st.session_state.messages.append(HumanMessage(content=msg["content"]))
-    elif msg["role"] == "AI":
-        st.session_state.messages.append(AIMessage(content=msg["content"]))
-        
-    # Get response from chatbot
+    # Get response from chatbot (only the new message is sent, the history lives in the checkpointer thread)
     with st.chat_message("AI"):
         with st.spinner("Thinking..."):
                 # Use your existing chatbot
-                response = chatbot.invoke({"messages": st.session_state.messages})
+                response = chatbot.invoke({"messages": [HumanMessage(content=prompt)]}, config=config)
                 bot_message = response["messages"][-1].content
                     
                 st.write(bot_message)
-                    
-                # Add bot response to conversation
-                st.session_state.conversation.append({
-                        "role": "assistant", 
-                        "content": bot_message
-                    })
     
 
 
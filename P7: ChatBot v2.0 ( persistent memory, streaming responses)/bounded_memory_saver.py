@@ -0,0 +1,367 @@
+# Bounded in-memory checkpointer for the ChatBot v2.0 graph
+#     For deployments without a database. InMemorySaver keeps every checkpoint of every
+#     thread forever; this one keeps only the last `keep` checkpoints per thread and caps
+#     the number of threads and the bytes held. Idle threads are evicted least recently
+#     used first, and are optionally spilled to a directory and loaded back on next use.
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+# Rough per-entry overhead of the Python containers, added to the serialized sizes
+ENTRY_OVERHEAD = 200
+
+# =================================================================================================
+
+class BoundedMemorySaver(BaseCheckpointSaver):
+    """Checkpointer keeping serialized checkpoints in process memory, within fixed limits.
+
+    Every thread is one entry of an LRU map (thread_id -> checkpoints, writes, size).
+    Checkpoints are stored serialized, so the byte count is exact for the payload.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: Optional[int] = 1000,
+        max_bytes: Optional[int] = 256 * 1024 * 1024,
+        keep: int = 2,
+        spill_dir: Optional[str] = None,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.keep = max(1, keep)
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.threads: 'OrderedDict[str, dict]' = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+
+    # ---------------------------------------------------------------------------------------------
+    # Thread entries
+
+    # Function to get the entry of a thread (loading it back from the spill directory if needed)
+    #     A thread loaded back or created counts against the limits at once, whichever path
+    #     (get_tuple, list, set_thread_title, put) brought it in
+    def _entry(self, thread_id: str, create: bool = False) -> Optional[dict]:
+        entry = self.threads.get(thread_id)
+        if entry is None:
+            entry = self._load_spilled(thread_id)
+            if entry is None and create:
+                entry = {'checkpoints': {}, 'writes': {}, 'size': 0, 'title': None, 'user_id': None, 'updated_at': time.time()}
+            if entry is None:
+                return None
+            self.threads[thread_id] = entry
+            self.size += entry['size']
+            self._evict(thread_id)
+        self.threads.move_to_end(thread_id)
+        return entry
+
+    # Function to change the byte count of a thread
+    def _grow(self, entry: dict, amount: int) -> None:
+        entry['size'] += amount
+        self.size += amount
+
+    # Function to evict least recently used threads until the limits hold (never `current`)
+    def _evict(self, current: str) -> None:
+        while len(self.threads) > 1 and (
+            (self.max_threads is not None and len(self.threads) > self.max_threads)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            thread_id = next(iter(self.threads))
+            if thread_id == current:
+                self.threads.move_to_end(thread_id)
+                thread_id = next(iter(self.threads))
+            entry = self.threads.pop(thread_id)
+            self.size -= entry['size']
+            self.evictions += 1
+            if self.spill_dir:
+                self._spill(thread_id, entry)
+
+    # Function to drop the oldest checkpoints of a namespace (and their writes) beyond `keep`
+    def _trim(self, entry: dict, checkpoint_ns: str) -> None:
+        checkpoints = entry['checkpoints'][checkpoint_ns]
+        while len(checkpoints) > self.keep:
+            checkpoint_id = min(checkpoints)
+            saved = checkpoints.pop(checkpoint_id)
+            self._grow(entry, -(len(saved[2]) + len(saved[4]) + ENTRY_OVERHEAD))
+            for write in entry['writes'].pop((checkpoint_ns, checkpoint_id), {}).values():
+                self._grow(entry, -(len(write[2]) + ENTRY_OVERHEAD))
+
+    # ---------------------------------------------------------------------------------------------
+    # Spill directory (one JSON file per evicted thread)
+
+    def _spill_path(self, thread_id: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(thread_id.encode('utf-8')).hexdigest() + '.json')
+
+    def _spill(self, thread_id: str, entry: dict) -> None:
+        encode = lambda data: base64.b64encode(data).decode('ascii')
+        record = {
+            'thread_id': thread_id,
+            'title': entry['title'],
+            'user_id': entry['user_id'],
+            'updated_at': entry['updated_at'],
+            'checkpoints': [
+                [checkpoint_ns, checkpoint_id, parent_id, type_, encode(data), metadata_type, encode(metadata)]
+                for checkpoint_ns, checkpoints in entry['checkpoints'].items()
+                for checkpoint_id, (parent_id, type_, data, metadata_type, metadata) in checkpoints.items()
+            ],
+            'writes': [
+                [checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, encode(data), task_path]
+                for (checkpoint_ns, checkpoint_id), writes in entry['writes'].items()
+                for (task_id, idx), (channel, type_, data, task_path) in writes.items()
+            ],
+        }
+        # Written under a temporary name first, so a crash never leaves a half written file
+        path = self._spill_path(thread_id)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(record, file)
+        os.replace(path + '.tmp', path)
+
+    def _load_spilled(self, thread_id: str) -> Optional[dict]:
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(thread_id)
+        try:
+            with open(path, encoding='utf-8') as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return None
+        os.remove(path)
+
+        decode = base64.b64decode
+        entry = {
+            'checkpoints': {}, 'writes': {}, 'size': 0,
+            'title': record['title'], 'user_id': record.get('user_id'), 'updated_at': record['updated_at'],
+        }
+        for checkpoint_ns, checkpoint_id, parent_id, type_, data, metadata_type, metadata in record['checkpoints']:
+            saved = (parent_id, type_, decode(data), metadata_type, decode(metadata))
+            entry['checkpoints'].setdefault(checkpoint_ns, {})[checkpoint_id] = saved
+            entry['size'] += len(saved[2]) + len(saved[4]) + ENTRY_OVERHEAD
+        for checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, data, task_path in record['writes']:
+            write = (channel, type_, decode(data), task_path)
+            entry['writes'].setdefault((checkpoint_ns, checkpoint_id), {})[(task_id, idx)] = write
+            entry['size'] += len(write[2]) + ENTRY_OVERHEAD
+        return entry
+
+    # ---------------------------------------------------------------------------------------------
+    # Reading
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, entry: dict) -> CheckpointTuple:
+        parent_id, type_, data, metadata_type, metadata = entry['checkpoints'][checkpoint_ns][checkpoint_id]
+        writes = entry['writes'].get((checkpoint_ns, checkpoint_id), {})
+        return CheckpointTuple(
+            config={'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, data)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for (task_id, _), (channel, type_, value, _) in sorted(writes.items())
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+
+        with self.lock:
+            entry = self._entry(thread_id)
+            checkpoints = entry['checkpoints'].get(checkpoint_ns) if entry else None
+            if not checkpoints:
+                return None
+            checkpoint_id = get_checkpoint_id(config) or max(checkpoints)
+            if checkpoint_id not in checkpoints:
+                return None
+            return self._tuple(thread_id, checkpoint_ns, checkpoint_id, entry)
+
+    # Function to read a page of the messages of a thread (same interface as SqliteCheckpointSaver),
+    # only the checkpoint itself is deserialized, not its metadata and pending writes
+    def load_messages(self, thread_id: str, count: int, offset: int = 0, checkpoint_ns: str = '') -> tuple:
+        with self.lock:
+            entry = self._entry(thread_id)
+            checkpoints = entry['checkpoints'].get(checkpoint_ns) if entry else None
+            if not checkpoints:
+                return [], 0
+            _, type_, data, _, _ = checkpoints[max(checkpoints)]
+        messages = self.serde.loads_typed((type_, data))['channel_values'].get('messages') or []
+        total = len(messages)
+        return messages[max(0, total - offset - count):max(0, total - offset)], total
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        before_id = get_checkpoint_id(before) if before else None
+
+        # Collecting the keys under the lock, the tuples are built outside of it
+        with self.lock:
+            if config:
+                thread_id = config['configurable']['thread_id']
+                entries = [(thread_id, self._entry(thread_id))]
+            else:
+                entries = list(self.threads.items())
+
+            keys = []
+            for thread_id, entry in entries:
+                if entry is None:
+                    continue
+                for checkpoint_ns, checkpoints in entry['checkpoints'].items():
+                    if config and config['configurable'].get('checkpoint_ns') not in (None, checkpoint_ns):
+                        continue
+                    for checkpoint_id in checkpoints:
+                        if config and (wanted := get_checkpoint_id(config)) and checkpoint_id != wanted:
+                            continue
+                        if before_id and checkpoint_id >= before_id:
+                            continue
+                        keys.append((checkpoint_id, thread_id, checkpoint_ns, entry))
+            keys.sort(key=lambda key: key[0], reverse=True)
+
+        for checkpoint_id, thread_id, checkpoint_ns, entry in keys:
+            if limit is not None and limit <= 0:
+                break
+            with self.lock:
+                if checkpoint_id not in entry['checkpoints'].get(checkpoint_ns, {}):
+                    continue
+                item = self._tuple(thread_id, checkpoint_ns, checkpoint_id, entry)
+            if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield item
+
+    # ---------------------------------------------------------------------------------------------
+    # Writing
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.lock:
+            entry = self._entry(thread_id, create=True)
+            entry['checkpoints'].setdefault(checkpoint_ns, {})[checkpoint['id']] = (
+                config['configurable'].get('checkpoint_id'), type_, data, metadata_type, metadata_data,
+            )
+            entry['updated_at'] = time.time()
+            entry['user_id'] = entry['user_id'] or config['configurable'].get('user_id')
+            self._grow(entry, len(data) + len(metadata_data) + ENTRY_OVERHEAD)
+            self._trim(entry, checkpoint_ns)
+            self._evict(thread_id)
+
+        return {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint['id']}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = config['configurable']['checkpoint_id']
+
+        with self.lock:
+            entry = self._entry(thread_id, create=True)
+            # Writes of a checkpoint which was already trimmed away are not needed any more
+            if checkpoint_id not in entry['checkpoints'].get(checkpoint_ns, {}):
+                return
+            stored = entry['writes'].setdefault((checkpoint_ns, checkpoint_id), {})
+            for idx, (channel, value) in enumerate(writes):
+                key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                # Special channels (errors, interrupts...) replace earlier writes, regular ones never do
+                if key in stored and channel not in WRITES_IDX_MAP:
+                    continue
+                type_, data = self.serde.dumps_typed(value)
+                if key in stored:
+                    self._grow(entry, -(len(stored[key][2]) + ENTRY_OVERHEAD))
+                stored[key] = (channel, type_, data, task_path)
+                self._grow(entry, len(data) + ENTRY_OVERHEAD)
+            self._evict(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            entry = self.threads.pop(thread_id, None)
+            if entry:
+                self.size -= entry['size']
+            if self.spill_dir and os.path.exists(self._spill_path(thread_id)):
+                os.remove(self._spill_path(thread_id))
+
+    # ---------------------------------------------------------------------------------------------
+    # Thread index (same interface as SqliteCheckpointSaver, spilled threads are not listed)
+
+    def list_threads(self, limit: int = 50, offset: int = 0, user_id: Optional[str] = None) -> List[dict]:
+        with self.lock:
+            threads = sorted(
+                ({'thread_id': thread_id, 'title': entry['title'], 'updated_at': entry['updated_at'], 'user_id': entry['user_id']}
+                 for thread_id, entry in self.threads.items() if user_id is None or entry['user_id'] == user_id),
+                key=lambda thread: thread['updated_at'], reverse=True,
+            )
+        return threads[offset:offset + limit]
+
+    def set_thread_title(self, thread_id: str, title: str, user_id: Optional[str] = None) -> None:
+        with self.lock:
+            entry = self._entry(thread_id, create=True)
+            entry['title'] = entry['title'] or title
+            entry['user_id'] = entry['user_id'] or user_id
+
+    # Memory use for monitoring
+    def stats(self) -> dict:
+        with self.lock:
+            return {'threads': len(self.threads), 'bytes': self.size, 'evictions': self.evictions}
+
+    # ---------------------------------------------------------------------------------------------
+    # Async interface (everything is in memory, nothing to await)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path='') -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
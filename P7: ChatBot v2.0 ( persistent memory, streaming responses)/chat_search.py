@@ -0,0 +1,162 @@
+# Full-text search over the ChatBot v2.0 conversations
+#     Message text is indexed with SQLite FTS5 once each turn is saved, so searching never
+#     reads checkpoints. Messages are keyed by their id, indexing the same message twice is
+#     a no-op and backfilling a thread is always safe. Every message row carries the user
+#     owning its thread, so the search of one user is a filter on the index, never a list of
+#     that user's threads.
+#
+# Index threads which were written before search existed, and search from the shell:
+#     python chat_search.py backfill
+#     python chat_search.py search "vector database"
+
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+# =================================================================================================
+
+# Message rows plus an external-content FTS5 index over their text, kept in sync by triggers
+schema = '''
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    message_id TEXT NOT NULL UNIQUE,
+    thread_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    content TEXT NOT NULL,
+    user_id TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_by_thread ON messages (thread_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+'''
+
+# Message owners (user_id of the graph config), added to indexes created before it existed
+owner_schema = '''
+CREATE INDEX IF NOT EXISTS messages_by_user ON messages (user_id);
+'''
+
+# Function to turn free text into an FTS5 query: every word must match, the last one as a prefix
+def fts_query(text: str) -> Optional[str]:
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+# =================================================================================================
+
+class ChatSearchIndex:
+    def __init__(self, path: str = 'chat_search.db'):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self.conn.executescript(schema)
+        if 'user_id' not in [column[1] for column in self.conn.execute('PRAGMA table_info(messages)')]:
+            self.conn.execute('ALTER TABLE messages ADD COLUMN user_id TEXT')
+        self.conn.executescript(owner_schema)
+
+    # Function to index messages of a thread owned by `user_id` (messages already indexed are skipped,
+    # only their missing owner is filled in)
+    def add(self, thread_id: str, messages: Iterable[BaseMessage], user_id: Optional[str] = None) -> None:
+        now = time.time()
+        rows = [
+            (message.id, thread_id, 'user' if isinstance(message, HumanMessage) else message.type, now, message.content, user_id)
+            for message in messages
+            if message.id and isinstance(message.content, str) and message.content.strip() and message.type in ('human', 'ai')
+        ]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT INTO messages (message_id, thread_id, role, created_at, content, user_id) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (message_id) DO UPDATE SET user_id = COALESCE(user_id, excluded.user_id)',
+                rows,
+            )
+            self.conn.execute('COMMIT')
+
+    # Function to search message text, best matches first (only in `thread_id` / the threads of `user_id` when given)
+    def search(self, text: str, limit: int = 20, thread_id: Optional[str] = None, user_id: Optional[str] = None) -> List[dict]:
+        query = fts_query(text)
+        if query is None:
+            return []
+        sql = (
+            "SELECT m.thread_id, m.role, m.created_at, snippet(messages_fts, 0, '**', '**', '…', 12) "
+            'FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid WHERE messages_fts MATCH ?'
+        )
+        params = [query]
+        if thread_id:
+            sql += ' AND m.thread_id = ?'
+            params.append(thread_id)
+        if user_id is not None:
+            sql += ' AND m.user_id = ?'
+            params.append(user_id)
+        sql += ' ORDER BY rank LIMIT ?'
+        params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {'thread_id': thread_id, 'role': role, 'created_at': created_at, 'snippet': snippet}
+            for thread_id, role, created_at, snippet in rows
+        ]
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            self.conn.execute('DELETE FROM messages WHERE thread_id = ?', (thread_id,))
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+# Function to pick the last turn of a thread: its newest reply and the input since the reply before it
+def last_turn(messages: List[BaseMessage]) -> List[BaseMessage]:
+    end = len(messages)
+    while end > 0 and messages[end - 1].type != 'ai':
+        end -= 1
+    start = end - 1
+    while start > 0 and messages[start - 1].type != 'ai':
+        start -= 1
+    return messages[max(start, 0):end]
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Full-text search over the chatbot conversations')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('backfill', help='Index every thread of the configured checkpointer')
+    search_parser = commands.add_parser('search', help='Search message text')
+    search_parser.add_argument('text')
+    search_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    # The backend owns the checkpointer and the index path
+    from chatbot_v2_backend import chatbot, checkpointer, search_index
+
+    if args.command == 'backfill':
+        threads = checkpointer.list_threads(limit=2**31)
+        for thread in threads:
+            state = chatbot.get_state({'configurable': {'thread_id': thread['thread_id']}})
+            search_index.add(thread['thread_id'], state.values.get('messages', []), thread['user_id'])
+        print(f'Indexed {len(threads)} threads')
+
+    elif args.command == 'search':
+        started = time.perf_counter()
+        results = search_index.search(args.text, args.limit)
+        for result in results:
+            print(f"{result['thread_id'][:8]}  {result['role']:<9} {result['snippet']}")
+        print(f'{len(results)} results in {(time.perf_counter() - started) * 1000:.1f} ms')
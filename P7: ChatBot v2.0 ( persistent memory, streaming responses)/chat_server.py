@@ -0,0 +1,201 @@
+# P7 ChatBot v2.0 - SSE Chat Server
+#     Serves the compiled graph from chatbot_v2_backend over plain HTTP, without Streamlit.
+#     Replies are streamed token by token as Server-Sent Events from
+#     chatbot.astream(stream_mode='messages'), so one process can hold many open streams.
+#
+# Usage:
+#     python chat_server.py --port 8000 --max-concurrent 256
+#
+# Endpoints:
+#     POST /chat       body {"message": "...", "thread_id": "...", "user_id": "..."} (thread_id
+#                      optional, a new thread is started without it; user_id picks the long-term
+#                      memory with CHAT_MEMORY_POLICY=semantic), answers with text/event-stream:
+#                          event: thread   data: {"thread_id": "..."}
+#                          event: token    data: {"content": "..."}    (one per chunk)
+#                          event: done     data: {}
+#                          event: error    data: {"detail": "..."}
+#     GET  /threads    thread index, newest activity first (?user_id=... lists only that user's threads)
+#     GET  /health     {"status": "ok", "active": n, "waiting": n, "cache": {...} or null,
+#                      "llm_pool": {...}}   (llm_pool: shared/llm_factory.pool_stats)
+#
+# At most --max-concurrent generations run at the same time, further requests wait for a
+# free slot. Once --max-waiting requests are queued new ones get 503 with Retry-After.
+
+# ==================================================================================
+
+# Importing Libraries
+import argparse
+import asyncio
+import json
+import uuid
+from contextlib import aclosing
+from urllib.parse import parse_qs, urlsplit
+
+from langchain_core.messages import HumanMessage
+
+from chatbot_v2_backend import chatbot, retrieve_threads, set_thread_title, record_turn, cache_stats, pool_stats
+from stream_metrics import StreamMeter, metrics_sink_from_env
+
+# Largest accepted request body (bytes)
+MAX_BODY = 64 * 1024
+
+# ==================================================================================
+
+class ChatServer:
+    def __init__(self, max_concurrent: int = 256, max_waiting: int = 1024):
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self.metrics = metrics_sink_from_env()
+
+    # ------------------------------------------------------------------------------
+    # HTTP plumbing
+
+    # Function to read one request, returns (method, path, body) or None for a broken request
+    async def read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return None
+
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, path, _ = request_line.split(' ', 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY:
+            return method, path, None
+        body = await reader.readexactly(length) if length else b''
+        return method, path, body
+
+    # Function to send a complete JSON response
+    async def send_json(self, writer: asyncio.StreamWriter, status: str, payload, headers: str = ''):
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n{headers}Connection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+
+    # Function to send one Server-Sent Event (drain applies backpressure from slow clients)
+    async def send_event(self, writer: asyncio.StreamWriter, event: str, payload: dict):
+        writer.write(f'event: {event}\ndata: {json.dumps(payload)}\n\n'.encode('utf-8'))
+        await writer.drain()
+
+    # ------------------------------------------------------------------------------
+    # Routes
+
+    # Function to stream one reply of the graph
+    async def chat(self, writer: asyncio.StreamWriter, body: bytes):
+        try:
+            request = json.loads(body or b'{}')
+            message = request['message'].strip()
+        except (ValueError, KeyError, AttributeError):
+            await self.send_json(writer, '400 Bad Request', {'detail': 'Expected JSON body {"message": "..."}'})
+            return
+        if not message:
+            await self.send_json(writer, '400 Bad Request', {'detail': 'Empty message'})
+            return
+
+        if self.waiting >= self.max_waiting:
+            await self.send_json(writer, '503 Service Unavailable', {'detail': 'Server busy'}, 'Retry-After: 1\r\n')
+            return
+
+        thread_id = request.get('thread_id') or str(uuid.uuid4())
+        user_id = str(request.get('user_id') or 'default')
+        set_thread_title(thread_id, message[:40], user_id)
+
+        writer.write(
+            b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+            b'Cache-Control: no-cache\r\nConnection: close\r\n\r\n'
+        )
+        await self.send_event(writer, 'thread', {'thread_id': thread_id})
+
+        # Waiting for a free generation slot (counts towards the measured TTFT)
+        meter = StreamMeter(source='sse', thread_id=thread_id)
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            state = {'messages': [HumanMessage(content=message)]}
+            config = {'configurable': {'thread_id': thread_id, 'user_id': user_id}}
+            async with aclosing(chatbot.astream(state, config=config, stream_mode='messages')) as stream:
+                async for chunk, meta in stream:
+                    # only the reply of chat_node is streamed
+                    if meta.get('langgraph_node') == 'chat_node' and chunk.content:
+                        meter.token(chunk.content)
+                        await self.send_event(writer, 'token', {'content': chunk.content})
+            await self.send_event(writer, 'done', {})
+            if self.metrics:
+                self.metrics.write(meter.record())
+            # The run has returned, its checkpoint is saved: index the turn (off the event loop)
+            await asyncio.to_thread(record_turn, thread_id, user_id)
+        except (ConnectionError, asyncio.CancelledError):
+            # Client went away, closing the stream stops the generation
+            raise
+        except Exception as e:
+            await self.send_event(writer, 'error', {'detail': str(e)})
+        finally:
+            self.active -= 1
+            self.slots.release()
+
+    # Function to handle one connection
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await self.read_request(reader)
+            if request is None:
+                return
+            method, target, body = request
+            url = urlsplit(target)
+            path, query = url.path, parse_qs(url.query)
+
+            if body is None:
+                await self.send_json(writer, '413 Payload Too Large', {'detail': f'Body is limited to {MAX_BODY} bytes'})
+            elif method == 'POST' and path == '/chat':
+                await self.chat(writer, body)
+            elif method == 'GET' and path == '/threads':
+                await self.send_json(writer, '200 OK', retrieve_threads(user_id=query.get('user_id', [None])[0]))
+            elif method == 'GET' and path == '/health':
+                await self.send_json(writer, '200 OK', {'status': 'ok', 'active': self.active, 'waiting': self.waiting, 'cache': cache_stats(), 'llm_pool': pool_stats()})
+            else:
+                await self.send_json(writer, '404 Not Found', {'detail': f'No route for {method} {path}'})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+# ==================================================================================
+
+# Function to run the server until interrupted
+async def serve(host: str, port: int, max_concurrent: int, max_waiting: int):
+    chat_server = ChatServer(max_concurrent, max_waiting)
+    server = await asyncio.start_server(chat_server.handle, host, port, backlog=4096)
+    print(f'Serving the chatbot on http://{host}:{port} (max {max_concurrent} concurrent generations)')
+    async with server:
+        await server.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the P7 chatbot over Server-Sent Events')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-concurrent', type=int, default=256, help='Generations running at the same time')
+    parser.add_argument('--max-waiting', type=int, default=1024, help='Queued requests before answering 503')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_concurrent, args.max_waiting))
+    except KeyboardInterrupt:
+        pass
@@ -1,55 +1,163 @@
 # ChatBot with Persistent Memory and Streaming Responses
 
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
 from dotenv import load_dotenv
 from typing import TypedDict, Annotated, List
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
-from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import START, END
+from langchain_core.runnables import RunnableLambda, RunnableConfig
+from sqlite_checkpointer import SqliteCheckpointSaver
+from bounded_memory_saver import BoundedMemorySaver
+from chat_search import ChatSearchIndex, last_turn
+from semantic_memory import semantic_memory_from_env
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.chat_memory import KEEP_MESSAGES, memory_prompt, remember_reply, summarizer
+from shared.llm_factory import get_chat_model, pool_stats
+from shared.response_cache import response_cache_from_env, cached_invoke, acached_invoke
+from shared.tracing import TracedStateGraph
 
 load_dotenv()
 
 # =================================================================================================
 
-llm = HuggingFaceEndpoint(
-    endpoint_url="openai/gpt-oss-20b",
-    task="text-generation",
-    streaming=True 
-    )
+# Shared, pooled client (shared/llm_factory.py), LLM_BACKEND=fake swaps in a local streaming
+# model (load tests, offline runs)
+model = get_chat_model(streaming=True)
 
-model = ChatHuggingFace(llm=llm)
+# Optional cache of replies to repeated questions (CHAT_RESPONSE_CACHE=1)
+response_cache = response_cache_from_env()
 
 class ChatState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
+    # running summary of messages[:summarized], the full history stays in messages
+    summary: str
+    summarized: int
+    # token budget window: messages[window_start:] plus the pinned ones, counted up to messages[:counted]
+    window_start: int
+    window_tokens: int
+    counted: int
+    pinned: List[int]
 
 # =================================================================================================
 
-def chat_node(state: ChatState):
+# Function to build the prompt: recent turns + recalled memories with CHAT_MEMORY_POLICY=semantic,
+# otherwise the shared policies (summary or token budget)
+def build_prompt(state: ChatState, config: RunnableConfig):
+    if semantic_memory:
+        user_id = config['configurable'].get('user_id', 'default')
+        return semantic_memory.prompt(user_id, state['messages'], KEEP_MESSAGES), {}
+    return memory_prompt(state)
+
+def chat_node(state: ChatState, config: RunnableConfig):
+
+    # pick up the summary finished in the background since the last turn, if there is one
+    thread_id = config['configurable']['thread_id']
+    summary = summarizer.collect(thread_id, state)
+    state = {**state, **summary}
+
+    # take user query from state (trimmed, summarized or recalled by the memory policy)
+    messages, memory = build_prompt(state, config)
+
+    # send to llm (a cached reply is replayed as a stream instead)
+    response = cached_invoke(response_cache, model, messages)
 
-    # take user query from state
-    messages = state['messages']
+    # fold older turns into the summary on a worker thread, the reply does not wait for it
+    summarizer.schedule(thread_id, model, {**state, 'messages': state['messages'] + [response]})
 
-    # send to llm
-    response = model.invoke(messages)
+    # response store state (with the summary picked up)
+    return {**summary, **remember_reply(memory, response)}
 
-    # response store state
-    return {'messages': [response]}
+# Async variant, used when the graph runs under astream (chat_server.py), so that
+# concurrent generations wait on the event loop instead of holding worker threads
+async def achat_node(state: ChatState, config: RunnableConfig):
+    thread_id = config['configurable']['thread_id']
+    summary = summarizer.collect(thread_id, state)
+    state = {**state, **summary}
+    messages, memory = build_prompt(state, config)
+    response = await acached_invoke(response_cache, model, messages)
+    summarizer.schedule(thread_id, model, {**state, 'messages': state['messages'] + [response]})
+    return {**summary, **remember_reply(memory, response)}
 
 # =================================================================================================
 
-graph = StateGraph(ChatState)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(ChatState, name='p7.chatbot')
 
 # adding node   
-graph.add_node('chat_node', chat_node)
+graph.add_node('chat_node', RunnableLambda(chat_node, afunc=achat_node))
 
 # adding edges
 graph.add_edge(START, 'chat_node')  
 graph.add_edge('chat_node', END)
 
 # Compiling graph
-checkpointer = InMemorySaver()
+# Conversations are persisted to a SQLite file (next to this script unless CHATBOT_DB_PATH is set)
+db_path = os.getenv('CHATBOT_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chatbot.db'))
+
+# CHATBOT_CHECKPOINTER=memory keeps conversations in process memory instead, within fixed limits
+# (idle threads are evicted, or spilled to CHATBOT_SPILL_DIR when it is set)
+if os.getenv('CHATBOT_CHECKPOINTER') == 'memory':
+    checkpointer = BoundedMemorySaver(
+        max_threads=int(os.getenv('CHATBOT_MEMORY_MAX_THREADS', '1000')),
+        max_bytes=int(os.getenv('CHATBOT_MEMORY_MAX_MB', '256')) * 1024 * 1024,
+        keep=int(os.getenv('CHATBOT_MEMORY_KEEP', '2')),
+        spill_dir=os.getenv('CHATBOT_SPILL_DIR'),
+    )
+elif os.getenv('CHATBOT_COMPACT_CHECKPOINTS') == '1':
+    # msgpack + zstd checkpoints holding only the messages added since the parent checkpoint
+    from compact_serde import CompactSerializer
+    checkpointer = SqliteCheckpointSaver(db_path, serde=CompactSerializer(), message_deltas=True)
+else:
+    checkpointer = SqliteCheckpointSaver(db_path)
+
+# Full-text index of the message text (next to the database unless CHAT_SEARCH_DB_PATH is set)
+search_index = ChatSearchIndex(os.getenv('CHAT_SEARCH_DB_PATH', os.path.join(os.path.dirname(db_path), 'chat_search.db')))
+
+# Long-term memory of past turns per user (CHAT_MEMORY_POLICY=semantic, stored in CHAT_SEMANTIC_DIR)
+semantic_memory = semantic_memory_from_env(os.path.join(os.path.dirname(db_path), 'semantic_memory'))
 chatbot = graph.compile(checkpointer=checkpointer)
 
 # =================================================================================================
 
+# =================================================================================================
+
+# Thread index for the frontend sidebar (newest activity first), only the threads of `user_id` when given
+def retrieve_threads(limit: int = 50, user_id: str = None):
+    return checkpointer.list_threads(limit, user_id=user_id)
+
+# Function to name a thread after its first message (and record the user it belongs to)
+def set_thread_title(thread_id: str, title: str, user_id: str = None):
+    checkpointer.set_thread_title(thread_id, title, user_id)
+
+# Function to load the last `count` messages of a thread (skipping the newest `offset`), also tells
+# whether older messages exist. The checkpointer reads only that page, not the whole history
+def load_history(thread_id: str, count: int, offset: int = 0):
+    messages, total = checkpointer.load_messages(thread_id, count, offset)
+    return messages, total > count + offset
+
+# Newest messages read back by record_turn to find the last turn
+RECORD_WINDOW = 20
+
+# Function to add the newest turn of a thread to the search index and the long-term memory. Called by the
+# frontends once the graph run has returned, so it reads the turn back from the committed checkpoint: a run
+# which fails before its checkpoint is saved leaves nothing in the index
+def record_turn(thread_id: str, user_id: str = None):
+    messages, _ = checkpointer.load_messages(thread_id, RECORD_WINDOW)
+    turn = last_turn(messages)
+    search_index.add(thread_id, turn, user_id)
+    if semantic_memory:
+        semantic_memory.remember(user_id or 'default', thread_id, turn)
+
+# Function to search the text of all conversations (only those of `user_id` when given), best matches first
+def search_chats(text: str, limit: int = 20, user_id: str = None):
+    return search_index.search(text, limit, user_id=user_id)
+
+# Function to report the response cache (None when it is disabled)
+def cache_stats():
+    return response_cache.stats() if response_cache else None
+
+# =================================================================================================
@@ -1,25 +1,88 @@
 import streamlit as st
+import uuid
+from datetime import datetime
 from langchain_core.messages import HumanMessage 
-from chatbot_v2_backend import chatbot
+from chatbot_v2_backend import chatbot, retrieve_threads, set_thread_title, load_history, record_turn, cache_stats, search_chats
+from stream_metrics import measure_stream, metrics_sink_from_env
+from stream_buffer import reply_chunks, coalesce
+
+# Number of messages loaded per page of history
+PAGE_SIZE = 20
 
 # Streamlit Web App Interface
 st.title("AI Chatbot v2.0")
 st.write("Chat with your AI assistant with persistent memory and streaming responses")
 
 
-# Initializing session state for conversation history
-if "conversation" not in st.session_state:
-    st.session_state['conversation'] = []
+# Function to switch the session to a thread (kept in the URL so a refresh reopens it)
+def open_thread(thread_id):
+    st.session_state['thread_id'] = thread_id
+    st.session_state['history_pages'] = 1
+    st.query_params['thread'] = thread_id
+
+# Every browser session gets its own user id (kept in the URL as well), which owns its threads
+# and its long-term memory: the sidebar and the search only show that user's conversations
+if "user_id" not in st.session_state:
+    st.session_state['user_id'] = st.query_params.get('user') or str(uuid.uuid4())
+    st.query_params['user'] = st.session_state['user_id']
+user_id = st.session_state['user_id']
+
+# Every browser session gets its own thread
+if "thread_id" not in st.session_state:
+    open_thread(st.query_params.get('thread') or str(uuid.uuid4()))
+
+# Sidebar with the thread index
+with st.sidebar:
+    st.subheader("Conversations")
+
+    if st.button("New Chat"):
+        open_thread(str(uuid.uuid4()))
+        st.rerun()
+
+    # Full-text search over all conversations, a result opens its thread
+    search = st.text_input("Search chats", placeholder="Search messages...")
+    if search:
+        results = search_chats(search, user_id=user_id)
+        if not results:
+            st.caption("No matching messages")
+        for index, result in enumerate(results):
+            found_at = datetime.fromtimestamp(result['created_at']).strftime('%d %b %H:%M')
+            if st.button(f"{result['snippet']} · {found_at}", key=f"search-{index}", use_container_width=True):
+                open_thread(result['thread_id'])
+                st.rerun()
+        st.divider()
+
+    for thread in retrieve_threads(user_id=user_id):
+        last_activity = datetime.fromtimestamp(thread['updated_at']).strftime('%d %b %H:%M')
+        title = thread['title'] or thread['thread_id'][:8]
+        if st.button(f"{title} · {last_activity}", key=thread['thread_id'], use_container_width=True):
+            open_thread(thread['thread_id'])
+            st.rerun()
 
-for chat in st.session_state['conversation']:
-    with st.chat_message(chat["role"]):
-            st.markdown(chat["content"])
+    if stats := cache_stats():
+        st.caption(f"Response cache: {stats['hits']} hits ({stats['hit_rate']:.0%}), {stats['latency_saved']:.1f}s saved")
+
+thread_id = st.session_state['thread_id']
+
+# Loading the conversation from the checkpointer, newest pages only
+history, has_earlier = load_history(thread_id, st.session_state['history_pages'] * PAGE_SIZE)
+
+if has_earlier and st.button("Load earlier messages"):
+    st.session_state['history_pages'] += 1
+    st.rerun()
+
+for message in history:
+    role = "user" if isinstance(message, HumanMessage) else "assistant"
+    with st.chat_message(role):
+        st.markdown(message.content)
 
 # Chat input
 user_input = st.chat_input("Type your message here...")
 
 if user_input:
-    st.session_state['conversation'].append({"role": "user", "content": user_input})
+    if not history:
+        set_thread_title(thread_id, user_input[:40], user_id)
+
     with st.chat_message("user"):
         st.markdown(user_input)
 
@@ -30,19 +93,18 @@ if user_input:
     }
 
     # Configuration for streaming response
-    config = {'configurable': {'thread_id': 'thread-1'}}
+    config = {'configurable': {'thread_id': thread_id, 'user_id': user_id}}
 
     # Get response from chatbot
+    # (only reply text from chat_node, measured per token for the metrics sink, drawn in coalesced updates)
     with st.chat_message("assistant"):
-        response = st.write_stream(
-            message.content for message , meta in chatbot.stream(
-                state,
-                config=config,
-                stream_mode= 'messages'
-            )
-            )
-        
-        
-    st.session_state['conversation'].append({"role": "assistant", "content":response})
-
-    
\ No newline at end of file
+        stream = chatbot.stream(
+            state,
+            config=config,
+            stream_mode= 'messages'
+        )
+        tokens = measure_stream(reply_chunks(stream), metrics_sink_from_env(), source='streamlit', thread_id=thread_id)
+        st.write_stream(coalesce(tokens))
+
+    # The run has returned and its checkpoint is saved, the turn can be indexed for search
+    record_turn(thread_id, user_id)
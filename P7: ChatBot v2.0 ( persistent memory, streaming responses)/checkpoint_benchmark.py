@@ -0,0 +1,126 @@
+# P7 ChatBot v2.0 - Checkpoint Storage Benchmark
+#     Runs the same chat turns through the P7 graph on three SqliteCheckpointSaver setups and
+#     compares what a checkpoint costs to write:
+#         default         JsonPlusSerializer, full message list in every checkpoint
+#         compact         compact_serde.CompactSerializer (msgpack + zstd dictionary)
+#         compact+delta   compact serializer, only the new messages per checkpoint
+#
+#     Reports bytes per checkpoint, time in put() (serializing) and in flush() (SQLite commit)
+#     per checkpoint, database size, and the time to read the latest state of a thread.
+#
+#     put() runs on LangGraph's background thread while the graph goes on, so its wall time
+#     includes waiting for the GIL. zstd releases the GIL while it compresses and put() then
+#     waits for the graph thread to give it back, so the compact put takes longer on the clock
+#     than its CPU time. Both are reported.
+#
+# Usage:
+#     python checkpoint_benchmark.py --threads 5 --turns 50 --words 60
+
+# ==================================================================================
+
+# Importing Libraries
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+# ==================================================================================
+
+# Function to wrap a saver method so that the time spent in it is added up (wall and CPU time)
+#     put() flushes when a batch is full, that time is counted as flush only.
+def timed(totals: dict, name: str, method):
+    def wrapper(*args, **kwargs):
+        flushed, flushed_cpu = totals['flush'], totals['flush_cpu']
+        started, started_cpu = time.perf_counter(), time.thread_time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed, elapsed_cpu = time.perf_counter() - started, time.thread_time() - started_cpu
+            if name != 'flush':
+                elapsed, elapsed_cpu = elapsed - (totals['flush'] - flushed), elapsed_cpu - (totals['flush_cpu'] - flushed_cpu)
+            totals[name] += elapsed
+            totals[name + '_cpu'] += elapsed_cpu
+    return wrapper
+
+# Function to get the size of a database with its WAL file
+def database_size(path: str) -> int:
+    return sum(os.path.getsize(file) for file in (path, path + '-wal') if os.path.exists(file))
+
+# Function to run the turns on one saver setup and collect its numbers
+def run(name: str, saver, args) -> dict:
+    totals = {'put': 0.0, 'put_cpu': 0.0, 'flush': 0.0, 'flush_cpu': 0.0}
+    saver.put = timed(totals, 'put', saver.put)
+    saver.flush = timed(totals, 'flush', saver.flush)
+    chatbot = graph.compile(checkpointer=saver)
+
+    for thread in range(args.threads):
+        config = {'configurable': {'thread_id': f'bench-{thread}'}}
+        for turn in range(args.turns):
+            chatbot.invoke({'messages': [HumanMessage(content=f'benchmark question {turn} of thread {thread}')]}, config=config)
+    saver.flush()
+
+    # Reading the latest state of every thread with a fresh saver (nothing cached)
+    reader = type(saver)(saver.path, serde=saver.serde, message_deltas=saver.message_deltas)
+    started = time.perf_counter()
+    for thread in range(args.threads):
+        graph.compile(checkpointer=reader).get_state({'configurable': {'thread_id': f'bench-{thread}'}})
+    read = (time.perf_counter() - started) / args.threads
+
+    with sqlite3.connect(saver.path) as conn:
+        count, data = conn.execute('SELECT COUNT(*), SUM(LENGTH(checkpoint)) FROM checkpoints').fetchone()
+        writes = conn.execute('SELECT SUM(LENGTH(value)) FROM writes').fetchone()[0] or 0
+    saver.close()
+    reader.close()
+    return {
+        'name': name,
+        'checkpoints': count,
+        'bytes': data / count,
+        'writes_bytes': writes / count,
+        'put': totals['put'] / count,
+        'put_cpu': totals['put_cpu'] / count,
+        'flush': totals['flush'] / count,
+        'read': read,
+        'file': database_size(saver.path),
+    }
+
+# ==================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare checkpoint size and write latency of the P7 savers')
+    parser.add_argument('--threads', type=int, default=5, help='Conversations to run')
+    parser.add_argument('--turns', type=int, default=50, help='Turns per conversation')
+    parser.add_argument('--words', type=int, default=60, help='Words in every fake reply')
+    args = parser.parse_args()
+
+    # The backend reads these when it is imported (fake model, throwaway files)
+    directory = tempfile.mkdtemp(prefix='chatbot-checkpoints-')
+    os.environ['LLM_BACKEND'] = 'fake'
+    os.environ['CHATBOT_DB_PATH'] = os.path.join(directory, 'backend.db')
+    os.environ['CHAT_METRICS_PATH'] = ''
+
+    from langchain_core.messages import HumanMessage
+    from chatbot_v2_backend import graph, model
+    from compact_serde import CompactSerializer
+    from sqlite_checkpointer import SqliteCheckpointSaver
+
+    model.reply_words = args.words
+    model.token_delay = 0
+
+    # No timed flushes, every batch is committed by the read at the start of the next turn
+    options = {'flush_interval': 3600}
+    setups = [
+        ('default', SqliteCheckpointSaver(os.path.join(directory, 'default.db'), **options)),
+        ('compact', SqliteCheckpointSaver(os.path.join(directory, 'compact.db'), serde=CompactSerializer(), **options)),
+        ('compact+delta', SqliteCheckpointSaver(os.path.join(directory, 'delta.db'), serde=CompactSerializer(), message_deltas=True, **options)),
+    ]
+    results = [run(name, saver, args) for name, saver in setups]
+
+    print(f'{args.threads} threads x {args.turns} turns, {args.words} words per reply\n')
+    print(f'{"":<15}{"bytes/ckpt":>12}{"writes/ckpt":>13}{"put":>10}{"put cpu":>10}{"flush":>10}{"read state":>12}{"db file":>12}')
+    for result in results:
+        print(
+            f'{result["name"]:<15}{result["bytes"]:>12.0f}{result["writes_bytes"]:>13.0f}'
+            f'{result["put"] * 1000:>8.3f}ms{result["put_cpu"] * 1000:>8.3f}ms{result["flush"] * 1000:>8.3f}ms{result["read"] * 1000:>10.2f}ms'
+            f'{result["file"] / 1024:>10.0f}KB'
+        )
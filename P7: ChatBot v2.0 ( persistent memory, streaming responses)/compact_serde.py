@@ -0,0 +1,138 @@
+# Compact checkpoint serializer for the ChatBot v2.0 (CHATBOT_COMPACT_CHECKPOINTS=1)
+#     The default serializer writes every message as a pydantic dump with its module and
+#     class name and every field, defaults included. This one writes a message as
+#     [type, content, id, name, {non-empty extra fields}], packs the checkpoint with msgpack
+#     and compresses it with zstd primed by a shared dictionary of the keys and channel names
+#     every checkpoint repeats, so even small checkpoints compress.
+#
+#     Payloads of other types (rows written before it was enabled) are read with the default
+#     serializer. Any change to the dictionary or the message layout needs a new TYPE.
+#
+# Bytes per checkpoint and write latency against the default serializer:
+#     python checkpoint_benchmark.py --turns 50
+
+import threading
+
+import ormsgpack
+import zstandard
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+TYPE = 'compact-v1'
+
+# Message classes by type code, only these exact classes get the short form
+MESSAGE_CLASSES = [HumanMessage, AIMessage, SystemMessage, ToolMessage]
+MESSAGE_CODES = {cls: code for code, cls in enumerate(MESSAGE_CLASSES)}
+
+# Optional message fields, stored only when they are not empty
+MESSAGE_FIELDS = [
+    'additional_kwargs', 'response_metadata', 'tool_calls', 'invalid_tool_calls',
+    'usage_metadata', 'tool_call_id', 'status', 'artifact',
+]
+
+# msgpack extension codes
+EXT_FALLBACK, EXT_TUPLE, EXT_SET, EXT_MESSAGE = range(4)
+
+OPTIONS = (
+    ormsgpack.OPT_NON_STR_KEYS | ormsgpack.OPT_PASSTHROUGH_TUPLE | ormsgpack.OPT_PASSTHROUGH_DATETIME
+    | ormsgpack.OPT_PASSTHROUGH_UUID | ormsgpack.OPT_PASSTHROUGH_DATACLASS | ormsgpack.OPT_PASSTHROUGH_ENUM
+    | ormsgpack.OPT_PASSTHROUGH_SUBCLASS
+)
+
+# =================================================================================================
+
+class CompactSerializer:
+    """msgpack + zstd (shared dictionary) serializer with a short form for chat messages."""
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self.fallback = JsonPlusSerializer()
+        self.local = threading.local()
+        self.dictionary = zstandard.ZstdCompressionDict(self._pack(dictionary_sample()), dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        self.dictionary.precompute_compress(level=level)
+
+    # ---------------------------------------------------------------------------------------------
+    # msgpack with extension types
+
+    def _default(self, obj):
+        if type(obj) in MESSAGE_CODES:
+            # fields are read from __dict__, a missing attribute costs a slow pydantic lookup
+            fields = obj.__dict__
+            extras = {field: value for field in MESSAGE_FIELDS if (value := fields.get(field))}
+            return ormsgpack.Ext(EXT_MESSAGE, self._pack([MESSAGE_CODES[type(obj)], fields['content'], fields['id'], fields['name'], extras]))
+        if isinstance(obj, tuple):
+            return ormsgpack.Ext(EXT_TUPLE, self._pack(list(obj)))
+        if isinstance(obj, (set, frozenset)):
+            return ormsgpack.Ext(EXT_SET, self._pack(list(obj)))
+        return ormsgpack.Ext(EXT_FALLBACK, self._pack(list(self.fallback.dumps_typed(obj))))
+
+    def _ext(self, code: int, data: bytes):
+        value = self._unpack(data)
+        if code == EXT_MESSAGE:
+            kind, content, id_, name, extras = value
+            return MESSAGE_CLASSES[kind](content=content, id=id_, name=name, **extras)
+        if code == EXT_TUPLE:
+            return tuple(value)
+        if code == EXT_SET:
+            return set(value)
+        return self.fallback.loads_typed(tuple(value))
+
+    def _pack(self, obj) -> bytes:
+        return ormsgpack.packb(obj, default=self._default, option=OPTIONS)
+
+    def _unpack(self, data: bytes):
+        return ormsgpack.unpackb(data, ext_hook=self._ext, option=ormsgpack.OPT_NON_STR_KEYS)
+
+    # ---------------------------------------------------------------------------------------------
+    # zstd (compressor objects are not thread safe, every thread gets its own)
+
+    def _compressors(self):
+        if not hasattr(self.local, 'compressor'):
+            self.local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self.local.decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary)
+        return self.local.compressor, self.local.decompressor
+
+    # ---------------------------------------------------------------------------------------------
+    # SerializerProtocol
+
+    def dumps_typed(self, obj):
+        if obj is None:
+            return 'null', b''
+        if isinstance(obj, bytes):
+            return 'bytes', obj
+        compressor, _ = self._compressors()
+        return TYPE, compressor.compress(self._pack(obj))
+
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_ != TYPE:
+            return self.fallback.loads_typed(data)
+        _, decompressor = self._compressors()
+        return self._unpack(decompressor.decompress(payload))
+
+# Function to build the dictionary sample: a checkpoint of the chat graph with typical messages
+def dictionary_sample() -> list:
+    messages = [
+        HumanMessage(content='Hello, can you help me with', id='00000000-0000-0000-0000-000000000000'),
+        AIMessage(
+            content='Sure, here is',
+            id='run--00000000-0000-0000-0000-000000000000-0',
+            response_metadata={'token_count': 0, 'finish_reason': 'stop', 'model_name': 'openai/gpt-oss-20b'},
+            usage_metadata={'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0},
+        ),
+    ]
+    version = '00000000000000000000000000000001.0.0000000000000000'
+    channels = ['__start__', 'messages', 'summary', 'summarized', 'window_start', 'window_tokens', 'counted', 'pinned',
+                'branch:to:chat_node', 'branch:to:summarize_node']
+    checkpoint = {
+        'v': 4,
+        'ts': '2025-01-01T00:00:00.000000+00:00',
+        'id': '1f000000-0000-6000-8000-000000000000',
+        'channel_values': {'messages': messages, 'summary': '', 'summarized': 0},
+        'channel_versions': {channel: version for channel in channels},
+        'versions_seen': {'__input__': {}, '__start__': {'__start__': version}, 'chat_node': {'branch:to:chat_node': version},
+                          'summarize_node': {'branch:to:summarize_node': version}},
+        'updated_channels': channels,
+    }
+    metadata = {'source': 'loop', 'step': 1, 'parents': {}, 'thread_id': '', 'user_id': 'default'}
+    return [metadata, checkpoint]
@@ -0,0 +1,130 @@
+# P7 ChatBot v2.0 - SSE Load Test
+#     Starts chat_server.py against the local fake model (LLM_BACKEND=fake) and opens many
+#     concurrent /chat streams, one new thread per stream.
+#
+# Usage:
+#     python load_test.py --streams 500
+#     python load_test.py --streams 500 --url http://127.0.0.1:8000   (server already running)
+#
+# Reports time to first token, total stream time and tokens received per second, and the
+# server side stream metrics of the spawned server.
+
+# ==================================================================================
+
+# Importing Libraries
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from stream_metrics import print_summary, summarize
+
+# ==================================================================================
+
+# Function to run one streamed chat, returns (time to first token, total time, tokens)
+async def one_stream(host: str, port: int, index: int):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps({'message': f'load test message {index}'}).encode('utf-8')
+    writer.write(
+        f'POST /chat HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body
+    )
+    await writer.drain()
+
+    status = await reader.readline()
+    if b' 200 ' not in status:
+        writer.close()
+        raise RuntimeError(status.decode('latin-1').strip())
+
+    first_token, tokens, event = None, 0, None
+    async for line in reader:
+        line = line.decode('utf-8').rstrip('\n')
+        if line.startswith('event: '):
+            event = line[7:]
+        elif line.startswith('data: ') and event == 'token':
+            tokens += 1
+            if first_token is None:
+                first_token = time.perf_counter() - started
+        elif line.startswith('data: ') and event == 'error':
+            raise RuntimeError(json.loads(line[6:])['detail'])
+    writer.close()
+    return first_token, time.perf_counter() - started, tokens
+
+# Function to wait until the server answers
+async def wait_for_server(host: str, port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'Server on {host}:{port} did not start')
+
+# Function to print a percentile summary
+def report(name: str, values, unit: str = 's'):
+    values = sorted(values)
+    if not values:
+        return
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    print(f'{name:<22} p50 {pick(0.5):.3f}{unit}  p95 {pick(0.95):.3f}{unit}  max {values[-1]:.3f}{unit}  mean {statistics.mean(values):.3f}{unit}')
+
+# ==================================================================================
+
+async def main(args):
+    url = urlparse(args.url or f'http://127.0.0.1:{args.port}')
+    host, port = url.hostname, url.port or 80
+
+    # Own server with the fake model and a throwaway database
+    server, metrics_path = None, None
+    if not args.url:
+        db_dir = tempfile.mkdtemp(prefix='chatbot-load-')
+        metrics_path = os.path.join(db_dir, 'stream_metrics.jsonl')
+        env = {**os.environ, 'LLM_BACKEND': 'fake', 'CHATBOT_DB_PATH': os.path.join(db_dir, 'chatbot.db'), 'CHAT_METRICS_PATH': metrics_path}
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_server.py'),
+             '--port', str(port), '--max-concurrent', str(args.max_concurrent)],
+            env=env,
+        )
+
+    try:
+        await wait_for_server(host, port)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one_stream(host, port, i) for i in range(args.streams)), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    done = [result for result in results if not isinstance(result, BaseException)]
+    failed = [result for result in results if isinstance(result, BaseException)]
+    tokens = sum(result[2] for result in done)
+
+    print(f'{len(done)} of {args.streams} streams completed in {elapsed:.2f}s, {len(failed)} failed')
+    report('time to first token', [result[0] for result in done if result[0] is not None])
+    report('stream time', [result[1] for result in done])
+    print(f'{"throughput":<22} {tokens / elapsed:.0f} tokens/s over {tokens} tokens')
+    for error in failed[:5]:
+        print(f'  error: {error!r}')
+
+    if metrics_path and os.path.exists(metrics_path):
+        print('\nServer side (stream_metrics):')
+        with open(metrics_path, encoding='utf-8') as file:
+            print_summary(summarize([json.loads(line) for line in file]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent SSE load test for chat_server.py')
+    parser.add_argument('--streams', type=int, default=500, help='Concurrent chat streams')
+    parser.add_argument('--max-concurrent', type=int, default=512, help='Generation slots of the spawned server')
+    parser.add_argument('--port', type=int, default=8765, help='Port of the spawned server')
+    parser.add_argument('--url', help='Test an already running server instead of spawning one')
+    asyncio.run(main(parser.parse_args()))
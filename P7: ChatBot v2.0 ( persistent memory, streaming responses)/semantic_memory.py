@@ -0,0 +1,214 @@
+# Long-term semantic memory for the ChatBot v2.0 (CHAT_MEMORY_POLICY=semantic)
+#     Every finished turn (user message + reply) is embedded and appended to a per-user vector
+#     index. The prompt is the last few messages plus the stored turns most similar to the new
+#     user message, so the prompt stays small however long the history grows.
+#
+#     Embeddings are hashed word and character 3-gram counts (no model, no network), the index
+#     is a NumPy matrix of unit vectors searched with one matrix product. Each user's index is
+#     kept as two append-only files in CHAT_SEMANTIC_DIR: <user>.f32 (vectors) and <user>.jsonl
+#     (turn text and message ids).
+#
+# Retrieval time at 100k stored turns:
+#     python semantic_memory.py bench --turns 100000
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional
+
+import numpy as np
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+# Embedding size (a power of two), 128 keeps a 100k turn search at about 5 ms on one core
+EMBEDDING_DIM = int(os.getenv('CHAT_SEMANTIC_DIM', '128'))
+
+# Stored turns added to the prompt, and the lowest similarity worth adding
+TOP_K = int(os.getenv('CHAT_SEMANTIC_TOP_K', '4'))
+MIN_SCORE = 0.2
+
+# =================================================================================================
+
+# Function to embed texts as L2 normalized hashed n-gram vectors, one row per text
+#     Each word and each 3-gram of " word " is hashed (crc32, stable across processes) to a
+#     column and a sign, so unrelated features cancel out instead of piling up.
+def embed(texts: Iterable[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    texts = list(texts)
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r'\w+', text.lower()):
+            padded = f' {word} '
+            for feature in [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]:
+                h = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, h & (dim - 1)] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+class VectorIndex:
+    """Unit vectors in a growable float32 matrix, searched by cosine similarity."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, capacity: int = 1024):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    # Function to append rows, the matrix doubles when full so appends are amortized O(1)
+    def add(self, vectors: np.ndarray) -> None:
+        needed = self.size + len(vectors)
+        if needed > len(self.vectors):
+            grown = np.zeros((max(needed, 2 * len(self.vectors)), self.dim), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        self.vectors[self.size:needed] = vectors
+        self.size = needed
+
+    # Function to find the top `k` rows of every query, returns (indices, scores), best first
+    def search(self, queries: np.ndarray, k: int):
+        queries = np.atleast_2d(queries)
+        k = min(k, self.size)
+        if k == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        scores = queries @ self.vectors[:self.size].T
+        top = np.argpartition(scores, -k, axis=1)[:, -k:] if k < self.size else np.tile(np.arange(self.size), (len(queries), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+# =================================================================================================
+
+class SemanticMemory:
+    """Per-user vector indexes of past turns, loaded on first use and appended on every turn."""
+
+    def __init__(self, directory: str, dim: int = EMBEDDING_DIM, top_k: int = TOP_K, min_score: float = MIN_SCORE):
+        self.directory = directory
+        self.dim = dim
+        self.top_k = top_k
+        self.min_score = min_score
+        self.users = {}
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, user_id: str):
+        name = hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{name}.f32'), os.path.join(self.directory, f'{name}.jsonl')
+
+    # Function to get a user's (index, turns), read from disk the first time
+    def _user(self, user_id: str):
+        if user_id not in self.users:
+            index, turns = VectorIndex(self.dim), []
+            vector_path, turn_path = self._paths(user_id)
+            if os.path.exists(turn_path) and os.path.exists(vector_path):
+                with open(turn_path, encoding='utf-8') as file:
+                    turns = [json.loads(line) for line in file if line.strip()]
+                vectors = np.fromfile(vector_path, dtype=np.float32)
+                vectors = vectors[:len(vectors) // self.dim * self.dim].reshape(-1, self.dim)
+
+                # A write cut short leaves one file longer than the other, both are cut back
+                # to the complete turns so that later appends stay aligned
+                count = min(len(turns), len(vectors))
+                if count != len(turns) or count * self.dim * 4 != os.path.getsize(vector_path):
+                    turns, vectors = turns[:count], vectors[:count]
+                    with open(turn_path, 'w', encoding='utf-8') as file:
+                        file.writelines(json.dumps(turn) + '\n' for turn in turns)
+                    vectors.tofile(vector_path)
+                index.add(vectors)
+            self.users[user_id] = (index, turns)
+        return self.users[user_id]
+
+    # Function to store the finished turns among `messages` (user messages followed by a reply)
+    def remember(self, user_id: str, thread_id: str, messages: List[BaseMessage]) -> None:
+        turns, question = [], []
+        for message in messages:
+            if isinstance(message, HumanMessage):
+                question.append(message)
+            elif message.type == 'ai' and question and isinstance(message.content, str):
+                text = '\n'.join(f'User: {q.content}' for q in question) + f'\nAssistant: {message.content}'
+                turns.append({'thread_id': thread_id, 'ids': [m.id for m in question + [message] if m.id], 'time': time.time(), 'text': text})
+                question = []
+        if not turns:
+            return
+
+        vectors = embed([turn['text'] for turn in turns], self.dim)
+        with self.lock:
+            index, stored = self._user(user_id)
+            vector_path, turn_path = self._paths(user_id)
+            with open(vector_path, 'ab') as file:
+                file.write(vectors.tobytes())
+            with open(turn_path, 'a', encoding='utf-8') as file:
+                file.writelines(json.dumps(turn) + '\n' for turn in turns)
+            index.add(vectors)
+            stored.extend(turns)
+
+    # Function to find the stored turns most similar to `text`, skipping turns with message ids in `exclude`
+    def recall(self, user_id: str, text: str, exclude: Optional[set] = None) -> List[dict]:
+        exclude = exclude or set()
+        query = embed([text], self.dim)
+        with self.lock:
+            index, stored = self._user(user_id)
+            # A few extra candidates make up for excluded turns
+            rows, scores = index.search(query, self.top_k + len(exclude) // 2)
+            found = [
+                {**stored[row], 'score': float(score)}
+                for row, score in zip(rows[0], scores[0])
+                if score >= self.min_score and not exclude.intersection(stored[row]['ids'])
+            ]
+        return found[:self.top_k]
+
+    # Function to build the prompt: recalled turns + the last `keep` messages (starting with a user message)
+    def prompt(self, user_id: str, messages: List[BaseMessage], keep: int) -> List[BaseMessage]:
+        start = max(0, len(messages) - keep)
+        while start > 0 and not isinstance(messages[start], HumanMessage):
+            start -= 1
+        recent = messages[start:]
+
+        memories = self.recall(user_id, recent[-1].content, {message.id for message in recent})
+        if not memories:
+            return recent
+        context = '\n\n'.join(memory['text'] for memory in memories)
+        return [SystemMessage(content=f'Relevant parts of earlier conversations:\n{context}')] + recent
+
+# Function to build the memory configured by the environment (None unless CHAT_MEMORY_POLICY=semantic)
+def semantic_memory_from_env(default_dir: str) -> Optional[SemanticMemory]:
+    if os.getenv('CHAT_MEMORY_POLICY') != 'semantic':
+        return None
+    return SemanticMemory(os.getenv('CHAT_SEMANTIC_DIR', default_dir))
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Semantic memory retrieval benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench = commands.add_parser('bench', help='Time recall over synthetic turns')
+    bench.add_argument('--turns', type=int, default=100000)
+    bench.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocabulary = [f'topic{i}' for i in range(5000)]
+    texts = [' '.join(rng.choice(vocabulary, 20)) for _ in range(args.turns)]
+
+    started = time.perf_counter()
+    memory = SemanticMemory(tempfile.mkdtemp(prefix='semantic-bench-'))
+    index, stored = memory._user('bench')
+    index.add(embed(texts))
+    stored.extend({'thread_id': 'bench', 'ids': [str(i)], 'text': text} for i, text in enumerate(texts))
+    print(f'Embedded {args.turns} turns in {time.perf_counter() - started:.1f}s')
+
+    timings = []
+    for text in texts[:args.queries]:
+        started = time.perf_counter()
+        memory.recall('bench', text)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f'recall p50 {timings[len(timings) // 2] * 1000:.2f} ms  p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms')
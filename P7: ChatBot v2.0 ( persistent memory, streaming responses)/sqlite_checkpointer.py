@@ -0,0 +1,567 @@
+# SQLite checkpointer for the ChatBot v2.0 graph
+#     Conversations are kept in a SQLite file (WAL mode) instead of process memory,
+#     so they survive restarts and resident memory does not grow with the number of threads.
+#
+# Compact a database (keep only the latest checkpoint of every thread):
+#     python sqlite_checkpointer.py compact chatbot.db --keep 1
+
+import argparse
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+# =================================================================================================
+
+# Primary keys start with thread_id, so every lookup by thread is an index search
+schema = '''
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    created_at REAL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    title TEXT,
+    updated_at REAL,
+    user_id TEXT
+);
+CREATE INDEX IF NOT EXISTS threads_by_activity ON threads (updated_at DESC);
+'''
+
+# Thread owners (user_id of the graph config), added to databases created before it existed
+owner_schema = '''
+CREATE INDEX IF NOT EXISTS threads_by_user ON threads (user_id, updated_at DESC);
+'''
+
+# With message deltas a checkpoint stores {DELTA: parent_id, 'keep': n, 'new': [...]} in place of
+# its message list: the first n messages of the parent followed by the new ones
+DELTA = '__delta__'
+
+def is_delta(value) -> bool:
+    return isinstance(value, dict) and DELTA in value
+
+# =================================================================================================
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """Checkpointer storing LangGraph checkpoints in a SQLite file.
+
+    Writes are buffered and committed in one transaction once `batch_size` rows are
+    pending or `flush_interval` seconds have passed. Every read flushes first, so the
+    graph always sees its own writes.
+
+    With `message_deltas` a checkpoint whose messages start with the messages of its parent
+    stores only the new ones, and reads rebuild the list from the chain of parents. Every
+    `snapshot_every` checkpoints the full list is stored again, which bounds that chain.
+    """
+
+    def __init__(
+        self,
+        path: str = 'chatbot.db',
+        *,
+        batch_size: int = 32,
+        flush_interval: float = 0.5,
+        serde=None,
+        message_deltas: bool = False,
+        snapshot_every: int = 32,
+        delta_threads: int = 256,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.message_deltas = message_deltas
+        self.snapshot_every = snapshot_every
+        self.delta_threads = delta_threads
+
+        # Last message list stored or read per (thread_id, checkpoint_ns), least recently used first:
+        # (checkpoint_id, messages, deltas since the last full list)
+        self.known_messages = OrderedDict()
+
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(schema)
+        if 'user_id' not in [column[1] for column in self.conn.execute('PRAGMA table_info(threads)')]:
+            self.conn.execute('ALTER TABLE threads ADD COLUMN user_id TEXT')
+        self.conn.executescript(owner_schema)
+
+        self.pending_checkpoints = []
+        self.pending_owners = {}
+        self.pending_writes = []
+        self.timer = None
+        atexit.register(self.flush)
+
+    # ---------------------------------------------------------------------------------------------
+    # Batched writes
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending_checkpoints and not self.pending_writes:
+                return
+
+            checkpoints, writes, owners = self.pending_checkpoints, self.pending_writes, self.pending_owners
+            self.pending_checkpoints, self.pending_writes, self.pending_owners = [], [], {}
+
+            self.conn.execute('BEGIN')
+            try:
+                self.conn.executemany('INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', checkpoints)
+                # Thread index: last activity per thread, and its owner once known
+                activity = {}
+                for row in checkpoints:
+                    activity[row[0]] = max(activity.get(row[0], 0), row[-1])
+                self.conn.executemany(
+                    'INSERT INTO threads (thread_id, updated_at, user_id) VALUES (?, ?, ?) '
+                    'ON CONFLICT (thread_id) DO UPDATE SET updated_at = MAX(COALESCE(updated_at, 0), excluded.updated_at), '
+                    'user_id = COALESCE(user_id, excluded.user_id)',
+                    [(thread_id, updated_at, owners.get(thread_id)) for thread_id, updated_at in activity.items()],
+                )
+                for replace, row in writes:
+                    verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+                    self.conn.execute(f'{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', row)
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def _queued(self) -> None:
+        if len(self.pending_checkpoints) + len(self.pending_writes) >= self.batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = threading.Timer(self.flush_interval, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def close(self) -> None:
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+    # ---------------------------------------------------------------------------------------------
+    # Reading
+
+    def _tuple(self, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        with self.lock:
+            writes = self.conn.execute(
+                'SELECT task_id, channel, type, value FROM writes '
+                'WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx',
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+        checkpoint = self.serde.loads_typed((type_, checkpoint))
+        if self.message_deltas or is_delta(checkpoint['channel_values'].get('messages')):
+            checkpoint = self._rebuild(thread_id, checkpoint_ns, checkpoint)
+
+        return CheckpointTuple(
+            config={'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self.flush()
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        columns = 'thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata'
+
+        with self.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f'SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?',
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f'SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? '
+                    'ORDER BY checkpoint_id DESC LIMIT 1',
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+
+        return self._tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        self.flush()
+        query = 'SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints'
+        where, params = [], []
+        if config:
+            where.append('thread_id = ?')
+            params.append(config['configurable']['thread_id'])
+            if (checkpoint_ns := config['configurable'].get('checkpoint_ns')) is not None:
+                where.append('checkpoint_ns = ?')
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append('checkpoint_id = ?')
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append('checkpoint_id < ?')
+            params.append(before_id)
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY checkpoint_id DESC'
+        # Metadata filters are applied after loading, so the limit has to be too
+        if limit is not None and not filter:
+            query += f' LIMIT {int(limit)}'
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            item = self._tuple(row)
+            if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield item
+
+    # ---------------------------------------------------------------------------------------------
+    # Writing
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        parent_id = config['configurable'].get('checkpoint_id')
+        stored = self._delta(thread_id, checkpoint_ns, parent_id, checkpoint) if self.message_deltas else checkpoint
+        type_, data = self.serde.dumps_typed(stored)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.lock:
+            self.pending_checkpoints.append((
+                thread_id, checkpoint_ns, checkpoint['id'], parent_id,
+                type_, data, metadata_type, metadata_data, time.time(),
+            ))
+            if user_id := config['configurable'].get('user_id'):
+                self.pending_owners[thread_id] = user_id
+            self._queued()
+
+        return {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint['id']}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = config['configurable']['checkpoint_id']
+
+        with self.lock:
+            for idx, (channel, value) in enumerate(writes):
+                type_, data = self.serde.dumps_typed(value)
+                # Special channels (errors, interrupts...) replace earlier writes, regular ones never do
+                replace = channel in WRITES_IDX_MAP
+                self.pending_writes.append((replace, (
+                    thread_id, checkpoint_ns, checkpoint_id, task_id,
+                    WRITES_IDX_MAP.get(channel, idx), channel, type_, data, task_path,
+                )))
+            self._queued()
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.flush()
+        with self.lock:
+            for key in [key for key in self.known_messages if key[0] == thread_id]:
+                del self.known_messages[key]
+            self.conn.execute('DELETE FROM checkpoints WHERE thread_id = ?', (thread_id,))
+            self.conn.execute('DELETE FROM writes WHERE thread_id = ?', (thread_id,))
+            self.conn.execute('DELETE FROM threads WHERE thread_id = ?', (thread_id,))
+
+    # ---------------------------------------------------------------------------------------------
+    # Message deltas
+
+    def _remember_messages(self, key, checkpoint_id: str, messages: list, depth: int) -> None:
+        with self.lock:
+            self.known_messages[key] = (checkpoint_id, messages, depth)
+            self.known_messages.move_to_end(key)
+            while len(self.known_messages) > self.delta_threads:
+                self.known_messages.popitem(last=False)
+
+    # Function to swap the message list of a checkpoint for a delta on its parent when possible
+    #     Messages are compared by identity with the parent's list as it was stored or read, so
+    #     the check costs a pointer comparison per message instead of serializing the history.
+    def _delta(self, thread_id: str, checkpoint_ns: str, parent_id: Optional[str], checkpoint: Checkpoint) -> Checkpoint:
+        key = (thread_id, checkpoint_ns)
+        messages = checkpoint['channel_values'].get('messages')
+        if not isinstance(messages, list):
+            return checkpoint
+
+        with self.lock:
+            known_id, known, depth = self.known_messages.get(key, (None, [], 0))
+        extends = (
+            parent_id is not None and known_id == parent_id and depth + 1 < self.snapshot_every
+            and len(known) <= len(messages) and all(a is b for a, b in zip(known, messages))
+        )
+        self._remember_messages(key, checkpoint['id'], list(messages), depth + 1 if extends else 0)
+        if not extends:
+            return checkpoint
+
+        delta = {DELTA: parent_id, 'keep': len(known), 'new': messages[len(known):]}
+        return {**checkpoint, 'channel_values': {**checkpoint['channel_values'], 'messages': delta}}
+
+    # Function to rebuild the full message list of a checkpoint from the chain of its parents
+    def _rebuild(self, thread_id: str, checkpoint_ns: str, checkpoint: Checkpoint) -> Checkpoint:
+        chain = [checkpoint['channel_values'].get('messages')]
+        while is_delta(chain[-1]):
+            with self.lock:
+                row = self.conn.execute(
+                    'SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?',
+                    (thread_id, checkpoint_ns, chain[-1][DELTA]),
+                ).fetchone()
+            if row is None:
+                raise ValueError(f'Checkpoint {chain[-1][DELTA]} of thread {thread_id} is missing, its children cannot be read')
+            chain.append(self.serde.loads_typed(row)['channel_values'].get('messages') or [])
+
+        messages = chain.pop()
+        if not isinstance(messages, list):
+            return checkpoint
+        depth = len(chain)
+        for delta in reversed(chain):
+            messages = messages[:delta['keep']] + delta['new']
+
+        if self.message_deltas:
+            self._remember_messages((thread_id, checkpoint_ns), checkpoint['id'], list(messages), depth)
+        if not depth:
+            return checkpoint
+        return {**checkpoint, 'channel_values': {**checkpoint['channel_values'], 'messages': messages}}
+
+    # Function to read a page of the messages of a thread without rebuilding its whole history
+    #     Returns the `count` messages before the last `offset` ones of the latest checkpoint, and
+    #     the total number of messages. With message deltas the chain of parents is walked only
+    #     until the page is covered, so recent pages read a few small rows.
+    def load_messages(self, thread_id: str, count: int, offset: int = 0, checkpoint_ns: str = '') -> tuple:
+        self.flush()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT checkpoint_id, type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? '
+                'ORDER BY checkpoint_id DESC LIMIT 1',
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            known_id, known, _ = self.known_messages.get((thread_id, checkpoint_ns), (None, [], 0))
+        if row is None:
+            return [], 0
+
+        if known_id == row[0]:
+            value = known
+        else:
+            value = self.serde.loads_typed(row[1:])['channel_values'].get('messages') or []
+        total = value['keep'] + len(value['new']) if is_delta(value) else len(value)
+        start, end = max(0, total - offset - count), max(0, total - offset)
+
+        # Pages are collected newest first: the new messages of each delta, then its parent's
+        pieces = []
+        while start < end:
+            if not is_delta(value):
+                pieces.append(value[start:end])
+                break
+            keep, new = value['keep'], value['new']
+            if end > keep:
+                pieces.append(new[max(start, keep) - keep:end - keep])
+                end = keep
+            if start >= end:
+                break
+            with self.lock:
+                parent = self.conn.execute(
+                    'SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?',
+                    (thread_id, checkpoint_ns, value[DELTA]),
+                ).fetchone()
+            if parent is None:
+                raise ValueError(f'Checkpoint {value[DELTA]} of thread {thread_id} is missing, its children cannot be read')
+            value = self.serde.loads_typed(parent)['channel_values'].get('messages') or []
+
+        return [message for piece in reversed(pieces) for message in piece], total
+
+    # ---------------------------------------------------------------------------------------------
+    # Thread index
+
+    def list_threads(self, limit: int = 50, offset: int = 0, user_id: Optional[str] = None) -> List[dict]:
+        """Threads ordered by last activity, newest first (only those of `user_id` when given)."""
+        self.flush()
+        where, params = '', [limit, offset]
+        if user_id is not None:
+            where, params = 'WHERE user_id = ? ', [user_id, limit, offset]
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT thread_id, title, updated_at, user_id FROM threads {where}ORDER BY updated_at DESC LIMIT ? OFFSET ?',
+                params,
+            ).fetchall()
+        return [
+            {'thread_id': thread_id, 'title': title, 'updated_at': updated_at, 'user_id': owner}
+            for thread_id, title, updated_at, owner in rows
+        ]
+
+    def set_thread_title(self, thread_id: str, title: str, user_id: Optional[str] = None) -> None:
+        """Set the title (and the owner) of a thread unless it already has one."""
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO threads (thread_id, title, updated_at, user_id) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (thread_id) DO UPDATE SET title = COALESCE(title, excluded.title), '
+                'user_id = COALESCE(user_id, excluded.user_id)',
+                (thread_id, title, time.time(), user_id),
+            )
+
+    # ---------------------------------------------------------------------------------------------
+    # Compaction
+
+    def compact(self, keep: int = 1) -> int:
+        """Drop all but the latest `keep` checkpoints of every thread, returns the number removed."""
+        self.flush()
+        with self.lock:
+            self.conn.execute('BEGIN')
+
+            # Checkpoints stored as deltas get their full message list back, their parents may go
+            kept = self.conn.execute(
+                'SELECT thread_id, checkpoint_ns, checkpoint_id, type, checkpoint FROM ('
+                '  SELECT *, ROW_NUMBER() OVER ('
+                '    PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC'
+                '  ) AS position FROM checkpoints'
+                ') WHERE position <= ?',
+                (keep,),
+            ).fetchall()
+            full = []
+            for thread_id, checkpoint_ns, checkpoint_id, type_, data in kept:
+                checkpoint = self.serde.loads_typed((type_, data))
+                if is_delta(checkpoint['channel_values'].get('messages')):
+                    checkpoint = self._rebuild(thread_id, checkpoint_ns, checkpoint)
+                    full.append((*self.serde.dumps_typed(checkpoint), thread_id, checkpoint_ns, checkpoint_id))
+            self.conn.executemany(
+                'UPDATE checkpoints SET type = ?, checkpoint = ? WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?',
+                full,
+            )
+            self.known_messages.clear()
+
+            removed = self.conn.execute(
+                'DELETE FROM checkpoints WHERE rowid IN ('
+                '  SELECT rowid FROM ('
+                '    SELECT rowid, ROW_NUMBER() OVER ('
+                '      PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC'
+                '    ) AS position FROM checkpoints'
+                '  ) WHERE position > ?'
+                ')',
+                (keep,),
+            ).rowcount
+            self.conn.execute(
+                'DELETE FROM writes WHERE NOT EXISTS ('
+                '  SELECT 1 FROM checkpoints c WHERE c.thread_id = writes.thread_id'
+                '  AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id'
+                ')'
+            )
+            self.conn.execute(
+                'UPDATE checkpoints SET parent_checkpoint_id = NULL WHERE parent_checkpoint_id IS NOT NULL AND NOT EXISTS ('
+                '  SELECT 1 FROM checkpoints p WHERE p.thread_id = checkpoints.thread_id'
+                '  AND p.checkpoint_ns = checkpoints.checkpoint_ns AND p.checkpoint_id = checkpoints.parent_checkpoint_id'
+                ')'
+            )
+            self.conn.execute('COMMIT')
+
+            # Give the freed pages back to the file system
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self.conn.execute('VACUUM')
+        return removed
+
+    # ---------------------------------------------------------------------------------------------
+    # Async versions (SQLite calls are short and local, so they run inline like InMemorySaver)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path='') -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+# =================================================================================================
+
+# Function to open a database for maintenance with the serializer its rows were written with
+#     Databases written with CHATBOT_COMPACT_CHECKPOINTS=1 hold compact_serde rows, which the
+#     default serializer cannot read. CompactSerializer reads both kinds of rows.
+def open_database(path: str) -> SqliteCheckpointSaver:
+    saver = SqliteCheckpointSaver(path)
+    with saver.lock:
+        compact = saver.conn.execute("SELECT 1 FROM checkpoints WHERE type LIKE 'compact-%' LIMIT 1").fetchone()
+    if not compact:
+        return saver
+    from compact_serde import CompactSerializer
+    saver.serde = CompactSerializer()
+    return saver
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintenance commands for the chatbot checkpoint database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compact_parser = commands.add_parser('compact', help='Drop superseded checkpoints')
+    compact_parser.add_argument('path', help='SQLite database file')
+    compact_parser.add_argument('--keep', type=int, default=1, help='Checkpoints to keep per thread (default: 1)')
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        saver = open_database(args.path)
+        removed = saver.compact(args.keep)
+        saver.close()
+        print(f'Removed {removed} superseded checkpoints from {args.path}')
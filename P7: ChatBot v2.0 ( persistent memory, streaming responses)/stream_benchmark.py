@@ -0,0 +1,72 @@
+# P7 ChatBot v2.0 - Streaming Benchmark
+#     Runs chat turns through the compiled graph against the local fake streaming model and
+#     measures them the same way the frontend does (stream_metrics.measure_stream). The model
+#     stream alone is measured too, so the overhead of the graph shows up as the difference.
+#     Also counts the UI updates left after stream_buffer.coalesce.
+#
+# Usage:
+#     python stream_benchmark.py --turns 50 --words 60 --token-delay 0.02 --out bench.jsonl
+
+# ==================================================================================
+
+# Importing Libraries
+import argparse
+import os
+import tempfile
+import uuid
+
+# ==================================================================================
+
+# Sink collecting the records in a list
+class ListSink:
+    def __init__(self, records):
+        self.records = records
+
+    def write(self, record):
+        self.records.append(record)
+
+# ==================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure TTFT and tokens/sec of the P7 graph on the fake model')
+    parser.add_argument('--turns', type=int, default=50, help='Chat turns to measure')
+    parser.add_argument('--words', type=int, default=60, help='Words in every fake reply')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='Seconds between two fake tokens')
+    parser.add_argument('--out', help='JSONL file for the records (default: a temporary file)')
+    args = parser.parse_args()
+
+    # The backend reads these when it is imported (fake model, no database file)
+    out = args.out or os.path.join(tempfile.mkdtemp(prefix='chatbot-bench-'), 'stream_metrics.jsonl')
+    os.environ['LLM_BACKEND'] = 'fake'
+    os.environ['CHATBOT_CHECKPOINTER'] = 'memory'
+
+    from langchain_core.messages import HumanMessage
+    from chatbot_v2_backend import chatbot, model
+    from stream_metrics import JsonlMetricsSink, measure_stream, print_summary, summarize
+    from stream_buffer import coalesce, reply_chunks
+
+    model.reply_words = args.words
+    model.token_delay = args.token_delay
+    graph_records, model_records = [], []
+    updates = 0
+    file_sink = JsonlMetricsSink(out)
+    thread_id = str(uuid.uuid4())
+    for turn in range(args.turns):
+        # Model stream alone
+        prompt = [HumanMessage(content=f'benchmark question {turn}')]
+        for _ in measure_stream((chunk.content for chunk in model.stream(prompt)), ListSink(model_records), source='model'):
+            pass
+
+        # Same turn through the graph, as the frontend streams it
+        config = {'configurable': {'thread_id': thread_id}}
+        stream = chatbot.stream({'messages': prompt}, config=config, stream_mode='messages')
+        for _ in coalesce(measure_stream(reply_chunks(stream), ListSink(graph_records), source='benchmark', turn=turn)):
+            updates += 1
+        file_sink.write(graph_records[-1])
+
+    print('Model stream only:')
+    print_summary(summarize(model_records))
+    print('\nThrough the graph (chatbot.stream, stream_mode="messages"):')
+    print_summary(summarize(graph_records))
+    print(f"UI updates    {updates} after coalescing {sum(record['tokens'] for record in graph_records)} tokens")
+    print(f'\nRecords written to {out}')
@@ -0,0 +1,85 @@
+# Stream buffering for the ChatBot v2.0 frontend
+#     chatbot.stream(stream_mode='messages') yields every message chunk of every node, and
+#     each text handed to st.write_stream is one UI update. reply_chunks keeps only the
+#     reply text, coalesce merges it into fewer, larger updates.
+#
+# Flush interval and size: CHAT_STREAM_FLUSH_MS (default 50) and CHAT_STREAM_FLUSH_CHARS (default 80).
+
+import contextvars
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Iterator
+
+from langchain_core.messages import AIMessage
+
+FLUSH_INTERVAL = int(os.getenv('CHAT_STREAM_FLUSH_MS', '50')) / 1000
+FLUSH_CHARS = int(os.getenv('CHAT_STREAM_FLUSH_CHARS', '80'))
+
+# End of stream marker on the read-ahead queue
+DONE = object()
+
+# =================================================================================================
+
+# Function to keep the text of AI message chunks from one node (empty chunks, tool and
+# human messages and other nodes are dropped)
+def reply_chunks(stream: Iterable, node: str = 'chat_node') -> Iterator[str]:
+    for message, meta in stream:
+        if meta.get('langgraph_node') != node or not isinstance(message, AIMessage):
+            continue
+        if isinstance(message.content, str) and message.content:
+            yield message.content
+
+# Function to read a stream on a background thread into a queue, ending with (DONE, error)
+def read_ahead(chunks: Iterable[str], pending: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for chunk in chunks:
+            pending.put((chunk, None))
+            if stop.is_set():
+                break
+    except BaseException as error:
+        pending.put((DONE, error))
+        return
+    pending.put((DONE, None))
+
+# Function to merge chunks into updates of at most one per `interval` seconds or `max_chars` characters
+#     The first chunk is passed on at once, so time to first token is unchanged. The stream is
+#     read on a background thread, so held text goes out once `interval` has passed even when
+#     the next chunk is late (a stalled model never keeps text back for longer than that).
+def coalesce(chunks: Iterable[str], interval: float = FLUSH_INTERVAL, max_chars: int = FLUSH_CHARS) -> Iterator[str]:
+    pending = queue.Queue()
+    stop = threading.Event()
+    # The reader runs in a copy of the caller's context (tracing spans, callbacks)
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(read_ahead, chunks, pending, stop), daemon=True).start()
+
+    buffer = []
+    size = 0
+    last_flush = None
+    try:
+        while True:
+            # With text held, wait for the next chunk only until the flush is due
+            timeout = max(0.0, last_flush + interval - time.perf_counter()) if buffer else None
+            try:
+                chunk, error = pending.get(timeout=timeout)
+            except queue.Empty:
+                yield ''.join(buffer)
+                buffer, size, last_flush = [], 0, time.perf_counter()
+                continue
+
+            if chunk is DONE:
+                if buffer:
+                    yield ''.join(buffer)
+                if error is not None:
+                    raise error
+                return
+
+            buffer.append(chunk)
+            size += len(chunk)
+            now = time.perf_counter()
+            if last_flush is None or now - last_flush >= interval or size >= max_chars:
+                yield ''.join(buffer)
+                buffer, size, last_flush = [], 0, now
+    finally:
+        stop.set()
@@ -0,0 +1,133 @@
+# Streaming metrics for the ChatBot v2.0 frontend and SSE server
+#     Measures every streamed reply: time to first token (TTFT), gaps between tokens,
+#     token count and tokens per second, and appends one JSON record per turn to a sink.
+#
+# The sink is the JSONL file in CHAT_METRICS_PATH (default: stream_metrics.jsonl next to this
+# script, an empty value turns metrics off). Summarize a file with:
+#     python stream_metrics.py stream_metrics.jsonl
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional
+
+# =================================================================================================
+
+# Function to get a percentile (nearest rank) of sorted values
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(q * len(values)) - 1))]
+
+class StreamMeter:
+    """Timings of one streamed reply, started when the request is sent."""
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.started = time.perf_counter()
+        self.first = None
+        self.last = None
+        self.gaps = []
+        self.tokens = 0
+        self.chars = 0
+
+    # Function to record one streamed chunk
+    def token(self, text: str) -> None:
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps.append(now - self.last)
+        self.last = now
+        self.tokens += 1
+        self.chars += len(text)
+
+    # Function to build the record of the finished stream
+    def record(self) -> dict:
+        finished = time.perf_counter()
+        gaps = sorted(self.gaps)
+        streaming = (self.last - self.first) if self.first is not None else 0.0
+        return {
+            'time': time.time(),
+            **self.labels,
+            'ttft': (self.first - self.started) if self.first is not None else None,
+            'duration': finished - self.started,
+            'tokens': self.tokens,
+            'chars': self.chars,
+            # Rate while tokens were arriving (the first token has no gap in front of it)
+            'tokens_per_sec': (self.tokens - 1) / streaming if streaming > 0 else None,
+            'gap_p50': percentile(gaps, 0.50),
+            'gap_p90': percentile(gaps, 0.90),
+            'gap_p99': percentile(gaps, 0.99),
+            'gap_max': gaps[-1] if gaps else None,
+        }
+
+# =================================================================================================
+
+class JsonlMetricsSink:
+    """Appends one JSON record per line, safe to share between sessions."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record) + '\n'
+        with self.lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line)
+
+# Function to build the sink configured by the environment (None when metrics are off)
+def metrics_sink_from_env() -> Optional[JsonlMetricsSink]:
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stream_metrics.jsonl')
+    path = os.getenv('CHAT_METRICS_PATH', default)
+    return JsonlMetricsSink(path) if path else None
+
+# Function to pass a stream of text chunks through while measuring it
+#     The record is written when the stream ends, also when the consumer stops early.
+def measure_stream(chunks: Iterable[str], sink: Optional[JsonlMetricsSink], **labels) -> Iterator[str]:
+    meter = StreamMeter(**labels)
+    try:
+        for chunk in chunks:
+            if chunk:
+                meter.token(chunk)
+            yield chunk
+    finally:
+        if sink:
+            sink.write(meter.record())
+
+# =================================================================================================
+
+# Function to summarize records: percentiles of TTFT and tokens/sec, mean gaps
+def summarize(records: List[dict]) -> dict:
+    column = lambda key: sorted(record[key] for record in records if record.get(key) is not None)
+    ttft, rate, p50, p99 = column('ttft'), column('tokens_per_sec'), column('gap_p50'), column('gap_p99')
+    return {
+        'turns': len(records),
+        'tokens': sum(record['tokens'] for record in records),
+        'ttft_p50': percentile(ttft, 0.50),
+        'ttft_p90': percentile(ttft, 0.90),
+        'ttft_p99': percentile(ttft, 0.99),
+        'tokens_per_sec_p50': percentile(rate, 0.50),
+        'gap_p50_mean': sum(p50) / len(p50) if p50 else None,
+        'gap_p99_mean': sum(p99) / len(p99) if p99 else None,
+    }
+
+# Function to print a summary, times in milliseconds
+def print_summary(summary: dict) -> None:
+    ms = lambda value: f'{value * 1000:.1f} ms' if value is not None else '-'
+    print(f"turns {summary['turns']}, tokens {summary['tokens']}")
+    print(f"TTFT          p50 {ms(summary['ttft_p50'])}  p90 {ms(summary['ttft_p90'])}  p99 {ms(summary['ttft_p99'])}")
+    print(f"token gap     p50 {ms(summary['gap_p50_mean'])}  p99 {ms(summary['gap_p99_mean'])}  (mean over turns)")
+    rate = summary['tokens_per_sec_p50']
+    print(f"tokens/sec    p50 {rate:.1f}" if rate is not None else 'tokens/sec    -')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Summarize streaming metrics')
+    parser.add_argument('path', help='JSONL file written by the frontend or the SSE server')
+    args = parser.parse_args()
+
+    with open(args.path, encoding='utf-8') as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    print_summary(summarize(records))
@@ -0,0 +1,66 @@
+# Tests for sqlite_checkpointer.py (python -m unittest test_sqlite_checkpointer)
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import START, END, StateGraph
+from langgraph.graph.message import add_messages
+
+from compact_serde import CompactSerializer
+from sqlite_checkpointer import SqliteCheckpointSaver
+
+# =================================================================================================
+
+class ChatState(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+
+def echo_node(state: ChatState):
+    return {'messages': [AIMessage(content=f'echo {state["messages"][-1].content}')]}
+
+graph = StateGraph(ChatState)
+graph.add_node('echo_node', echo_node)
+graph.add_edge(START, 'echo_node')
+graph.add_edge('echo_node', END)
+
+# Function to write `turns` turns of one thread into a database
+def write_thread(path: str, turns: int, **options) -> None:
+    saver = SqliteCheckpointSaver(path, **options)
+    chatbot = graph.compile(checkpointer=saver)
+    for turn in range(turns):
+        chatbot.invoke({'messages': [HumanMessage(content=f'question {turn}')]}, {'configurable': {'thread_id': 'thread'}})
+    saver.close()
+
+class CompactCommandTest(unittest.TestCase):
+
+    def compact(self, path: str) -> str:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sqlite_checkpointer.py')
+        result = subprocess.run([sys.executable, script, 'compact', path, '--keep', '1'], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def check_history(self, path: str, turns: int, **options) -> None:
+        saver = SqliteCheckpointSaver(path, **options)
+        messages = graph.compile(checkpointer=saver).get_state({'configurable': {'thread_id': 'thread'}}).values['messages']
+        saver.close()
+        self.assertEqual(len(messages), 2 * turns)
+        self.assertEqual(messages[-1].content, f'echo question {turns - 1}')
+
+    def test_compact_serde_database(self):
+        path = os.path.join(tempfile.mkdtemp(), 'compact.db')
+        write_thread(path, 10, serde=CompactSerializer(), message_deltas=True)
+        self.assertIn('Removed', self.compact(path))
+        self.check_history(path, 10, serde=CompactSerializer(), message_deltas=True)
+
+    def test_default_serde_database(self):
+        path = os.path.join(tempfile.mkdtemp(), 'default.db')
+        write_thread(path, 10)
+        self.assertIn('Removed', self.compact(path))
+        self.check_history(path, 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# Tests for stream_buffer.py (python -m unittest test_stream_buffer)
+
+import time
+import unittest
+
+from stream_buffer import coalesce
+
+# =================================================================================================
+
+# Function to yield one chunk after each of the given delays (seconds)
+def timed_chunks(delays):
+    for index, delay in enumerate(delays):
+        time.sleep(delay)
+        yield f'{index} '
+
+class CoalesceTest(unittest.TestCase):
+
+    def test_fast_chunks_are_merged(self):
+        updates = list(coalesce(timed_chunks([0.0] * 50), interval=0.05, max_chars=1000))
+        self.assertEqual(''.join(updates), ''.join(f'{index} ' for index in range(50)))
+        self.assertEqual(updates[0], '0 ')
+        self.assertLess(len(updates), 5)
+
+    def test_stalled_stream_flushes_held_text(self):
+        # Chunk 1 arrives right after the first flush and is held, then the model stalls for 1 s
+        start = time.perf_counter()
+        arrivals = []
+        for update in coalesce(timed_chunks([0.0, 0.0, 1.0]), interval=0.05, max_chars=1000):
+            arrivals.append((update, time.perf_counter() - start))
+
+        self.assertEqual([update for update, _ in arrivals], ['0 ', '1 ', '2 '])
+        self.assertLess(arrivals[1][1], 0.5)
+        self.assertGreaterEqual(arrivals[2][1], 1.0)
+
+    def test_error_after_held_text(self):
+        def failing():
+            yield 'a'
+            yield 'b'
+            raise RuntimeError('model failed')
+
+        updates = []
+        with self.assertRaises(RuntimeError):
+            for update in coalesce(failing(), interval=10, max_chars=1000):
+                updates.append(update)
+        self.assertEqual(''.join(updates), 'ab')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1 @@
+# Benchmarks of the project graphs against the fake model and stand-in services (graph_benchmark.py).
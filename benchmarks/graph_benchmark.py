@@ -0,0 +1,338 @@
+# Graph benchmarks: one scenario per compiled graph of the seven projects
+#     Every scenario runs its graph against the fake model (LLM_BACKEND=fake, fixed latency and
+#     token rate) and the stand-in HTTP services, and records
+#         total       wall time of one run (P6 / P7: one conversation of --turns turns)
+#         model       time inside chat model calls
+#         node code   time inside nodes, outside model calls (parsing, HTTP, prompt building)
+#         framework   everything else: LangGraph scheduling, state updates, checkpointing
+#         peak        peak Python memory of one run (tracemalloc, separate run)
+#         state       size of the final state as the checkpointer would serialize it
+#     plus wall and model time per node. Times are medians over --repeat runs.
+#
+#     Results are compared with baseline.json: a metric more than --tolerance above its
+#     baseline is reported as a regression and the exit code is 1, unless the increase is
+#     within the noise: an absolute floor per metric, or the spread (max - min) of the measured
+#     runs when that is larger. Medians of fewer than MIN_GATED_REPEAT runs are too noisy to
+#     gate on, such runs are printed but not compared.
+#
+# Usage (from the repository root):
+#     python benchmarks/graph_benchmark.py
+#     python benchmarks/graph_benchmark.py --only P3 P4 --repeat 10
+#     python benchmarks/graph_benchmark.py --update-baseline
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+sys.path.insert(0, ROOT)
+from benchmarks.stand_in_services import StandInTranscriptApi, start_stand_in_services
+
+# Metrics compared with the baseline, and the change below which a difference is noise
+#     (framework and node code time of the small graphs are 2-5 ms and jitter by about 1 ms)
+COMPARED = {'total_ms': 5.0, 'framework_ms': 2.0, 'node_code_ms': 2.0, 'peak_kb': 64.0, 'state_kb': 1.0}
+
+# Fewest measured runs compared with the baseline (the default --repeat)
+MIN_GATED_REPEAT = 5
+
+# =================================================================================================
+# Measuring
+
+# Callback handler adding up wall time per node and model time per node
+#     Nodes of one step may run in parallel, the (start, end) intervals are kept so that
+#     overlapping time is counted once in the totals.
+class NodeTimer(BaseCallbackHandler):
+    def __init__(self):
+        self.node_runs = {}
+        self.model_runs = {}
+        self.node_time = defaultdict(float)
+        self.model_time = defaultdict(float)
+        self.node_intervals = []
+        self.model_intervals = []
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get('langgraph_node')
+        # the node itself runs under its own name, the runnables inside it carry the same metadata
+        if node and kwargs.get('name') == node and parent_run_id not in self.node_runs:
+            self.node_runs[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.node_runs:
+            node, started = self.node_runs.pop(run_id)
+            ended = time.perf_counter()
+            self.node_time[node] += ended - started
+            self.node_intervals.append((started, ended))
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        # a model wrapping another model (response caches) is counted once
+        if parent_run_id not in self.model_runs:
+            self.model_runs[run_id] = ((metadata or {}).get('langgraph_node', '-'), time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if run_id in self.model_runs:
+            node, started = self.model_runs.pop(run_id)
+            ended = time.perf_counter()
+            self.model_time[node] += ended - started
+            self.model_intervals.append((started, ended))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.on_llm_end(None, run_id=run_id)
+
+# Function to get the time covered by a list of (start, end) intervals
+def covered(intervals) -> float:
+    total, reach = 0.0, float('-inf')
+    for start, end in sorted(intervals):
+        if end > reach:
+            total += end - max(start, reach)
+            reach = end
+    return total
+
+# Function to get the serialized size of a state (what a checkpointer writes)
+def state_size(state) -> int:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    return len(JsonPlusSerializer().dumps_typed(state)[1])
+
+# Function to run a scenario --repeat times (after one warm-up run) and summarize it
+def measure(run, repeat: int) -> dict:
+    run({})
+    totals, node_wall, model_wall, node_code, framework = [], [], [], [], []
+    node_times, model_times = defaultdict(list), defaultdict(list)
+    for _ in range(repeat):
+        timer = NodeTimer()
+        started = time.perf_counter()
+        state = run({'callbacks': [timer]})
+        totals.append(time.perf_counter() - started)
+        node_wall.append(covered(timer.node_intervals))
+        model_wall.append(covered(timer.model_intervals))
+        node_code.append(max(0.0, node_wall[-1] - model_wall[-1]))
+        framework.append(max(0.0, totals[-1] - node_wall[-1]))
+        for node in set(timer.node_time) | set(timer.model_time):
+            node_times[node].append(timer.node_time.get(node, 0.0))
+            model_times[node].append(timer.model_time.get(node, 0.0))
+
+    tracemalloc.start()
+    run({})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    median = statistics.median
+    nodes = {
+        node: {'wall_ms': median(node_times[node]) * 1000, 'model_ms': median(model_times[node]) * 1000}
+        for node in sorted(node_times)
+    }
+    total, node_wall, model = median(totals) * 1000, median(node_wall) * 1000, median(model_wall) * 1000
+    return {
+        'total_ms': total,
+        'model_ms': model,
+        'node_code_ms': max(0.0, node_wall - model),
+        'framework_ms': max(0.0, total - node_wall),
+        'peak_kb': peak / 1024,
+        'state_kb': state_size(state) / 1024,
+        'nodes': nodes,
+        # Spread of the measured runs, a change within it is noise
+        'spread_ms': {
+            metric: (max(values) - min(values)) * 1000
+            for metric, values in (('total_ms', totals), ('framework_ms', framework), ('node_code_ms', node_code))
+        },
+    }
+
+# =================================================================================================
+# Scenarios, each returns a function running the graph once with a given config
+
+def load_module(project: str, filename: str, name: str):
+    directory = os.path.join(ROOT, project)
+    sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def scenario_p1(args, services_url):
+    os.environ['SEMANTIC_SCHOLAR_URL'] = f'{services_url}/graph/v1/paper/search'
+    module = load_module('P1: Research Paper Summarizer', 'Get_Research_Papers.py', 'Get_Research_Papers')
+
+    def run(config):
+        return module.research_paper_graph.invoke({
+            'prompt': 'Give one research paper title about retrieval augmented generation',
+            'topic': [], 'top_search': 1, 'title': [], 'abstract': [], 'url': [], 'citationCount': [], 'result': '',
+        }, config=config)
+    return run
+
+def scenario_p2(args, services_url):
+    module = load_module('P2: You Tube Video Summarizer', 'You_Tube_Video_Summarizer.py', 'You_Tube_Video_Summarizer')
+    # transcripts come from the stand-in service instead of YouTube
+    module.YouTubeTranscriptApi = StandInTranscriptApi(services_url)
+
+    def run(config):
+        return module.YTgraph.invoke({
+            'input_transcript': '', 'video_url': 'https://www.youtube.com/watch?v=benchmark01',
+            'want_questions': True, 'want_answers': True, 'video_code': '', 'transcript': '', 'summary': '',
+            'topic': [], 'questions': '', 'qa': '', 'Error': '',
+        }, config=config)
+    return run
+
+def scenario_p3(args, services_url):
+    module = load_module('P3 : P3 Project Idea Generator', 'Project_Idea_Generator.py', 'Project_Idea_Generator')
+
+    def run(config):
+        return module.PIG_graph.invoke({
+            'project_domain': 'Web development', 'skills': 'React, Node.js', 'number_of_ideas': 3,
+            'complexity_level': 'Beginner', 'input_idea': '',
+        }, config=config)
+    return run
+
+def scenario_p4(args, services_url):
+    module = load_module('P4 Professional Writing Assistant', 'Professional_Writing_Assistant.py', 'Professional_Writing_Assistant')
+
+    def run(config):
+        return module.Apnagraph.invoke({'user_input': 'Write a LinkedIn post about finishing my first LangGraph project'}, config=config)
+    return run
+
+def scenario_p5(args, services_url):
+    module = load_module('P5: User Persona Generator', 'user_persona_backend.py', 'user_persona_backend')
+
+    def run(config):
+        return module.persona_graph.invoke({
+            'product_details': 'A habit tracking app with streaks and reminders', 'market_details': 'Students and young professionals in India',
+            'aditional_details': '', 'users': '', 'user_count': 2, 'counter': 0, 'user_persona': [],
+            'parallel_sections': False, 'persona_sections': {},
+        }, config=config)
+    return run
+
+# Function to build a chat scenario: one new conversation of --turns turns per run
+def chat_scenario(chatbot, turns: int):
+    from langchain_core.messages import HumanMessage
+
+    def run(config):
+        config = {**config, 'configurable': {'thread_id': f'benchmark-{uuid.uuid4()}'}}
+        for turn in range(turns):
+            state = chatbot.invoke({'messages': [HumanMessage(content=f'Benchmark question {turn}: how do I structure a LangGraph project?')]}, config=config)
+        return state
+    return run
+
+def scenario_p6(args, services_url):
+    module = load_module('P6: Basic ChatBot (Streamlit Memory)', 'chatbot_v1.py', 'chatbot_v1')
+    return chat_scenario(module.chatbot, args.turns)
+
+def scenario_p7(args, services_url):
+    module = load_module('P7: ChatBot v2.0 ( persistent memory, streaming responses)', 'chatbot_v2_backend.py', 'chatbot_v2_backend')
+    return chat_scenario(module.chatbot, args.turns)
+
+SCENARIOS = {
+    'P1 research_paper_graph': scenario_p1,
+    'P2 YTgraph': scenario_p2,
+    'P3 PIG_graph': scenario_p3,
+    'P4 Apnagraph': scenario_p4,
+    'P5 persona_graph': scenario_p5,
+    'P6 chatbot': scenario_p6,
+    'P7 chatbot': scenario_p7,
+}
+
+# =================================================================================================
+# Reporting
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        for metric, floor in COMPARED.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None:
+                continue
+            noise = max(floor, result.get('spread_ms', {}).get(metric, 0.0))
+            if result[metric] > base * (1 + tolerance) and result[metric] - base > noise:
+                regressions.append(f'{name}: {metric} {base:.1f} -> {result[metric]:.1f} ({(result[metric] / base - 1) * 100 if base else 0:+.0f}%)')
+    return regressions
+
+def print_results(results: dict, baseline: dict) -> None:
+    print(f'{"":<30}{"total":>10}{"model":>10}{"node code":>11}{"framework":>11}{"peak":>10}{"state":>9}{"vs base":>9}')
+    for name, result in results.items():
+        base = baseline.get(name, {}).get('total_ms')
+        change = f'{(result["total_ms"] / base - 1) * 100:+.0f}%' if base else '-'
+        print(
+            f'{name:<30}{result["total_ms"]:>8.1f}ms{result["model_ms"]:>8.1f}ms{result["node_code_ms"]:>9.1f}ms'
+            f'{result["framework_ms"]:>9.1f}ms{result["peak_kb"]:>8.0f}KB{result["state_kb"]:>7.1f}KB{change:>9}'
+        )
+        for node, times in result['nodes'].items():
+            print(f'    {node:<26}{times["wall_ms"]:>8.1f}ms{times["model_ms"]:>8.1f}ms')
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark every project graph against the fake model')
+    parser.add_argument('--only', nargs='*', help='Scenario prefixes to run, e.g. P3 P7')
+    parser.add_argument('--repeat', type=int, default=5, help='Measured runs per scenario')
+    parser.add_argument('--turns', type=int, default=10, help='Turns per conversation (P6, P7)')
+    parser.add_argument('--latency', default='0.05', help='Fake model time to first token (FAKE_LLM_LATENCY)')
+    parser.add_argument('--tokens-per-sec', type=float, default=2000, help='Fake model streaming rate')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed increase over the baseline')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+    if args.update_baseline and args.repeat < MIN_GATED_REPEAT:
+        parser.error(f'--update-baseline needs --repeat {MIN_GATED_REPEAT} or more')
+
+    # Set before any project is imported: fake model, no response caches, throwaway databases
+    directory = tempfile.mkdtemp(prefix='graph-benchmark-')
+    os.environ.pop('CHAT_RESPONSE_CACHE', None)
+    os.environ.update({
+        'LLM_BACKEND': 'fake',
+        'FAKE_LLM_SEED': '0',
+        'FAKE_LLM_LATENCY': args.latency,
+        'FAKE_LLM_TOKENS_PER_SEC': str(args.tokens_per_sec),
+        'FAKE_LLM_ERROR_RATE': '0',
+        'LLM_CACHE': '0',
+        'SEMANTIC_CACHE': '0',
+        'CHATBOT_DB_PATH': os.path.join(directory, 'chatbot.db'),
+        'CHAT_SEARCH_DB_PATH': os.path.join(directory, 'chat_search.db'),
+        'CHAT_METRICS_PATH': '',
+    })
+    server, services_url = start_stand_in_services()
+
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        print(f'Running {name} ...', file=sys.stderr)
+        results[name] = measure(scenario(args, services_url), args.repeat)
+    server.shutdown()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    print(f'\nfake model: latency {args.latency}s, {args.tokens_per_sec:.0f} tokens/s, median of {args.repeat} runs\n')
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({**baseline, **results}, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'\nBaseline written to {args.baseline}')
+    elif args.repeat < MIN_GATED_REPEAT:
+        print(f'\nNot compared with the baseline: medians of {args.repeat} runs are too noisy, use --repeat {MIN_GATED_REPEAT} or more')
+    elif regressions := compare(results, baseline, args.tolerance):
+        print('\nRegressions:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
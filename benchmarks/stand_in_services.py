@@ -0,0 +1,98 @@
+# Stand-in HTTP services for the graph benchmarks
+#     A local server answering like the services the graphs call, with a fixed delay per
+#     request so that network time shows up in the numbers without any real network:
+#         GET /graph/v1/paper/search?query=...   Semantic Scholar paper search (P1)
+#         GET /transcript/<video id>             transcript segments of a video (P2)
+#
+# Run on its own (python stand_in_services.py --port 8765) or through start_stand_in_services().
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+WORDS = 'model data training results method network learning language graph retrieval evaluation task'.split()
+
+# =================================================================================================
+
+# Function to build deterministic filler text for a key
+def filler(key: str, words: int) -> str:
+    seed = zlib.crc32(key.encode('utf-8'))
+    return ' '.join(WORDS[(seed + i * 7) % len(WORDS)] for i in range(words))
+
+def paper_search(query: str, limit: int) -> dict:
+    return {
+        'total': limit,
+        'data': [
+            {
+                'paperId': f'{zlib.crc32(query.encode("utf-8")):08x}{i}',
+                'title': f'{query[:60]} ({i + 1})',
+                'url': f'https://www.semanticscholar.org/paper/{i}',
+                'abstract': filler(f'{query}:{i}', 150),
+                'citationCount': 10 * (i + 1),
+            }
+            for i in range(limit)
+        ],
+    }
+
+def transcript(video_id: str, segments: int = 120) -> list:
+    return [{'text': filler(f'{video_id}:{i}', 12), 'start': 4.0 * i, 'duration': 4.0} for i in range(segments)]
+
+class StandInHandler(BaseHTTPRequestHandler):
+    delay = 0.02
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        time.sleep(self.delay)
+        if url.path.endswith('/paper/search'):
+            params = parse_qs(url.query)
+            body = paper_search(params.get('query', [''])[0], int(params.get('limit', ['1'])[0]))
+        elif url.path.startswith('/transcript/'):
+            body = transcript(url.path.rsplit('/', 1)[-1])
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+# Function to start the services in a background thread, returns (server, base url)
+def start_stand_in_services(port: int = 0, delay: float = 0.02):
+    handler = type('Handler', (StandInHandler,), {'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+# Transcript client for P2, used in place of YouTubeTranscriptApi (same get_transcript call)
+class StandInTranscriptApi:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def get_transcript(self, video_id: str) -> list:
+        with urlopen(f'{self.base_url}/transcript/{video_id}') as response:
+            return json.loads(response.read())
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stand-in Semantic Scholar and transcript services')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.02, help='Seconds added to every request')
+    args = parser.parse_args()
+
+    server, url = start_stand_in_services(args.port, args.delay)
+    print(f'Serving on {url} (SEMANTIC_SCHOLAR_URL={url}/graph/v1/paper/search)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -2,8 +2,9 @@
 
 
 # Importing necessary libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from shared.llm_factory import get_chat_model
+from shared.tracing import TracedStateGraph
+from langgraph.graph import START, END
 from typing import TypedDict, Dict, List
 from youtube_transcript_api import YouTubeTranscriptApi
 from dotenv import load_dotenv
@@ -24,13 +25,8 @@ def initialize_llm(api_key: str):
     # Set the API key in environment variables
     os.environ["HUGGINGFACEHUB_API_TOKEN"] = api_key
     
-    llm = HuggingFaceEndpoint(
-        endpoint_url="openai/gpt-oss-20b",
-        task="text-generation",
-        huggingfacehub_api_token=api_key
-    )
-    
-    return ChatHuggingFace(llm=llm)
+    # One shared, pooled client per token (shared/llm_factory.py), reused by every session
+    return get_chat_model(api_key)
 
 # ===================================================================================
 
@@ -144,7 +140,8 @@ def generate_answers(Info: VideoInfo) -> VideoInfo:
 # ===================================================================================
 
 # Defining the Graph
-graph = StateGraph(VideoInfo)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(VideoInfo, name='web.p2.YTgraph')
 
 # Adding node to the graph
 graph.add_node("get_video_code", get_video_code)
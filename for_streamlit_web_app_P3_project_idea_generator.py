@@ -1,8 +1,11 @@
 # P3 : Project Idea Generator
 
 # Importing necessary libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from shared.llm_factory import get_chat_model
+from shared.llm_cache import cached_chat_model
+from shared.semantic_cache import get_semantic_cache, semantic_invoke
+from shared.tracing import TracedStateGraph
+from langgraph.graph import START, END
 from typing import TypedDict, List
 import os
 
@@ -21,22 +24,22 @@ load_dotenv()
 
 # Initialize model variable
 model = None
+final_model = None
+
+# Near-duplicate requests (same ideas asked in other words) are answered from shared/semantic_cache.py
+semantic_cache = get_semantic_cache()
 
 def initialize_model(hf_token):
     """Initialize the model with the provided Hugging Face token"""
-    global model
+    global model, final_model
     
     # Set the token as environment variable
     os.environ["HUGGINGFACEHUB_API_TOKEN"] = hf_token
     
-    # Model Initialization
-    llm = HuggingFaceEndpoint(
-        endpoint_url="openai/gpt-oss-20b",
-        task="text-generation",
-        huggingfacehub_api_token=hf_token
-    )
-    
-    model = ChatHuggingFace(llm=llm)
+    # Model Initialization (one shared, pooled client per token from shared/llm_factory.py)
+    model = get_chat_model(hf_token)
+    # final_output only reformats what the other nodes produced, repeated inputs come from the cache when LLM_CACHE enables it (shared/llm_cache.py)
+    final_model = cached_chat_model(model, 'p3.final_output')
     return model
 
 # ==================================================================================
@@ -93,12 +96,18 @@ def generate_project_ideas(Info: ProjectInfo) :
 
     structured_output_chain = prompt | model | parser
     
-    response = structured_output_chain.invoke({
+    inputs = {
         "project_domain": Info['project_domain'],
         "skills": Info['skills'],
         "complexity_level": Info['complexity_level'],
         "number_of_ideas": Info['number_of_ideas']
-    })
+    }
+    # domain and skills may be worded differently, complexity and number of ideas must match
+    response = semantic_invoke(
+        semantic_cache, 'p3.project_ideas', structured_output_chain, inputs,
+        text=f"{Info['project_domain']} {Info['skills']}",
+        exact={"complexity_level": Info['complexity_level'], "number_of_ideas": Info['number_of_ideas']}
+    )
 
     return {"project_idea": response.project_idea, "project_description": response.project_description}
 
@@ -149,15 +158,15 @@ def provide_skills_required(Info: ProjectInfo):
 
 # Function for Final Output 
 def final_output(Info: ProjectInfo) :
-    global model
+    global final_model
     if Info["input_idea"]:
         prompt = f' For given Project idea: {Info["input_idea"]}\n The Skills Required are: {Info["skills_required"]}\n and Step to follow for project completion are: {Info["steps_to_implement"]}\n\n Now give me well structured and user frinedly ouput as:\n An encoraging message based on the quality of project\n Project Title: \n\n Skills Required: \n\n Steps to follow: \n'
-        output = model.invoke(prompt).content
+        output = final_model.invoke(prompt).content
         
         return {"output": output}
     
     prompt = f'For given input:\n Project domain:{Info["project_domain"]}\n Skills learned:{Info["skills"]}\n\n The generated project ideas are: {Info["project_idea"]} \n and for each these {Info["number_of_ideas"]} project idea, the descriptions are:{Info["project_description"]} \n\n Draft well structured response to user based on the above data, which also include additional skills to learn suggestion\n Additional skills: {Info["other_skills_to_learn"]}\n\n Response:\n Encouraging Message based on input data and complexity level{Info["complexity_level"]} ( Do not mention it is an Encouraging Message)\n Project and short description for all project idea\n Other skills to learn:'
-    output = model.invoke(prompt).content
+    output = final_model.invoke(prompt).content
 
     return {"output": output}
 
@@ -166,7 +175,8 @@ def final_output(Info: ProjectInfo) :
 def create_graph():
     """Create and return the compiled graph"""
     # Intitilising graph
-    graph = StateGraph(ProjectInfo)
+    # Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+    graph = TracedStateGraph(ProjectInfo, name='web.p3.PIG_graph')
 
     # Adding nodes
     graph.add_node("generate_project_ideas", generate_project_ideas)
@@ -4,8 +4,10 @@
 # ==================================================================================
 
 # Importing Libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from shared.llm_factory import get_chat_model
+from shared.llm_cache import cached_chat_model
+from shared.tracing import TracedStateGraph
+from langgraph.graph import START, END
 from typing import TypedDict, Literal
 from dotenv import load_dotenv
 import os
@@ -27,13 +29,8 @@ def initialize_llm(api_key: str):
     # Set the API key in environment variables
     os.environ["HUGGINGFACEHUB_API_TOKEN"] = api_key
     
-    llm = HuggingFaceEndpoint( 
-        endpoint_url="openai/gpt-oss-20b",
-        task="text-generation",
-        huggingfacehub_api_token=api_key
-    )
-    
-    return ChatHuggingFace(llm=llm)
+    # One shared, pooled client per token (shared/llm_factory.py), reused by every session
+    return get_chat_model(api_key)
 
 # Function to create structured output chains
 def create_structured_chains(model):
@@ -56,7 +53,8 @@ def create_structured_chains(model):
         partial_variables={'instruction2': instruction2}
     )
 
-    structured_model_chain1 = prompt1 | model | parser1
+    # Platform classification of a repeated input comes from the persistent cache when LLM_CACHE enables it (shared/llm_cache.py)
+    structured_model_chain1 = prompt1 | cached_chat_model(model, 'p4.get_platform') | parser1
     structured_model_chain2 = prompt2 | model | parser2
     
     return structured_model_chain1, structured_model_chain2
@@ -148,7 +146,8 @@ def which_task(State:AssistantState) -> Literal["Generate_post","Generate_messag
 # ==================================================================================
 
 # Initialize graph
-graph = StateGraph(AssistantState)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(AssistantState, name='web.p4.Apnagraph')
 
 # Adding nodes
 graph.add_node('get_platform',get_platform)
@@ -3,8 +3,9 @@
 # ==================================================================================
 
 # Importing Libraries
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langgraph.graph import StateGraph, START, END
+from shared.llm_factory import get_chat_model
+from shared.tracing import TracedStateGraph
+from langgraph.graph import START, END
 from typing import TypedDict, List, Annotated
 import operator
 from dotenv import load_dotenv
@@ -27,13 +28,8 @@ def initialize_llm(api_key: str):
     # Set the API key in environment variables
     os.environ["HUGGINGFACEHUB_API_TOKEN"] = api_key
     
-    llm = HuggingFaceEndpoint( 
-        endpoint_url="openai/gpt-oss-20b",
-        task="text-generation",
-        huggingfacehub_api_token=api_key
-    )
-    
-    return ChatHuggingFace(llm=llm)
+    # One shared, pooled client per token (shared/llm_factory.py), reused by every session
+    return get_chat_model(api_key)
 
 # Function to create structured chain
 def create_structured_chain(model):
@@ -176,7 +172,8 @@ def iterator(state: personaState):
 # ==================================================================================
 
 # Graph Initializing
-graph = StateGraph(personaState)
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(personaState, name='web.p5.persona_graph')
 
 # Adding nodes
 graph.add_node('get_profiles', get_profiles)
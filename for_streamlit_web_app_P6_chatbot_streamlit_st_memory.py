@@ -1,78 +1,103 @@
 # Basic Chat Bot with memory  
-from langgraph.graph import StateGraph, START, END 
+from langgraph.graph import START, END 
 from langgraph.graph.message import add_messages 
 from typing import TypedDict, Annotated, Literal 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage 
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint 
+from langchain_core.runnables import RunnableConfig
+from shared.llm_factory import get_chat_model
 import streamlit as st 
 import os
+import uuid
+
+from shared.latest_saver import LatestCheckpointSaver
+from shared.tracing import TracedStateGraph
 
 # ====================================================================================  
 
 class ChatState(TypedDict):      
     messages: Annotated[list[BaseMessage], add_messages]
-    model: object
 
 # Function to initialize the LLM with API key
 def initialize_llm(api_key: str):
     os.environ["HUGGINGFACEHUB_API_TOKEN"] = api_key
     
-    llm = HuggingFaceEndpoint(
-        endpoint_url="openai/gpt-oss-20b",
-        task="text-generation",
-        huggingfacehub_api_token=api_key
-    )
-    
-    return ChatHuggingFace(llm=llm)
+    # One shared, pooled client per token (shared/llm_factory.py), reused by every session
+    return get_chat_model(api_key)
 
 # ====================================================================================  
 
-def chat_node(state: ChatState):      
+# The model is passed in the config (not the state), so it is never written to a checkpoint
+def chat_node(state: ChatState, config: RunnableConfig):      
     # take user query from state     
     messages = state['messages']      
     # send to llm     
-    response = state['model'].invoke(messages)      
+    response = config['configurable']['model'].invoke(messages)      
     # response store state     
     return {'messages': [response]}  
 
 # ====================================================================================  
 
-graph = StateGraph(ChatState) 
+# Every node is traced with GRAPH_TRACING=1 (shared/tracing.py)
+graph = TracedStateGraph(ChatState, name='web.p6.chatbot') 
 # adding node 
 graph.add_node('chat_node', chat_node) 
 # adding edges 
 graph.add_edge(START, 'chat_node') 
 graph.add_edge('chat_node', END) 
 # Compiling graph 
-chatbot = graph.compile()  
+# The checkpointer holds the history of every session (one thread per session), cached so that it survives reruns.
+# Sessions never say when they end, so threads idle for CHAT_SESSION_IDLE_HOURS (default 6) are dropped, and
+# beyond CHAT_MAX_SESSIONS threads (default 1000) the least recently used go first
+@st.cache_resource
+def get_checkpointer():
+    return LatestCheckpointSaver(
+        max_threads=int(os.getenv('CHAT_MAX_SESSIONS', '1000')),
+        idle_ttl=float(os.getenv('CHAT_SESSION_IDLE_HOURS', '6')) * 3600,
+    )
+
+checkpointer = get_checkpointer()
+chatbot = graph.compile(checkpointer=checkpointer)  
 
 # ====================================================================================  
 
 # Streamlit Web App Interface  
 
+# Number of messages drawn per page of history
+PAGE_SIZE = 20
+
 st.title("AI Chatbot v1.0") 
 st.write("Chat with your AI assistant")      
 
 # API Key input
 api_key = st.text_input("Enter your Hugging Face API Key:", type="password", help="Get your API key from https://huggingface.co/settings/tokens")
 
-# Initializing session state for conversation history 
-if "conversation" not in st.session_state:     
-    st.session_state.conversation = []     
-    st.session_state.messages = []      
+# Initializing the session: one checkpointer thread per session, which is the only copy of the conversation
+if "thread_id" not in st.session_state:     
+    st.session_state.history_pages = 1
+    st.session_state.thread_id = str(uuid.uuid4())
 
 # Sidebar for conversation history management 
 with st.sidebar:     
     st.subheader("Conversation History")              
     if st.button("Clear Conversation"):         
-        st.session_state.conversation = []         
-        st.session_state.messages = []         
+        checkpointer.delete_thread(st.session_state.thread_id)
+        st.session_state.history_pages = 1
+        st.session_state.thread_id = str(uuid.uuid4())
         st.rerun()           
 
-# Displaying conversation history 
-for message in st.session_state.conversation:     
-    with st.chat_message(message["role"]):         
-        st.write(message["content"])      
+# Displaying conversation history from the checkpointer thread, only the newest pages are read and drawn
+# (load_messages slices the newest messages kept by the saver, the whole conversation is not deserialized on every rerun)
+shown = st.session_state.history_pages * PAGE_SIZE
+page, total = checkpointer.load_messages(st.session_state.thread_id, shown)
+history = [message for message in page if isinstance(message, (HumanMessage, AIMessage))]
+
+if total > shown and st.button("Load earlier messages"):
+    st.session_state.history_pages += 1
+    st.rerun()
+
+for message in history:     
+    with st.chat_message("You" if isinstance(message, HumanMessage) else "AI"):         
+        st.write(message.content)      
 
 # Chat input  
 prompt = st.chat_input("Ask: ") 
@@ -85,30 +110,18 @@ if prompt:
             if "model" not in st.session_state:
                 st.session_state.model = initialize_llm(api_key)
                 
-            # Add user message to conversation     
-            st.session_state.conversation.append({"role": "You", "content": prompt})     
             with st.chat_message("You"):         
                 st.write(prompt)              
                 
-            # Convert conversation to LangChain messages          
-            msg = st.session_state.conversation[-1]     
-            if msg["role"] == "You":         
-                st.session_state.messages.append(HumanMessage(content=msg["content"]))     
-            elif msg["role"] == "AI":         
-                st.session_state.messages.append(AIMessage(content=msg["content"]))              
+            # Only the new message is sent, the history lives in the checkpointer thread
+            config = {"configurable": {"thread_id": st.session_state.thread_id, "model": st.session_state.model}}
                 
             # Get response from chatbot     
             with st.chat_message("AI"):         
                 with st.spinner("Thinking..."):                 
-                    # Use your existing chatbot with model in state                
-                    response = chatbot.invoke({"messages": st.session_state.messages, "model": st.session_state.model})                 
+                    # Use your existing chatbot with model in the config
+                    response = chatbot.invoke({"messages": [HumanMessage(content=prompt)]}, config=config)
                     bot_message = response["messages"][-1].content                                      
                     st.write(bot_message)                                      
-                    
-                    # Add bot response to conversation                 
-                    st.session_state.conversation.append({                         
-                        "role": "AI",                          
-                        "content": bot_message                     
-                    })
         except Exception as e:
             st.error(f"Error: {str(e)}. Please check your API key.")
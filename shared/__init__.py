@@ -0,0 +1,4 @@
+# Helpers shared by the projects in this repository.
+#
+# Project folders import them after adding the repository root to sys.path:
+#     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
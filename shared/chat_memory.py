@@ -0,0 +1,190 @@
+# Conversation memory for the chat bots (P6, P7)
+#     The full message history stays in the graph state for display, only the prompt sent
+#     to the model is bounded. Two policies, picked with CHAT_MEMORY_POLICY:
+#
+#     summary       the last few messages are sent verbatim, everything older is folded
+#                   into a running summary in the background after the reply (default)
+#     token_budget  the newest messages which fit in CHAT_TOKEN_BUDGET tokens are sent,
+#                   system and pinned messages are always kept
+#
+#     P7 adds a third policy, semantic (semantic_memory.py): the last KEEP_MESSAGES messages
+#     plus the most similar turns of the user's earlier conversations
+#
+#     The summary is never computed while the user waits: chat_node hands the state to a worker
+#     thread once the reply is ready, and the next turn of the thread stores the finished summary
+#     along with its reply. A summary which is not ready yet only makes that prompt a little longer.
+
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+MEMORY_POLICY = os.getenv('CHAT_MEMORY_POLICY', 'summary')
+
+# Messages always sent verbatim (3 turns)
+KEEP_MESSAGES = 6
+
+# Messages that may pile up beyond the verbatim window before they are summarized
+SUMMARY_BATCH = 6
+
+# Prompt budget of the token_budget policy
+TOKEN_BUDGET = int(os.getenv('CHAT_TOKEN_BUDGET', '2000'))
+
+# Formatting tokens added by the chat template around every message
+MESSAGE_OVERHEAD = 4
+
+# =================================================================================================
+
+# Function to build the prompt for the configured policy, also returns the state update to keep
+def memory_prompt(state: dict):
+    if MEMORY_POLICY == 'token_budget':
+        return budget_prompt(state)
+    return summary_prompt(state), {}
+
+# Function to store the model reply along with the memory update
+def remember_reply(memory: dict, response: BaseMessage) -> dict:
+    if MEMORY_POLICY == 'token_budget':
+        memory = count_reply(memory, response)
+    return {**memory, 'messages': memory.get('messages', []) + [response]}
+
+# =================================================================================================
+# Summary policy
+
+# Function to build the prompt: running summary + messages which are not summarized yet
+def summary_prompt(state: dict) -> List[BaseMessage]:
+    messages = state['messages'][state.get('summarized', 0):]
+    if state.get('summary'):
+        return [SystemMessage(content=f"Summary of the earlier conversation:\n{state['summary']}")] + messages
+    return messages
+
+# Function to decide whether older messages should be folded into the summary
+def needs_summary(state: dict, keep: int = KEEP_MESSAGES, batch: int = SUMMARY_BATCH) -> bool:
+    if MEMORY_POLICY != 'summary':
+        return False
+    return len(state['messages']) - state.get('summarized', 0) - keep >= batch
+
+# Function to build the prompt which folds everything but the last `keep` messages into the summary
+def summary_request(state: dict, keep: int = KEEP_MESSAGES):
+    messages = state['messages']
+    start = state.get('summarized', 0)
+
+    # The verbatim window always starts with a user message
+    end = len(messages) - keep
+    while end > start and not isinstance(messages[end], HumanMessage):
+        end -= 1
+    if end <= start:
+        return None, start
+
+    transcript = '\n'.join(
+        f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+        for message in messages[start:end]
+    )
+    prompt = (
+        f"Current summary of the conversation:\n{state.get('summary') or '(empty)'}\n\n"
+        f"New messages:\n{transcript}\n\n"
+        "Update the summary with the new messages. Keep names, facts, decisions and open questions. "
+        "Reply with the updated summary only."
+    )
+    return prompt, end
+
+# Function to fold older messages into the running summary
+def summarize_messages(model, state: dict, keep: int = KEEP_MESSAGES) -> dict:
+    prompt, end = summary_request(state, keep)
+    if prompt is None:
+        return {}
+    return {'summary': model.invoke(prompt).content, 'summarized': end}
+
+# Summaries computed on worker threads, waiting for the next turn of their thread
+class BackgroundSummarizer:
+    def __init__(self, workers: int = 4, max_pending: int = 1000):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chat-summary')
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        # thread_id -> (summarized when it started, future of the summary update), oldest first
+        self.pending: 'OrderedDict[str, tuple]' = OrderedDict()
+
+    # Function to start summarizing a thread once its reply is ready (`state` includes the reply),
+    # at most one summary per thread runs at a time
+    def schedule(self, thread_id: str, model, state: dict) -> None:
+        if not needs_summary(state):
+            return
+        with self.lock:
+            if thread_id in self.pending:
+                return
+            self.pending[thread_id] = (state.get('summarized', 0), self.executor.submit(summarize_messages, model, state))
+            # Threads which never come back do not keep their summaries forever
+            while len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+
+    # Function to take the finished summary of a thread as a state update ({} while it is running)
+    def collect(self, thread_id: str, state: dict) -> dict:
+        with self.lock:
+            started_at, future = self.pending.get(thread_id, (None, None))
+            if future is None or not future.done():
+                return {}
+            del self.pending[thread_id]
+        if future.exception() is not None:
+            # Retried after a later turn
+            return {}
+        # Dropped when the thread was summarized in between
+        return future.result() if started_at == state.get('summarized', 0) else {}
+
+summarizer = BackgroundSummarizer()
+
+# =================================================================================================
+# Token budget policy
+
+# Function to estimate the token count of a text (about 4 characters per sub-word token)
+def count_tokens(text) -> int:
+    if not isinstance(text, str):
+        text = str(text)
+    return sum(math.ceil(len(piece) / 4) for piece in re.findall(r'\w+|[^\w\s]', text))
+
+# Function to get the token count of a message, counted once and cached in its metadata
+def message_tokens(message: BaseMessage) -> int:
+    if 'token_count' not in message.response_metadata:
+        message.response_metadata['token_count'] = count_tokens(message.content) + MESSAGE_OVERHEAD
+    return message.response_metadata['token_count']
+
+# System messages and messages marked with additional_kwargs={'pinned': True} are never trimmed
+def is_pinned(message: BaseMessage) -> bool:
+    return isinstance(message, SystemMessage) or bool(message.additional_kwargs.get('pinned'))
+
+# Function to pick the newest messages which fit in the budget
+#     Only messages added since the last turn are counted, the window start only moves forward
+#     and the running total is kept in state, so every turn costs O(new messages).
+def budget_prompt(state: dict, budget: int = TOKEN_BUDGET):
+    messages = state['messages']
+    start = state.get('window_start', 0)
+    total = state.get('window_tokens', 0)
+    pinned = list(state.get('pinned', []))
+    counted = state.get('counted', 0)
+
+    # Counting the new messages (returned so that the cached counts are stored with them)
+    fresh = messages[counted:]
+    for index, message in enumerate(fresh, counted):
+        total += message_tokens(message)
+        if is_pinned(message):
+            pinned.append(index)
+
+    # Dropping the oldest unpinned messages until the window fits (the newest one always stays)
+    pinned_before = [index for index in pinned if index < start]
+    while start < len(messages) - 1 and total > budget:
+        if is_pinned(messages[start]):
+            pinned_before.append(start)
+        else:
+            total -= message_tokens(messages[start])
+        start += 1
+
+    prompt = [messages[index] for index in pinned_before] + messages[start:]
+    memory = {'messages': fresh, 'window_start': start, 'window_tokens': total, 'pinned': pinned, 'counted': len(messages)}
+    return prompt, memory
+
+# Function to add the reply to the running total
+def count_reply(memory: dict, response: BaseMessage) -> dict:
+    return {**memory, 'window_tokens': memory['window_tokens'] + message_tokens(response), 'counted': memory['counted'] + 1}
@@ -0,0 +1,232 @@
+# Critical path and latency heatmap of recorded graph runs (spans from shared/tracing.py)
+#     LangGraph runs a graph in steps: every node of a step starts together and the next step
+#     starts once the last of them has finished. The latency of a run is therefore decided by
+#     the slowest node of every step (the critical path), and the other nodes of a step have
+#     slack, time they could take longer without making the run any slower. With parallel
+#     branches (P3's four nodes, P5's section nodes) the node which looks slow on its own is
+#     not always the one the run waits for.
+#
+#     Every run in the trace file is replayed step by step, and per node it reports:
+#         critical    share of its runs on the critical path
+#         slack       how much later it could have finished without delaying its step
+#         latency     time it added to a run (its duration where it was critical) and its share
+#                     of the run, the rest is framework time between steps
+#         gain        how much faster a run would be if the node took no time (its step would
+#                     end with the next slowest node), the order to optimize in
+#     The graph is rendered as a Mermaid flowchart with nodes colored by their share of the
+#     latency. Edges are the edges of the compiled graph (graph.edges of the run span) taken between
+#     consecutive steps of the runs, the usual critical path in bold. Runs recorded without their
+#     graph edges fall back to every pair of nodes of consecutive steps.
+#
+#     python -m shared.critical_path [path] [--graph p3.PIG_graph] [--output heatmap.md]
+
+import argparse
+import os
+import re
+from collections import defaultdict
+from typing import List, Optional
+
+from shared.tracing import DEFAULT_PATH, read_spans
+
+# Heatmap colors, from no share of the latency to the largest share
+COLD, HOT = (0xff, 0xf5, 0xeb), (0xb3, 0x00, 0x00)
+
+# Critical edges taken by at least this share of the runs are drawn in bold
+CRITICAL_EDGE_SHARE = 0.5
+
+# =================================================================================================
+# Replaying runs
+
+# Function to group spans into graph runs: (graph name, root span or None, node spans)
+def group_runs(spans: List[dict]) -> list:
+    roots = {span['span_id']: span for span in spans if 'langgraph.node' not in span['attributes']}
+    members = defaultdict(list)
+    for span in spans:
+        if 'langgraph.node' in span['attributes']:
+            # Node spans recorded outside of a traced run are grouped by trace
+            members[span['parent_span_id'] if span['parent_span_id'] in roots else span['trace_id']].append(span)
+    return [(nodes[0]['attributes']['graph.name'], roots.get(key), nodes) for key, nodes in members.items()]
+
+# Function to split the node spans of a run into its steps, in order
+def run_steps(nodes: List[dict]) -> List[List[dict]]:
+    steps = defaultdict(list)
+    for span in nodes:
+        step = span['attributes'].get('langgraph.step')
+        # Without a step number every node is a step of its own
+        steps[step if step is not None else span['span_id']].append(span)
+    return sorted(steps.values(), key=lambda step: min(span['start_time_unix_nano'] for span in step))
+
+# Function to pick the edges a run took: declared edges whose source ran in the step before their
+# target (every pair of nodes of consecutive steps when the edges are unknown)
+def taken_edges(steps: List[List[str]], declared: Optional[set]) -> set:
+    steps = [['__start__']] + steps + [['__end__']]
+    return {
+        (source, target)
+        for before, after in zip(steps, steps[1:]) for source in before for target in after
+        if declared is None or (source, target) in declared
+    }
+
+# Function to replay one run: duration, slack, criticality and gain of every node run
+def replay_run(root: Optional[dict], nodes: List[dict]) -> dict:
+    steps = run_steps(nodes)
+    declared = root['attributes'].get('graph.edges') if root else None
+    declared = {tuple(edge) for edge in declared} if declared is not None else None
+    start = root['start_time_unix_nano'] if root else min(span['start_time_unix_nano'] for span in nodes)
+    end = root['end_time_unix_nano'] if root else max(span['end_time_unix_nano'] for span in nodes)
+
+    node_runs, path = [], []
+    for step in steps:
+        step_end = max(span['end_time_unix_nano'] for span in step)
+        critical = max(step, key=lambda span: span['end_time_unix_nano'])
+        path.append(critical['name'])
+        for span in step:
+            duration = span['end_time_unix_nano'] - span['start_time_unix_nano']
+            if span is critical:
+                # Without this node the step would end with the next one to finish (or when it started)
+                others = [other['end_time_unix_nano'] for other in step if other is not span]
+                gain = step_end - max(others + [span['start_time_unix_nano']])
+            node_runs.append({
+                'node': span['name'],
+                'duration': duration,
+                'slack': step_end - span['end_time_unix_nano'],
+                'critical': span is critical,
+                'latency': duration if span is critical else 0,
+                'gain': gain if span is critical else 0,
+            })
+    names = [sorted({span['name'] for span in step}) for step in steps]
+    edges = taken_edges(names, declared)
+    path = ['__start__'] + path + ['__end__']
+    return {
+        'total': end - start,
+        'nodes': node_runs,
+        'edges': edges,
+        # The slowest nodes of consecutive steps, where an edge joins them
+        'critical_edges': {edge for edge in zip(path, path[1:]) if edge in edges},
+    }
+
+# Function to aggregate the replayed runs of one graph, per node and per step transition
+def analyze(runs: List[dict]) -> dict:
+    nodes = defaultdict(lambda: {'runs': 0, 'critical': 0, 'duration': 0, 'slack': 0, 'latency': 0, 'gain': 0})
+    edges, critical_edges = defaultdict(int), defaultdict(int)
+    total = sum(run['total'] for run in runs)
+    for run in runs:
+        for node_run in run['nodes']:
+            entry = nodes[node_run['node']]
+            entry['runs'] += 1
+            for field in ('critical', 'duration', 'slack', 'latency', 'gain'):
+                entry[field] += node_run[field]
+
+        for edge in run['edges']:
+            edges[edge] += 1
+        for edge in run['critical_edges']:
+            critical_edges[edge] += 1
+
+    count = len(runs)
+    result = {
+        'runs': count,
+        'total_ms': total / count / 1e6,
+        'nodes': {
+            name: {
+                'runs': entry['runs'] / count,
+                'duration_ms': entry['duration'] / entry['runs'] / 1e6,
+                'critical': entry['critical'] / entry['runs'],
+                'slack_ms': entry['slack'] / entry['runs'] / 1e6,
+                'latency_ms': entry['latency'] / count / 1e6,
+                'share': entry['latency'] / total if total else 0.0,
+                'gain_ms': entry['gain'] / count / 1e6,
+            }
+            for name, entry in nodes.items()
+        },
+        'edges': dict(edges),
+        'critical_edges': {edge: hits / count for edge, hits in critical_edges.items()},
+    }
+    result['framework_share'] = max(0.0, 1.0 - sum(node['share'] for node in result['nodes'].values()))
+    return result
+
+# Function to analyze every graph of a trace file (or one graph), returns {graph name: analysis}
+def analyze_file(path: str = DEFAULT_PATH, graph: Optional[str] = None) -> dict:
+    runs = defaultdict(list)
+    for name, root, nodes in group_runs(read_spans(path)):
+        if graph is None or name == graph:
+            runs[name].append(replay_run(root, nodes))
+    return {name: analyze(graph_runs) for name, graph_runs in sorted(runs.items())}
+
+# =================================================================================================
+# Output
+
+def heat_color(value: float) -> str:
+    return '#' + ''.join(f'{round(cold + (hot - cold) * value):02x}' for cold, hot in zip(COLD, HOT))
+
+def node_id(name: str) -> str:
+    return re.sub(r'\W', '_', name)
+
+# Function to render the analysis as a Mermaid flowchart, nodes colored by their share of the latency
+def heatmap_mermaid(analysis: dict) -> str:
+    nodes = analysis['nodes']
+    hottest = max((node['share'] for node in nodes.values()), default=0.0) or 1.0
+    lines = ['flowchart TD', '    __start__([start])', '    __end__([end])']
+    for name, node in sorted(nodes.items()):
+        label = name.replace('"', '#quot;')
+        lines.append(f'    {node_id(name)}["{label}<br/>{node["share"]:.0%} · {node["latency_ms"]:.0f} ms · slack {node["slack_ms"]:.0f} ms"]')
+
+    critical_links = []
+    for index, (source, target) in enumerate(sorted(analysis['edges'])):
+        if analysis['critical_edges'].get((source, target), 0.0) >= CRITICAL_EDGE_SHARE:
+            lines.append(f'    {node_id(source)} ==> {node_id(target)}')
+            critical_links.append(str(index))
+        else:
+            lines.append(f'    {node_id(source)} --> {node_id(target)}')
+
+    for name, node in sorted(nodes.items()):
+        share = node['share'] / hottest
+        lines.append(f'    style {node_id(name)} fill:{heat_color(share)},color:{"#fff" if share > 0.6 else "#000"}')
+    if critical_links:
+        lines.append(f'    linkStyle {",".join(critical_links)} stroke:{heat_color(1.0)},stroke-width:3px')
+    return '\n'.join(lines)
+
+# Function to render the per-node table, largest gain first
+def node_table(analysis: dict) -> str:
+    rows = [
+        '| node | per run | mean ms | critical | slack ms | latency ms | share | gain ms |',
+        '|---|---:|---:|---:|---:|---:|---:|---:|',
+    ]
+    for name, node in sorted(analysis['nodes'].items(), key=lambda item: (-item[1]['gain_ms'], -item[1]['share'])):
+        rows.append(
+            f'| {name} | {node["runs"]:.1f} | {node["duration_ms"]:.1f} | {node["critical"]:.0%} | {node["slack_ms"]:.1f} | '
+            f'{node["latency_ms"]:.1f} | {node["share"]:.0%} | {node["gain_ms"]:.1f} |'
+        )
+    return '\n'.join(rows)
+
+def report(name: str, analysis: dict) -> str:
+    return '\n'.join([
+        f'## {name}',
+        '',
+        f'{analysis["runs"]} runs, {analysis["total_ms"]:.1f} ms per run, {analysis["framework_share"]:.0%} outside the critical nodes.',
+        '',
+        node_table(analysis),
+        '',
+        '```mermaid',
+        heatmap_mermaid(analysis),
+        '```',
+        '',
+    ])
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Critical path and latency heatmap of recorded graph runs')
+    parser.add_argument('path', nargs='?', default=os.getenv('GRAPH_TRACING_PATH', DEFAULT_PATH), help='Spans (JSONL) from GRAPH_TRACING=1')
+    parser.add_argument('--graph', help='Only this graph (graph.name of the spans, e.g. p3.PIG_graph)')
+    parser.add_argument('--output', help='Write the report (Markdown with Mermaid) to this file instead of printing it')
+    args = parser.parse_args()
+
+    analyses = analyze_file(args.path, args.graph)
+    if not analyses:
+        parser.exit(1, f'No graph runs in {args.path}\n')
+    text = '\n'.join(report(name, analysis) for name, analysis in analyses.items())
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+        print(f'Wrote {args.output} ({len(analyses)} graphs)')
+    else:
+        print(text)
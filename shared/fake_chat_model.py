@@ -0,0 +1,228 @@
+# Local streaming chat model for load tests, benchmarks and offline runs (LLM_BACKEND=fake)
+#     Replies without any network call and streams the reply word by word at a set rate, so
+#     every graph runs on a laptop with realistic timing. Replies are seeded by the prompt,
+#     the same prompt and seed always give the same reply:
+#         - prompts with PydanticOutputParser format instructions (P3, P4, P5) get a JSON
+#           instance of the schema, so the parsers succeed
+#         - prompts with numbered bold section headings (the P5 persona template) get every
+#           section back with a few sentences under it
+#         - anything else gets "You said: <start of the last message>." and seeded filler
+#     A script (list of replies, used in order) overrides all of this.
+#
+# Configured by fake_chat_model_from_env():
+#     FAKE_LLM_SEED             seed of replies, latencies and errors (default 0)
+#     FAKE_LLM_LATENCY          time to first token: 0.3 | uniform:0.1,0.5 | normal:0.3,0.05 | lognormal:0.3,0.5 (median, sigma)
+#     FAKE_LLM_TOKENS_PER_SEC   streaming rate (default 50)
+#     FAKE_LLM_REPLY_WORDS      words in a plain reply (default 40)
+#     FAKE_LLM_ERROR_RATE       share of calls which fail (default 0), FAKE_LLM_ERROR the failure:
+#                               rate_limit (429), server (503) or timeout
+#     FAKE_LLM_SCRIPT           JSON file with a list of replies
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+VOCABULARY = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et dolore '
+    'magna aliqua user product market team data design build simple fast clear goal plan review project learn '
+    'share weekly daily tool insight value growth focus'
+).split()
+
+output_schema = re.compile(r'Here is the output schema:\s*```\s*(\{.*?\})\s*```', re.S)
+section_heading = re.compile(r'^\s*\*\*(\d{1,2})\.\s*([^*\n]+?)\*\*', re.M)
+
+# =================================================================================================
+
+# Error raised for injected failures, status_code as the hosted API would answer
+class FakeLLMError(RuntimeError):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+# Function to parse a latency spec into a sampler of seconds
+def latency_sampler(spec: str):
+    kind, _, args = spec.partition(':') if ':' in spec else ('fixed', '', spec)
+    values = [float(value) for value in args.split(',')] if args else [0.0]
+    if kind == 'fixed':
+        return lambda rng: values[0]
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda rng: values[0] * rng.lognormvariate(0.0, values[1])
+    raise ValueError(f'Unknown latency distribution: {spec}')
+
+def sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + '.'
+
+# Function to build an instance of a JSON schema (pydantic model_json_schema output)
+def schema_instance(schema: dict, rng: random.Random, items: int, defs: Optional[dict] = None):
+    defs = schema.get('$defs', {}) if defs is None else defs
+    if '$ref' in schema:
+        return schema_instance(defs[schema['$ref'].split('/')[-1]], rng, items, defs)
+    if 'enum' in schema:
+        return rng.choice(schema['enum'])
+    if 'const' in schema:
+        return schema['const']
+    for key in ('anyOf', 'oneOf', 'allOf'):
+        if key in schema:
+            options = [option for option in schema[key] if option.get('type') != 'null'] or schema[key]
+            return schema_instance(options[0], rng, items, defs)
+
+    kind = schema.get('type', 'object' if 'properties' in schema else 'string')
+    if kind == 'object':
+        return {name: schema_instance(field, rng, items, defs) for name, field in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [schema_instance(schema.get('items', {}), rng, items, defs) for _ in range(items)]
+    if kind == 'integer':
+        return rng.randint(1, 10)
+    if kind == 'number':
+        return round(rng.uniform(0, 10), 2)
+    if kind == 'boolean':
+        return rng.random() < 0.5
+    if kind == 'null':
+        return None
+    return sentence(rng, 6)
+
+# =================================================================================================
+
+class FakeStreamingChatModel(BaseChatModel):
+    # Number of words in a plain reply
+    reply_words: int = 40
+    # Seconds between two streamed words
+    token_delay: float = 0.02
+    # Time to first token, see latency_sampler
+    latency: str = '0'
+    seed: int = 0
+    # Items in every JSON array of a structured reply
+    array_items: int = 3
+    # Replies used in order instead of generated ones
+    script: List[str] = []
+    # Share of calls which fail, and how (rate_limit, server or timeout)
+    error_rate: float = 0.0
+    error_kind: str = 'rate_limit'
+
+    _rng: random.Random = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-streaming'
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {'reply_words': self.reply_words, 'seed': self.seed, 'array_items': self.array_items, 'script': len(self.script)}
+
+    # Function to build the reply text (seeded by the prompt, or the next scripted reply)
+    def _reply_text(self, messages: List[BaseMessage]) -> str:
+        with self._lock:
+            call = self._calls
+            self._calls += 1
+        if self.script:
+            return self.script[call % len(self.script)]
+
+        prompt = '\n'.join(str(message.content) for message in messages)
+        rng = random.Random(f'{self.seed}:{prompt}')
+        if schemas := output_schema.findall(prompt):
+            return json.dumps(schema_instance(json.loads(schemas[-1]), rng, self.array_items), ensure_ascii=False)
+        if sections := section_heading.findall(prompt):
+            return '\n\n'.join(f'**{number}. {title.strip()}**\n\n{sentence(rng, 12)} {sentence(rng, 10)}' for number, title in sections)
+
+        last = str(messages[-1].content) if messages else ''
+        words = f"You said: {' '.join(last.split()[:10])}.".split()
+        words += [rng.choice(VOCABULARY) for _ in range(self.reply_words - len(words))]
+        return ' '.join(words[:self.reply_words])
+
+    def _reply(self, messages: List[BaseMessage]) -> List[str]:
+        return re.findall(r'\S+\s*|\s+', self._reply_text(messages))
+
+    # Function to draw this call's latency and, for failing calls, the token the failure comes after
+    def _plan(self, tokens: int):
+        with self._lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            latency = latency_sampler(self.latency)(self._rng)
+            fail_at = self._rng.randrange(tokens + 1) if self._rng.random() < self.error_rate else None
+        return latency, fail_at
+
+    def _error(self) -> Exception:
+        if self.error_kind == 'timeout':
+            return TimeoutError('Fake LLM request timed out')
+        if self.error_kind == 'server':
+            return FakeLLMError('503 Service Unavailable (fake)', 503)
+        return FakeLLMError('429 Too Many Requests (fake)', 429)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tokens = self._reply(messages)
+        latency, fail_at = self._plan(len(tokens))
+        time.sleep(latency + self.token_delay * (len(tokens) if fail_at is None else fail_at))
+        if fail_at is not None:
+            raise self._error()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=''.join(tokens)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tokens = self._reply(messages)
+        latency, fail_at = self._plan(len(tokens))
+        await asyncio.sleep(latency + self.token_delay * (len(tokens) if fail_at is None else fail_at))
+        if fail_at is not None:
+            raise self._error()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=''.join(tokens)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self._reply(messages)
+        latency, fail_at = self._plan(len(tokens))
+        time.sleep(latency)
+        for index, token in enumerate(tokens):
+            if index == fail_at:
+                raise self._error()
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        if fail_at == len(tokens):
+            raise self._error()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self._reply(messages)
+        latency, fail_at = self._plan(len(tokens))
+        await asyncio.sleep(latency)
+        for index, token in enumerate(tokens):
+            if index == fail_at:
+                raise self._error()
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        if fail_at == len(tokens):
+            raise self._error()
+
+# Function to build the fake model configured by the FAKE_LLM_* environment variables
+def fake_chat_model_from_env() -> FakeStreamingChatModel:
+    script = []
+    if path := os.getenv('FAKE_LLM_SCRIPT'):
+        with open(path, encoding='utf-8') as file:
+            script = json.load(file)
+    rate = float(os.getenv('FAKE_LLM_TOKENS_PER_SEC', '50'))
+    return FakeStreamingChatModel(
+        reply_words=int(os.getenv('FAKE_LLM_REPLY_WORDS', '40')),
+        token_delay=1 / rate if rate > 0 else 0.0,
+        latency=os.getenv('FAKE_LLM_LATENCY', '0'),
+        seed=int(os.getenv('FAKE_LLM_SEED', '0')),
+        script=script,
+        error_rate=float(os.getenv('FAKE_LLM_ERROR_RATE', '0')),
+        error_kind=os.getenv('FAKE_LLM_ERROR', 'rate_limit'),
+    )
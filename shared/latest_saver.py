@@ -0,0 +1,130 @@
+# InMemorySaver keeping only the latest checkpoint of every thread (P6)
+#     InMemorySaver stores a serialized copy of every channel version, so a chat thread
+#     holds one copy of the message list per graph step. Apps which never go back to an
+#     earlier checkpoint only need the latest one, older checkpoints, their pending writes
+#     and the channel values they alone referenced are dropped on every put.
+#
+#     The saver is shared by every session of the process (one thread per browser session),
+#     and Streamlit never says when a session ends. Threads are therefore bounded: a thread
+#     idle for longer than `idle_ttl` seconds is dropped, and beyond `max_threads` the least
+#     recently used ones are dropped first.
+#
+#     Redrawing a chat only needs its newest messages, so every put also keeps the last
+#     TAIL_SIZE messages as objects. load_messages serves those pages without deserializing
+#     the whole conversation, older pages still decode the checkpoint.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Number of newest messages of every thread kept as objects for load_messages
+TAIL_SIZE = 100
+
+# =================================================================================================
+
+class LatestCheckpointSaver(InMemorySaver):
+
+    def __init__(self, *, max_threads: Optional[int] = 1000, idle_ttl: Optional[float] = 6 * 3600, serde=None):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.idle_ttl = idle_ttl
+        self.lock = threading.RLock()
+        # thread_id -> last use, least recently used first
+        self.last_used: 'OrderedDict[str, float]' = OrderedDict()
+        self.evictions = 0
+        # (thread_id, checkpoint_ns) -> (newest messages, number of messages)
+        self.tails: dict = {}
+
+    # ---------------------------------------------------------------------------------------------
+    # Thread limits
+
+    # Function to mark a thread as used and drop the threads beyond the limits (never `thread_id`)
+    def _touch(self, thread_id: str) -> None:
+        now = time.monotonic()
+        self.last_used[thread_id] = now
+        self.last_used.move_to_end(thread_id)
+        while len(self.last_used) > 1:
+            oldest, used = next(iter(self.last_used.items()))
+            expired = self.idle_ttl is not None and now - used > self.idle_ttl
+            if not expired and (self.max_threads is None or len(self.last_used) <= self.max_threads):
+                break
+            self.delete_thread(oldest)
+            self.evictions += 1
+
+    # Function to drop a thread: its checkpoints, their writes and the channel values they point to
+    #     (only the keys of this thread are visited, not every blob of the process)
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            self.last_used.pop(thread_id, None)
+            for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+                self.tails.pop((thread_id, checkpoint_ns), None)
+                for checkpoint_id, saved in checkpoints.items():
+                    self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                    for channel, version in self.serde.loads_typed(saved[0])['channel_versions'].items():
+                        self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+    # ---------------------------------------------------------------------------------------------
+
+    def get_tuple(self, config):
+        with self.lock:
+            thread_id = config['configurable']['thread_id']
+            # InMemorySaver would add an empty entry for a thread it does not know
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+
+        with self.lock:
+            stale = list(self.storage[thread_id][checkpoint_ns])
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+
+            # Channel versions the new checkpoint still points to
+            current = checkpoint['channel_versions']
+            for checkpoint_id in stale:
+                saved = self.storage[thread_id][checkpoint_ns].pop(checkpoint_id, None)
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                if saved is None:
+                    continue
+                for channel, version in self.serde.loads_typed(saved[0])['channel_versions'].items():
+                    if current.get(channel) != version:
+                        self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+            if 'messages' in new_versions:
+                messages = checkpoint['channel_values'].get('messages') or []
+                self.tails[(thread_id, checkpoint_ns)] = (messages[-TAIL_SIZE:], len(messages))
+
+            self._touch(thread_id)
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=''):
+        with self.lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    # Function to read a page of the messages of a thread (same interface as SqliteCheckpointSaver),
+    # pages within the newest TAIL_SIZE messages are sliced from the tail, nothing is deserialized
+    def load_messages(self, thread_id: str, count: int, offset: int = 0, checkpoint_ns: str = '') -> tuple:
+        with self.lock:
+            if thread_id not in self.storage:
+                return [], 0
+            self._touch(thread_id)
+            tail, total = self.tails.get((thread_id, checkpoint_ns), ([], 0))
+        start, end = max(0, total - offset - count), max(0, total - offset)
+        if start >= total - len(tail):
+            return tail[start - (total - len(tail)):end - (total - len(tail))], total
+
+        saved = self.get_tuple({'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns}})
+        messages = (saved.checkpoint['channel_values'].get('messages') or []) if saved else []
+        total = len(messages)
+        return messages[max(0, total - offset - count):max(0, total - offset)], total
+
+    # Memory use for monitoring
+    def stats(self) -> dict:
+        with self.lock:
+            return {'threads': len(self.last_used), 'blobs': len(self.blobs), 'evictions': self.evictions}
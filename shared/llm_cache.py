@@ -0,0 +1,294 @@
+# Persistent LLM response cache for deterministic prompts (P1 generate_titles, P3 final_output, P4 get_platform)
+#     Reformatting and classification prompts are sent again and again with the same input.
+#     cached_chat_model(model, site) wraps the shared chat model for one call site: replies
+#     are stored in SQLite under a hash of the model id, its decoding parameters, the call
+#     options and the canonical message list, and a repeated call is answered from disk in
+#     milliseconds. A hit is replayed through ReplayChatModel, so streaming callers still get
+#     chunks. The least recently used replies are evicted once LLM_CACHE_MAX_MB is exceeded.
+#
+#     Hits, misses and model time saved are counted per call site in the same database, so
+#     they add up across processes (every Streamlit run, every script).
+#
+# Off by default: LLM_CACHE=1 opts every call site in, LLM_CACHE=p3.final_output,p4.get_platform only
+# those sites. LLM_CACHE_PATH moves the database (default llm_cache.db in the repository root).
+#     python -m shared.llm_cache stats
+#     python -m shared.llm_cache clear
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from shared.response_cache import ReplayChatModel
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'llm_cache.db')
+
+MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '64'))
+
+schema = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    reply TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_by_use ON responses (used_at);
+CREATE TABLE IF NOT EXISTS sites (
+    site TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    latency_saved REAL NOT NULL DEFAULT 0
+);
+'''
+
+# =================================================================================================
+# Cache key
+
+# Function to get what decides a model's reply: model id and decoding parameters (never the token)
+def model_signature(model) -> dict:
+    llm = getattr(model, 'llm', None)
+    if llm is not None and hasattr(llm, '_default_params'):
+        # ChatHuggingFace around a HuggingFaceEndpoint
+        return {
+            'model': llm.endpoint_url or llm.repo_id or llm.model,
+            'provider': llm.provider,
+            'task': llm.task,
+            **llm._default_params,
+            **(llm.model_kwargs or {}),
+        }
+    return {'model': model._llm_type, **model._identifying_params}
+
+# Function to build the cache key of a call, the same for equal messages whatever their ids
+def cache_key(signature: dict, messages: List[BaseMessage], options: dict) -> str:
+    canonical = [
+        [message.type, message.content, message.name, message.additional_kwargs, getattr(message, 'tool_calls', None) or []]
+        for message in messages
+    ]
+    payload = json.dumps([signature, options, canonical], sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# =================================================================================================
+
+class LLMCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = int(MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self.conn.executescript(schema)
+        self.size = self.conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM responses').fetchone()[0]
+
+    def _count(self, site: str, hit: bool, saved: float = 0.0) -> None:
+        self.conn.execute(
+            'INSERT INTO sites (site, hits, misses, latency_saved) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (site) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses, '
+            'latency_saved = latency_saved + excluded.latency_saved',
+            (site, int(hit), int(not hit), saved),
+        )
+
+    # Function to look a reply up (counted as a hit or miss of `site`)
+    #     The transactions write, so they take the write lock up front (BEGIN IMMEDIATE): a deferred
+    #     one reading first could not upgrade while another process writes, and fails with SQLITE_BUSY
+    #     instead of waiting for busy_timeout
+    def get(self, key: str, site: str) -> Optional[str]:
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute('SELECT reply, latency FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self.conn.execute('UPDATE responses SET used_at = ? WHERE key = ?', (time.time(), key))
+            self._count(site, row is not None, row[1] if row else 0.0)
+            self.conn.execute('COMMIT')
+        return row[0] if row else None
+
+    def put(self, key: str, site: str, reply: str, latency: float) -> None:
+        size = len(reply.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            old = self.conn.execute('SELECT bytes FROM responses WHERE key = ?', (key,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (key, site, reply, bytes, latency, created_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, site, reply, size, latency, now, now),
+            )
+            self.size += size - (old[0] if old else 0)
+            if self.size > self.max_bytes:
+                self._evict()
+            self.conn.execute('COMMIT')
+
+    # Function to drop least recently used replies until the cache is back under 90% of its size
+    def _evict(self) -> None:
+        # Other processes write to the same file, the size is recounted before evicting
+        self.size = self.conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM responses').fetchone()[0]
+        target = self.max_bytes * 0.9
+        while self.size > target:
+            rows = self.conn.execute('SELECT key, bytes FROM responses ORDER BY used_at LIMIT 256').fetchall()
+            if not rows:
+                break
+            drop = []
+            for key, size in rows:
+                if self.size <= target:
+                    break
+                drop.append((key,))
+                self.size -= size
+            self.conn.executemany('DELETE FROM responses WHERE key = ?', drop)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM responses').fetchone()
+            rows = self.conn.execute('SELECT site, hits, misses, latency_saved FROM sites ORDER BY site').fetchall()
+        sites = {
+            site: {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0, 'latency_saved': saved}
+            for site, hits, misses, saved in rows
+        }
+        hits, misses = sum(s['hits'] for s in sites.values()), sum(s['misses'] for s in sites.values())
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'latency_saved': sum(s['latency_saved'] for s in sites.values()),
+            'sites': sites,
+        }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.execute('DELETE FROM sites')
+            self.size = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+# Function to tell whether a call site is opted into the cache (LLM_CACHE=1, or a list of sites)
+def cache_enabled(site: str) -> bool:
+    setting = os.getenv('LLM_CACHE', '0').strip().lower()
+    if setting in ('1', 'true', 'yes'):
+        return True
+    return site.lower() in {name.strip() for name in setting.split(',')}
+
+# Function to get the process wide cache
+def get_llm_cache() -> LLMCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(os.getenv('LLM_CACHE_PATH', DEFAULT_PATH))
+    return _cache
+
+# =================================================================================================
+
+# Chat model answering repeated calls of one call site from the cache, other calls go to `model`
+class CachedChatModel(BaseChatModel):
+    model: BaseChatModel
+    site: str
+    store: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f'cached-{self.model._llm_type}'
+
+    def _key(self, messages, stop, kwargs) -> str:
+        return cache_key(model_signature(self.model), messages, {'stop': stop, **kwargs})
+
+    # Function to store a reply, only plain text replies (no tool calls)
+    def _store(self, key: str, message: BaseMessage, started: float) -> None:
+        if isinstance(message.content, str) and not getattr(message, 'tool_calls', None):
+            self.store.put(key, self.site, message.content, time.perf_counter() - started)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if (reply := self.store.get(key, self.site)) is not None:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+        started = time.perf_counter()
+        response = self.model.invoke(messages, stop=stop, **kwargs)
+        self._store(key, response, started)
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if (reply := self.store.get(key, self.site)) is not None:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+        started = time.perf_counter()
+        response = await self.model.ainvoke(messages, stop=stop, **kwargs)
+        self._store(key, response, started)
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._key(messages, stop, kwargs)
+        if (reply := self.store.get(key, self.site)) is not None:
+            yield from ReplayChatModel(reply=reply)._stream(messages, run_manager=run_manager)
+            return
+
+        started = time.perf_counter()
+        full = None
+        for chunk in self.model.stream(messages, stop=stop, **kwargs):
+            full = chunk if full is None else full + chunk
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+        if full is not None:
+            self._store(key, full, started)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._key(messages, stop, kwargs)
+        if (reply := self.store.get(key, self.site)) is not None:
+            async for chunk in ReplayChatModel(reply=reply)._astream(messages, run_manager=run_manager):
+                yield chunk
+            return
+
+        started = time.perf_counter()
+        full = None
+        async for chunk in self.model.astream(messages, stop=stop, **kwargs):
+            full = chunk if full is None else full + chunk
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+        if full is not None:
+            self._store(key, full, started)
+
+# Function to opt one call site into the cache (returns `model` unchanged unless LLM_CACHE enables the site)
+def cached_chat_model(model: BaseChatModel, site: str) -> BaseChatModel:
+    if not cache_enabled(site):
+        return model
+    return CachedChatModel(model=model, site=site, store=get_llm_cache())
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Persistent LLM response cache')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help='Entries, size and hit rate per call site')
+    commands.add_parser('clear', help='Drop every cached reply and counter')
+    args = parser.parse_args()
+
+    cache = LLMCache(os.getenv('LLM_CACHE_PATH', DEFAULT_PATH))
+    if args.command == 'stats':
+        stats = cache.stats()
+        print(f"{stats['entries']} replies, {stats['bytes'] / 1024:.0f} KB, hit rate {stats['hit_rate']:.0%}, "
+              f"{stats['latency_saved']:.1f}s of model time saved")
+        for site, site_stats in stats['sites'].items():
+            print(f"  {site:<24} {site_stats['hits']:>6} hits {site_stats['misses']:>6} misses  "
+                  f"{site_stats['hit_rate']:>4.0%}  {site_stats['latency_saved']:.1f}s saved")
+    elif args.command == 'clear':
+        cache.clear()
+        print('Cleared')
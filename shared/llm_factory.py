@@ -0,0 +1,157 @@
+# Shared LLM client factory for every project (P1-P7 and the for_streamlit_web_app_* variants)
+#     Every script used to build its own HuggingFaceEndpoint + ChatHuggingFace, at import or
+#     once per Streamlit session, and every new client paid for fresh connections and TLS
+#     handshakes. get_chat_model returns one cached chat model per (model, token hash,
+#     options), and all of them send their requests through a keep-alive connection pool.
+#
+#     huggingface_hub keeps one shared HTTP client for synchronous calls, the factory installs
+#     it with the pool limits below and counts requests, new connections and TLS handshakes
+#     (pool_stats). Async calls use one pooled client per chat model, which the cache keeps alive.
+#
+# LLM_BACKEND=fake returns the local FakeStreamingChatModel (tests, load tests, benchmarks, offline
+# runs), configured by the FAKE_LLM_* variables (shared/fake_chat_model.py).
+# Pool size: LLM_POOL_CONNECTIONS (default 32), idle connections are kept LLM_POOL_KEEPALIVE
+# seconds (default 60).
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_MODEL = 'openai/gpt-oss-20b'
+
+POOL_CONNECTIONS = int(os.getenv('LLM_POOL_CONNECTIONS', '32'))
+POOL_KEEPALIVE = float(os.getenv('LLM_POOL_KEEPALIVE', '60'))
+
+# Chat models kept, least recently used are dropped (one per token in the web app variants)
+MAX_CLIENTS = 32
+
+_models: 'OrderedDict[tuple, object]' = OrderedDict()
+_lock = threading.Lock()
+_pool_configured = False
+_stats = {'requests': 0, 'connections': 0, 'tls_handshakes': 0, 'models_created': 0, 'model_hits': 0}
+
+# =================================================================================================
+# HTTP pool
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+# httpcore reports connection events through the 'trace' request extension
+def _trace(event: str, info: dict) -> None:
+    if event == 'connection.connect_tcp.complete':
+        _count('connections')
+    elif event == 'connection.start_tls.complete':
+        _count('tls_handshakes')
+
+async def _atrace(event: str, info: dict) -> None:
+    _trace(event, info)
+
+def _on_request(request) -> None:
+    _count('requests')
+    request.extensions['trace'] = _trace
+
+async def _aon_request(request) -> None:
+    _count('requests')
+    request.extensions['trace'] = _atrace
+
+# Function to install the pooled HTTP clients used by huggingface_hub (once per process)
+def configure_http_pool(max_connections: int = POOL_CONNECTIONS, keepalive: float = POOL_KEEPALIVE) -> None:
+    global _pool_configured
+    with _lock:
+        if _pool_configured:
+            return
+        _pool_configured = True
+
+    import huggingface_hub
+
+    if hasattr(huggingface_hub, 'set_client_factory'):
+        # huggingface_hub >= 1.0 (httpx), keeping the hooks it installs on its own clients
+        import httpx
+        from huggingface_hub.utils import _http
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=keepalive)
+
+        def client_factory():
+            return httpx.Client(
+                limits=limits,
+                event_hooks={'request': [_http.hf_request_event_hook, _on_request]},
+                follow_redirects=True,
+                timeout=None,
+            )
+
+        def async_client_factory():
+            return httpx.AsyncClient(
+                limits=limits,
+                event_hooks={'request': [_http.async_hf_request_event_hook, _aon_request], 'response': [_http.async_hf_response_event_hook]},
+                follow_redirects=True,
+                timeout=None,
+            )
+
+        huggingface_hub.set_client_factory(client_factory)
+        huggingface_hub.set_async_client_factory(async_client_factory)
+    else:
+        # Older huggingface_hub (requests), connections are pooled per session by urllib3
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        def backend_factory():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.hooks['response'].append(lambda response, *args, **kwargs: _count('requests'))
+            return session
+
+        huggingface_hub.configure_http_backend(backend_factory=backend_factory)
+
+# Function to report the pool: requests sent, connections opened, and how many requests reused one
+def pool_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        stats['models'] = len(_models)
+    stats['reused'] = max(0, stats['requests'] - stats['connections'])
+    return stats
+
+# =================================================================================================
+# Chat models
+
+# Function to get the chat model for a model id and token, built once and shared afterwards
+#     token None uses the token from the environment (HUGGINGFACEHUB_API_TOKEN or HF_TOKEN), as
+#     HuggingFaceEndpoint does. Extra keyword arguments go to HuggingFaceEndpoint and are part of
+#     the cache key.
+def get_chat_model(token: Optional[str] = None, model: str = DEFAULT_MODEL, **endpoint_kwargs):
+    fake = os.getenv('LLM_BACKEND') == 'fake'
+    resolved = token or os.getenv('HUGGINGFACEHUB_API_TOKEN') or os.getenv('HF_TOKEN') or ''
+    key = ('fake' if fake else model, hashlib.sha256(resolved.encode('utf-8')).hexdigest()[:16], tuple(sorted(endpoint_kwargs.items())))
+
+    with _lock:
+        if key in _models:
+            _models.move_to_end(key)
+            _stats['model_hits'] += 1
+            return _models[key]
+
+    if fake:
+        from shared.fake_chat_model import fake_chat_model_from_env
+        chat_model = fake_chat_model_from_env()
+    else:
+        from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+        configure_http_pool()
+        if token:
+            endpoint_kwargs['huggingfacehub_api_token'] = token
+        llm = HuggingFaceEndpoint(endpoint_url=model, task='text-generation', **endpoint_kwargs)
+        chat_model = ChatHuggingFace(llm=llm)
+
+    with _lock:
+        # Another thread may have built the same model meanwhile, the first one is kept
+        if key not in _models:
+            _models[key] = chat_model
+            _stats['models_created'] += 1
+        chat_model = _models[key]
+        _models.move_to_end(key)
+        while len(_models) > MAX_CLIENTS:
+            _models.popitem(last=False)
+    return chat_model
@@ -0,0 +1,145 @@
+# Response cache in front of chat_node (P6, P7)
+#     Support-style chats see the same opening questions over and over. Replies are cached
+#     under the normalized text of the last user message plus a hash of the context sent
+#     before it (empty on a first turn), with a TTL and LRU eviction. A hit is replayed
+#     through ReplayChatModel, so it streams chunk by chunk like a real reply.
+#
+# Enabled with CHAT_RESPONSE_CACHE=1, sized with CHAT_CACHE_SIZE (entries) and CHAT_CACHE_TTL (seconds).
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# =================================================================================================
+
+# Function to normalize a question so that case, spacing and end punctuation do not matter
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.strip(' ?!.')
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()   # key -> (expires at, reply, seconds the model took)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    # Function to build the cache key of a prompt
+    def key(self, messages: List[BaseMessage]) -> str:
+        context = hashlib.sha256()
+        for message in messages[:-1]:
+            context.update(f'{message.type}\x1f{message.content}\x1e'.encode('utf-8'))
+        return f'{context.hexdigest()[:32]}:{normalize_text(str(messages[-1].content))}'
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.latency_saved += entry[2]
+            return entry[1]
+
+    def put(self, key: str, reply: str, latency: float) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, reply, latency)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'latency_saved': self.latency_saved,
+            }
+
+# Function to build the cache configured by the environment (None when disabled)
+def response_cache_from_env() -> Optional[ResponseCache]:
+    if os.getenv('CHAT_RESPONSE_CACHE', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    return ResponseCache(int(os.getenv('CHAT_CACHE_SIZE', '1024')), float(os.getenv('CHAT_CACHE_TTL', '3600')))
+
+# =================================================================================================
+
+# Chat model replaying a cached reply, streamed word by word through the usual callbacks
+class ReplayChatModel(BaseChatModel):
+    reply: str
+
+    @property
+    def _llm_type(self) -> str:
+        return 'cache-replay'
+
+    def _chunks(self):
+        return re.findall(r'\S+\s*|\s+', self.reply)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for text in self._chunks():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for text in self._chunks():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+# =================================================================================================
+
+# Function to call the model through the cache (plain model call when the cache is None)
+def cached_invoke(cache: Optional[ResponseCache], model, messages: List[BaseMessage]) -> BaseMessage:
+    if cache is None:
+        return model.invoke(messages)
+
+    key = cache.key(messages)
+    if (reply := cache.get(key)) is not None:
+        return ReplayChatModel(reply=reply).invoke(messages)
+
+    started = time.perf_counter()
+    response = model.invoke(messages)
+    # Only plain text replies are cached (no tool calls)
+    if isinstance(response.content, str) and not getattr(response, 'tool_calls', None):
+        cache.put(key, response.content, time.perf_counter() - started)
+    return response
+
+# Async variant for the SSE server
+async def acached_invoke(cache: Optional[ResponseCache], model, messages: List[BaseMessage]) -> BaseMessage:
+    if cache is None:
+        return await model.ainvoke(messages)
+
+    key = cache.key(messages)
+    if (reply := cache.get(key)) is not None:
+        return await ReplayChatModel(reply=reply).ainvoke(messages)
+
+    started = time.perf_counter()
+    response = await model.ainvoke(messages)
+    if isinstance(response.content, str) and not getattr(response, 'tool_calls', None):
+        cache.put(key, response.content, time.perf_counter() - started)
+    return response
@@ -0,0 +1,382 @@
+# Near-duplicate response cache (P3 project ideas)
+#     "Beginner web dev project ideas with React" and "beginner React web-development projects"
+#     ask for the same thing, but never match an exact cache key. semantic_invoke looks the
+#     user's own text up by its content words instead (case, punctuation, plurals, common
+#     abbreviations, articles, politeness and linking words folded, word order ignored):
+#     MinHash signatures of the word sets, banded into an LSH index (sorted NumPy arrays, one
+#     per band), give the candidates in a few microseconds, and a candidate is used only if
+#         - the Jaccard similarity of the two word sets is at least SEMANTIC_CACHE_THRESHOLD
+#           (default 0.8), and
+#         - both texts have the same numbers and the same guarded pairs: a negation or a
+#           direction word with the word after it ("not attend", "to Alice"), so "not" or
+#           "Bob to Alice" / "Alice to Bob" is never a hit however similar the rest is.
+#     Everything else about the call (site, model, exact fields such as number_of_ideas) must
+#     match exactly.
+#
+#     Free-text drafts (P4) are not cached: a reply written for one request is rarely right for
+#     another one, however close the wording.
+#
+#     Entries are appended to SEMANTIC_CACHE_DIR (default semantic_cache/ in the repository root):
+#     entries.jsonl (text, words and the reply) and index.bin (context hash, file offset and
+#     signature), which is loaded into memory at start.
+#
+# Off unless SEMANTIC_CACHE=1. Lookup time at a million entries:
+#     python -m shared.semantic_cache bench --entries 1000000
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel
+
+from shared.llm_cache import model_signature
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'semantic_cache')
+
+THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.8'))
+
+# 64 MinHash values in 16 bands of 4: word sets with Jaccard 0.5 share a band with probability ~0.65, at 0.7 ~0.98
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Candidates checked against their stored words, best estimates first
+VERIFY = 3
+
+# Dropped before comparing: articles, politeness and linking words, which never change what is asked for
+STOP_WORDS = {
+    'a', 'an', 'the', 'please', 'kindly', 'just', 'hi', 'hello', 'hey', 'thanks', 'thank',
+    'with', 'for', 'of', 'on', 'in', 'about', 'using', 'i', 'me', 'my',
+}
+# Words whose next word has to be the same in both texts ("not attend", "to Alice")
+GUARD_WORDS = {'not', 'no', 'never', 'without', 'to', 'from', 'into', 'than', 'vs', 'versus', 'before', 'after'}
+# Words ending in "s" which are not plurals ("news" is not one "new", "redis" not "redi")
+UNINFLECTED_WORDS = {
+    'news', 'sales', 'series', 'species', 'means', 'does', 'always', 'perhaps', 'sometimes',
+    'kubernetes', 'postgres', 'express', 'pandas', 'windows', 'jenkins', 'aws', 'ios', 'macos',
+}
+IRREGULAR_WORDS = {'people': 'person', 'children': 'child', 'men': 'man', 'women': 'woman', 'analyses': 'analysis', 'movies': 'movie'}
+ABBREVIATIONS = {
+    'dev': 'development', 'devs': 'developer', 'ml': 'machine learning', 'ai': 'artificial intelligence',
+    'dl': 'deep learning', 'nlp': 'natural language processing', 'js': 'javascript', 'ts': 'typescript',
+    'db': 'database', 'app': 'application', 'apps': 'application', 'mail': 'email', 'msg': 'message',
+    'info': 'information', 'mgr': 'manager',
+}
+
+RECORD = np.dtype([('context', '<u4'), ('offset', '<u8'), ('signature', '<u4', (NUM_PERM,))])
+
+# MinHash hash functions h(x) = (a * x + b) mod 2^64 >> 32 (multiply-shift, a odd), fixed so that
+# stored signatures stay valid
+_rng = np.random.default_rng(20240611)
+PERM_A = _rng.integers(1, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+PERM_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+BAND_MIX = _rng.integers(1, 1 << 63, ROWS + 2, dtype=np.uint64) | np.uint64(1)
+
+# =================================================================================================
+# Words, signatures and band keys
+
+# Function to turn a plural word into its singular form (uninflected words and short words are kept)
+def singular(word: str) -> str:
+    if word in IRREGULAR_WORDS:
+        return IRREGULAR_WORDS[word]
+    if word in UNINFLECTED_WORDS or len(word) <= 3 or word.endswith(('ss', 'us', 'is', 'ics', 'ous')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+# Function to reduce a text to its words in order: case, punctuation, plurals, common abbreviations
+# and stop words folded, negations ("don't" -> "do not") kept
+def normalize_tokens(text: str) -> List[str]:
+    text = re.sub(r"n['’]t\b", ' not', text.casefold()).replace('cannot', 'can not')
+    tokens = []
+    for word in re.findall(r'[a-z0-9]+', text):
+        for part in ABBREVIATIONS.get(word, word).split():
+            if part not in STOP_WORDS:
+                tokens.append(singular(part))
+    return tokens
+
+# Function to get the shingles a signature is built from: the set of words, order ignored
+def shingles(tokens: List[str]) -> List[str]:
+    return sorted(set(tokens))
+
+# Function to get what has to be equal in two texts: numbers, and every guard word with the word after it
+def guarded(tokens: List[str]) -> set:
+    pairs = {(word, following) for word, following in zip(tokens, tokens[1:] + ['']) if word in GUARD_WORDS}
+    return pairs | {word for word in tokens if any(character.isdigit() for character in word)}
+
+# Function to compare two texts by their words: Jaccard similarity of the word sets, and whether
+# their guarded words agree
+def word_match(query: List[str], stored: List[str]):
+    query_set, stored_set = set(query), set(stored)
+    similarity = len(query_set & stored_set) / len(query_set | stored_set)
+    return similarity, guarded(query) == guarded(stored)
+
+def minhash(words: List[str]) -> np.ndarray:
+    hashes = np.array([zlib.crc32(word.encode('utf-8')) for word in words], dtype=np.uint64)
+    values = (PERM_A[:, None] * hashes[None, :] + PERM_B[:, None]) >> np.uint64(32)
+    return values.min(axis=1).astype(np.uint32)
+
+# Function to hash every band of each signature (rows) together with its context, shape (n, BANDS)
+def band_keys(signatures: np.ndarray, contexts: np.ndarray) -> np.ndarray:
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    keys = (rows * BAND_MIX[:ROWS]).sum(axis=2)
+    keys += contexts.astype(np.uint64)[:, None] * BAND_MIX[ROWS]
+    keys += np.arange(BANDS, dtype=np.uint64) * BAND_MIX[ROWS + 1]
+    return (keys >> np.uint64(32)).astype(np.uint32)
+
+# =================================================================================================
+
+class SemanticCache:
+    def __init__(self, directory: str = DEFAULT_DIR, threshold: float = THRESHOLD, merge_every: int = 4096):
+        self.directory = directory
+        self.threshold = threshold
+        self.merge_every = merge_every
+        self.lock = threading.Lock()
+        self.stats_by_site = {}
+        os.makedirs(directory, exist_ok=True)
+        self.entry_path = os.path.join(directory, 'entries.jsonl')
+        self.index_path = os.path.join(directory, 'index.bin')
+        self._load()
+        self.entries = open(self.entry_path, 'ab+')
+        self.index = open(self.index_path, 'ab')
+
+    # Function to read index.bin, dropping records of entries which were never fully written
+    def _load(self) -> None:
+        records = np.zeros(0, dtype=RECORD)
+        if os.path.exists(self.index_path):
+            records = np.fromfile(self.index_path, dtype=np.uint8)
+            records = records[:len(records) // RECORD.itemsize * RECORD.itemsize].view(RECORD)
+            entry_size = os.path.getsize(self.entry_path) if os.path.exists(self.entry_path) else 0
+            complete = records[records['offset'] < entry_size]
+            if len(complete) * RECORD.itemsize != os.path.getsize(self.index_path):
+                complete.tofile(self.index_path)
+            records = complete
+        self.records = np.zeros(max(1024, len(records)), dtype=RECORD)
+        self.records[:len(records)] = records
+        self.size = len(records)
+        self._build()
+
+    # Function to build the band index of every record: sorted keys and the record of each key
+    def _build(self) -> None:
+        keys = band_keys(self.records['signature'][:self.size], self.records['context'][:self.size])
+        order = np.argsort(keys, axis=0, kind='stable').astype(np.uint32)
+        self.band_keys = [keys[order[:, band], band] for band in range(BANDS)]
+        self.band_ids = [order[:, band].copy() for band in range(BANDS)]
+        self.pending = {}   # (band, key) -> record ids added since the last merge
+        self.pending_count = 0
+
+    # Function to move the pending records into the sorted band arrays
+    def _merge(self) -> None:
+        start = self.size - self.pending_count
+        ids = np.arange(start, self.size, dtype=np.uint32)
+        keys = band_keys(self.records['signature'][start:self.size], self.records['context'][start:self.size])
+        for band in range(BANDS):
+            order = np.argsort(keys[:, band], kind='stable')
+            new_keys, new_ids = keys[order, band], ids[order]
+            positions = np.searchsorted(self.band_keys[band], new_keys, side='right')
+            self.band_keys[band] = np.insert(self.band_keys[band], positions, new_keys)
+            self.band_ids[band] = np.insert(self.band_ids[band], positions, new_ids)
+        self.pending = {}
+        self.pending_count = 0
+
+    def _count(self, site: str, hit: bool) -> None:
+        stats = self.stats_by_site.setdefault(site, {'hits': 0, 'misses': 0})
+        stats['hits' if hit else 'misses'] += 1
+
+    def _read(self, offset: int) -> dict:
+        self.entries.seek(offset)
+        return json.loads(self.entries.readline())
+
+    # Function to find a stored entry for `text` in `context` (a hash of everything that must match exactly)
+    def lookup(self, site: str, context: int, text: str) -> Optional[dict]:
+        tokens = normalize_tokens(text)
+        if not tokens:
+            return None
+        signature = minhash(shingles(tokens))
+        keys = band_keys(signature[None], np.array([context], dtype=np.uint32))[0]
+
+        with self.lock:
+            candidates = []
+            for band in range(BANDS):
+                band_keys_ = self.band_keys[band]
+                low = np.searchsorted(band_keys_, keys[band], side='left')
+                high = np.searchsorted(band_keys_, keys[band], side='right')
+                if high > low:
+                    candidates.extend(self.band_ids[band][low:high].tolist())
+                candidates.extend(self.pending.get((band, int(keys[band])), ()))
+            if candidates:
+                candidates = np.unique(np.array(candidates, dtype=np.uint32))
+                candidates = candidates[self.records['context'][candidates] == context]
+
+            if len(candidates):
+                estimates = (self.records['signature'][candidates] == signature).mean(axis=1)
+                # the estimate only orders the candidates, the stored words decide (normalized
+                # again, so entries written by older versions are compared the same way)
+                for position in np.argsort(-estimates)[:VERIFY]:
+                    entry = self._read(int(self.records['offset'][candidates[position]]))
+                    similarity, guards_agree = word_match(tokens, normalize_tokens(entry['text']))
+                    if guards_agree and similarity >= self.threshold:
+                        self._count(site, True)
+                        return entry
+            self._count(site, False)
+        return None
+
+    def add(self, site: str, context: int, text: str, kind: str, value: Any) -> None:
+        tokens = normalize_tokens(text)
+        if not tokens:
+            return
+        signature = minhash(shingles(tokens))
+        line = (json.dumps({'site': site, 'text': text, 'tokens': tokens, 'kind': kind, 'value': value}, ensure_ascii=False) + '\n').encode('utf-8')
+
+        with self.lock:
+            # the entry is written first, a record is only valid once its entry is complete
+            self.entries.seek(0, os.SEEK_END)
+            offset = self.entries.tell()
+            self.entries.write(line)
+            self.entries.flush()
+            record = np.zeros(1, dtype=RECORD)
+            record['context'], record['offset'], record['signature'] = context, offset, signature
+            self.index.write(record.tobytes())
+            self.index.flush()
+
+            if self.size == len(self.records):
+                grown = np.zeros(2 * len(self.records), dtype=RECORD)
+                grown[:self.size] = self.records[:self.size]
+                self.records = grown
+            self.records[self.size] = record[0]
+            for band, key in enumerate(band_keys(signature[None], record['context'])[0]):
+                self.pending.setdefault((band, int(key)), []).append(self.size)
+            self.size += 1
+            self.pending_count += 1
+            if self.pending_count >= self.merge_every:
+                self._merge()
+
+    def stats(self) -> dict:
+        with self.lock:
+            sites = {site: dict(stats) for site, stats in self.stats_by_site.items()}
+        for stats in sites.values():
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return {'entries': self.size, 'sites': sites}
+
+    def close(self) -> None:
+        with self.lock:
+            self.entries.close()
+            self.index.close()
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+# Function to get the process wide cache (None unless SEMANTIC_CACHE=1)
+def get_semantic_cache() -> Optional[SemanticCache]:
+    global _cache
+    if os.getenv('SEMANTIC_CACHE', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticCache(os.getenv('SEMANTIC_CACHE_DIR', DEFAULT_DIR))
+    return _cache
+
+# =================================================================================================
+
+# Function to hash what has to match exactly: call site, models in the runnable and the exact fields
+def call_context(site: str, runnable, exact: Optional[dict]) -> int:
+    models = [model_signature(step) for step in getattr(runnable, 'steps', [runnable]) if isinstance(step, BaseChatModel)]
+    payload = json.dumps([site, models, exact or {}], sort_keys=True, default=str)
+    return int.from_bytes(hashlib.sha256(payload.encode('utf-8')).digest()[:4], 'little')
+
+# Function to turn a result into JSON (kind, value) and back, (None, None) when it cannot be stored
+def encode_result(result):
+    if isinstance(result, BaseMessage):
+        return ('message', result.content) if isinstance(result.content, str) else (None, None)
+    if isinstance(result, BaseModel):
+        return 'model', result.model_dump(mode='json')
+    if isinstance(result, (str, int, float, list, dict)):
+        return 'json', result
+    return None, None
+
+def decode_result(runnable, kind: str, value):
+    if kind == 'message':
+        return AIMessage(content=value)
+    if kind == 'model':
+        # the output type of a chain ending in a PydanticOutputParser is its model
+        return runnable.OutputType.model_validate(value)
+    return value
+
+# Function to invoke `runnable`, answering from the cache when a near-duplicate `text` was seen
+#     `text` is the user's own input (not the whole prompt, whose template would make every
+#     call look alike), `exact` holds the inputs which must match exactly.
+def semantic_invoke(cache: Optional[SemanticCache], site: str, runnable, input, text: str, exact: Optional[dict] = None):
+    if cache is None:
+        return runnable.invoke(input)
+
+    context = call_context(site, runnable, exact)
+    entry = cache.lookup(site, context, text)
+    if entry is not None:
+        return decode_result(runnable, entry['kind'], entry['value'])
+
+    result = runnable.invoke(input)
+    kind, value = encode_result(result)
+    if kind is not None:
+        cache.add(site, context, text, kind, value)
+    return result
+
+# =================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Near-duplicate cache lookup benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench = commands.add_parser('bench', help='Time lookups over synthetic entries')
+    bench.add_argument('--entries', type=int, default=1000000)
+    bench.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocabulary = np.array([f'topic{i}' for i in range(20000)])
+    texts = [' '.join(rng.choice(vocabulary, 8)) for _ in range(args.entries)]
+
+    # Written in bulk (same files as add() writes), then loaded like at start
+    directory = tempfile.mkdtemp(prefix='semantic-cache-bench-')
+    started = time.perf_counter()
+    records = np.zeros(args.entries, dtype=RECORD)
+    with open(os.path.join(directory, 'entries.jsonl'), 'wb') as file:
+        for i, text in enumerate(texts):
+            tokens = normalize_tokens(text)
+            records[i]['offset'] = file.tell()
+            records[i]['signature'] = minhash(shingles(tokens))
+            file.write((json.dumps({'site': 'bench', 'text': text, 'tokens': tokens, 'kind': 'json', 'value': i}) + '\n').encode('utf-8'))
+    records['context'] = 1
+    records.tofile(os.path.join(directory, 'index.bin'))
+    print(f'Wrote {args.entries} entries in {time.perf_counter() - started:.1f}s')
+
+    started = time.perf_counter()
+    cache = SemanticCache(directory)
+    print(f'Loaded the index in {time.perf_counter() - started:.1f}s')
+
+    for name, queries in [
+        ('near-duplicate', [f'Hi, {text.upper()} thanks' for text in texts[:args.queries]]),
+        ('miss', [' '.join(rng.choice(vocabulary, 8)) for _ in range(args.queries)]),
+    ]:
+        timings, hits = [], 0
+        for query in queries:
+            started = time.perf_counter()
+            hits += cache.lookup('bench', 1, query) is not None
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f'{name:<15} p50 {timings[len(timings) // 2] * 1000:.3f} ms  p99 {timings[int(len(timings) * 0.99)] * 1000:.3f} ms  '
+              f'hits {hits}/{len(queries)}')
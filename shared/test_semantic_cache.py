@@ -0,0 +1,53 @@
+# Tests for shared/semantic_cache.py (python -m unittest shared.test_semantic_cache)
+
+import tempfile
+import unittest
+
+from shared.semantic_cache import SemanticCache, normalize_tokens
+
+# =================================================================================================
+
+class NormalizeTokensTest(unittest.TestCase):
+
+    def test_plurals_are_folded(self):
+        self.assertEqual(normalize_tokens('Project ideas for beginners'), ['project', 'idea', 'beginner'])
+
+    def test_words_ending_in_s_which_are_not_plurals(self):
+        self.assertNotEqual(normalize_tokens('News app project ideas'), normalize_tokens('New app project ideas'))
+        self.assertEqual(normalize_tokens('this Redis news'), ['this', 'redis', 'news'])
+
+class LookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SemanticCache(tempfile.mkdtemp(prefix='semantic-cache-test-'))
+        self.addCleanup(self.cache.close)
+
+    def hit(self, stored: str, query: str) -> bool:
+        self.cache.add('test', 1, stored, 'json', stored)
+        return self.cache.lookup('test', 1, query) is not None
+
+    def test_reworded_request_is_a_hit(self):
+        # the example pair of the request: other word order, abbreviation and plural
+        self.assertTrue(self.hit('Beginner web dev project ideas with React', 'beginner React web-development projects'))
+
+    def test_politeness_is_a_hit(self):
+        self.assertTrue(self.hit('Beginner web dev project ideas with React', 'Hi, beginner web dev project ideas with React please, thanks'))
+
+    def test_different_requests_are_misses(self):
+        for stored, query in [
+            ('News app project ideas', 'New app project ideas'),
+            ('Beginner web dev project ideas with React', 'Beginner web dev project ideas with Vue'),
+            ('I will not attend the meeting', 'I will attend the meeting'),
+            ('Write an email from Bob to Alice', 'Write an email from Alice to Bob'),
+            ('Schedule a meeting on Monday', 'Schedule a meeting on Monday and Tuesday'),
+            ('5 Python project ideas', '10 Python project ideas'),
+        ]:
+            with self.subTest(stored=stored, query=query):
+                self.assertFalse(self.hit(stored, query))
+
+    def test_other_context_is_a_miss(self):
+        self.cache.add('test', 1, 'Beginner web dev project ideas with React', 'json', 'ideas')
+        self.assertIsNone(self.cache.lookup('test', 2, 'Beginner web dev project ideas with React'))
+
+if __name__ == '__main__':
+    unittest.main()
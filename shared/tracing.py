@@ -0,0 +1,506 @@
+# Per-node tracing and metrics for every graph (GRAPH_TRACING=1)
+#     The projects build their graphs with TracedStateGraph instead of StateGraph. With tracing
+#     on, every action registered through add_node is wrapped, and every run of a node gives
+#     one OpenTelemetry-style span: start and end time, langgraph step, approximate size of the
+#     state it received and of the update it returned, model calls with prompt and completion
+#     tokens, and the error if it raised. Spans of one graph run share a trace id and hang
+#     under a root span for the whole run (invoke, stream and their async versions), which also
+#     records the edges of the compiled graph (graph.edges) for shared/critical_path.py.
+#
+#     Tokens are counted by a callback handler which LangChain attaches to every model call made
+#     while a node runs (configure hook), so the node code does not change. Usage reported by
+#     the model is used when there is one, otherwise tokens are estimated at 4 characters each
+#     (llm.tokens_estimated). Cache hits (cached-* and cache-replay models) are not model calls.
+#
+#     Spans are appended to a JSONL file, one per line. Counters and duration histograms per
+#     graph and node are served in the Prometheus text format on http://localhost:<port>/metrics.
+#     With tracing off, TracedStateGraph is a plain StateGraph and nothing is wrapped.
+#
+# GRAPH_TRACING=1 turns it on, GRAPH_TRACING_PATH moves the spans (default graph_traces.jsonl in
+# the repository root), GRAPH_METRICS_PORT sets the metrics port (default 9464, empty for none).
+#     python -m shared.tracing summary [path]
+
+import argparse
+import atexit
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.config import get_config
+from langgraph.graph import StateGraph
+from pydantic import BaseModel
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'graph_traces.jsonl')
+
+ENABLED = os.getenv('GRAPH_TRACING', '').lower() in ('1', 'true', 'yes')
+
+# Upper bounds (seconds) of the duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+# Root span of the graph run in progress, and token counter of the node in progress
+_current_run: ContextVar[Optional['Span']] = ContextVar('graph_run_span', default=None)
+_current_counter: ContextVar[Optional['TokenCounter']] = ContextVar('graph_node_tokens', default=None)
+
+# =================================================================================================
+# Spans
+
+def new_id(bits: int) -> str:
+    return format(random.getrandbits(bits), f'0{bits // 4}x')
+
+# Function to approximate the size of a state or update in bytes (lengths of its text, 8 per other value)
+def payload_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value.encode('utf-8'))
+    if isinstance(value, dict):
+        return sum(payload_size(key) + payload_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(payload_size(item) for item in value)
+    if isinstance(value, BaseMessage):
+        return payload_size(value.content) + payload_size(getattr(value, 'tool_calls', None) or [])
+    if isinstance(value, BaseModel):
+        return payload_size(value.__dict__)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 8
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_span_id', 'start_ns', 'started', 'attributes', 'error')
+
+    def __init__(self, name: str, parent: Optional['Span'], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else new_id(128)
+        self.span_id = new_id(64)
+        self.parent_span_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter_ns()
+        self.attributes = attributes
+        self.error: Optional[BaseException] = None
+
+    # Function to close the span, returns its duration in seconds
+    def end(self) -> float:
+        elapsed = time.perf_counter_ns() - self.started
+        record = {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'name': self.name,
+            'kind': 'INTERNAL',
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.start_ns + elapsed,
+            'attributes': self.attributes,
+            'status': {'code': 'OK'},
+            'events': [],
+        }
+        if self.error is not None:
+            record['status'] = {'code': 'ERROR', 'message': str(self.error)}
+            record['events'].append({
+                'name': 'exception',
+                'time_unix_nano': self.start_ns + elapsed,
+                'attributes': {'exception.type': type(self.error).__name__, 'exception.message': str(self.error)},
+            })
+        exporter.write(record)
+        return elapsed / 1e9
+
+# Writes spans to the JSONL file from a background thread, a node only queues its span
+class SpanExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def write(self, record: dict) -> None:
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, daemon=True)
+                    self.thread.start()
+        self.queue.put(record)
+
+    def _run(self) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            while True:
+                record = self.queue.get()
+                if record is None:
+                    return
+                file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                if self.queue.empty():
+                    file.flush()
+
+    # Function to write the queued spans and stop the writer (at exit)
+    def close(self) -> None:
+        with self.lock:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+
+exporter = SpanExporter(os.getenv('GRAPH_TRACING_PATH', DEFAULT_PATH))
+atexit.register(exporter.close)
+
+# =================================================================================================
+# Token counts
+
+# Callback handler counting the model calls and tokens of one node run
+class TokenCounter(BaseCallbackHandler):
+    ignore_chain = True
+    ignore_retriever = True
+    ignore_agent = True
+    run_inline = True
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prompts = {}   # run id -> prompt characters, for the estimate
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated = False
+
+    def _start(self, run_id, characters: int, kwargs: dict) -> None:
+        # Cache hits are not model calls, the model behind a cached-* wrapper reports its own run
+        model_type = (kwargs.get('invocation_params') or {}).get('_type', '')
+        if model_type == 'cache-replay' or model_type.startswith('cached-'):
+            return
+        with self.lock:
+            self.prompts[run_id] = characters
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, sum(payload_size(message.content) for batch in messages for message in batch), kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, sum(len(prompt) for prompt in prompts), kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self.lock:
+            characters = self.prompts.pop(run_id, None)
+        if characters is None:
+            return
+
+        generations = [generation for batch in response.generations for generation in batch]
+        usage = [getattr(getattr(generation, 'message', None), 'usage_metadata', None) for generation in generations]
+        token_usage = (response.llm_output or {}).get('token_usage') or {}
+        if usage and all(usage):
+            prompt, completion = sum(u['input_tokens'] for u in usage), sum(u['output_tokens'] for u in usage)
+        elif token_usage.get('completion_tokens') is not None:
+            prompt, completion = token_usage.get('prompt_tokens', 0), token_usage['completion_tokens']
+        else:
+            prompt, completion = -(-characters // 4), sum(-(-len(generation.text) // 4) for generation in generations)
+            self.estimated = True
+        with self.lock:
+            self.calls += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self.lock:
+            if self.prompts.pop(run_id, None) is not None:
+                self.calls += 1
+
+# Every model call made while _current_counter is set reports to that counter
+register_configure_hook(_current_counter, inheritable=True)
+
+# =================================================================================================
+# Metrics
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.nodes = {}   # (graph, node) -> counters, node None for whole runs
+
+    def record(self, graph: str, node: Optional[str], seconds: float, failed: bool, counter: Optional[TokenCounter] = None,
+               input_bytes: int = 0, output_bytes: int = 0) -> None:
+        with self.lock:
+            entry = self.nodes.get((graph, node))
+            if entry is None:
+                entry = self.nodes[(graph, node)] = {
+                    'buckets': [0] * len(BUCKETS), 'calls': 0, 'errors': 0, 'seconds': 0.0, 'llm_calls': 0,
+                    'prompt_tokens': 0, 'completion_tokens': 0, 'input_bytes': 0, 'output_bytes': 0,
+                }
+            entry['buckets'][bisect_left(BUCKETS, seconds)] += 1
+            entry['calls'] += 1
+            entry['errors'] += failed
+            entry['seconds'] += seconds
+            entry['input_bytes'] += input_bytes
+            entry['output_bytes'] += output_bytes
+            if counter is not None:
+                entry['llm_calls'] += counter.calls
+                entry['prompt_tokens'] += counter.prompt_tokens
+                entry['completion_tokens'] += counter.completion_tokens
+
+    # Function to render the metrics in the Prometheus text exposition format
+    def render(self) -> str:
+        with self.lock:
+            entries = {key: {**value, 'buckets': list(value['buckets'])} for key, value in sorted(self.nodes.items(), key=str)}
+
+        lines = []
+        for prefix, runs in (('graph_run', True), ('graph_node', False)):
+            selected = [(graph, node, entry) for (graph, node), entry in entries.items() if (node is None) == runs]
+            what = 'graph run' if runs else 'node run'
+            counters = [('calls', 'total', f'{what.capitalize()}s'), ('errors', 'errors_total', f'Failed {what}s')]
+            if not runs:
+                counters += [
+                    ('llm_calls', 'llm_calls_total', 'Model calls made in the node'),
+                    ('prompt_tokens', 'prompt_tokens_total', 'Prompt tokens sent by the node'),
+                    ('completion_tokens', 'completion_tokens_total', 'Completion tokens received by the node'),
+                    ('input_bytes', 'input_state_bytes_total', 'Approximate size of the state given to the node'),
+                    ('output_bytes', 'output_state_bytes_total', 'Approximate size of the updates returned by the node'),
+                ]
+            for field, suffix, help_text in counters:
+                lines += [f'# HELP {prefix}_{suffix} {help_text}', f'# TYPE {prefix}_{suffix} counter']
+                lines += [f'{prefix}_{suffix}{{{labels(graph, node)}}} {entry[field]}' for graph, node, entry in selected]
+
+            lines += [f'# HELP {prefix}_duration_seconds Duration of a {what}', f'# TYPE {prefix}_duration_seconds histogram']
+            for graph, node, entry in selected:
+                total = 0
+                for bound, count in zip(BUCKETS, entry['buckets']):
+                    total += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_duration_seconds_bucket{{{labels(graph, node)},le="{le}"}} {total}')
+                lines.append(f'{prefix}_duration_seconds_sum{{{labels(graph, node)}}} {entry["seconds"]}')
+                lines.append(f'{prefix}_duration_seconds_count{{{labels(graph, node)}}} {entry["calls"]}')
+        return '\n'.join(lines) + '\n'
+
+def labels(graph: str, node: Optional[str]) -> str:
+    escape = lambda value: value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'graph="{escape(graph)}"' + ('' if node is None else f',node="{escape(node)}"')
+
+metrics = Metrics()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        data = metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+# Function to serve /metrics in a background thread (once per process), returns the server or None
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    global _server, _server_failed
+    if port is None:
+        setting = os.getenv('GRAPH_METRICS_PORT', '9464')
+        if not setting:
+            return None
+        port = int(setting)
+    with _server_lock:
+        if _server is None and not _server_failed:
+            try:
+                _server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+            except OSError as error:
+                # Another process (a second Streamlit app) already serves this port, reported once
+                # per process instead of on every compile (every Streamlit rerun)
+                _server_failed = True
+                logger.warning('Graph metrics not served on port %s: %s', port, error)
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+# =================================================================================================
+# Graph and node wrappers
+
+# Function to run a node inside its span
+def _enter_node(graph: str, node: str, state):
+    config = get_config()
+    metadata = config.get('metadata', {})
+    attributes = {
+        'graph.name': graph,
+        'langgraph.node': node,
+        'langgraph.step': metadata.get('langgraph_step'),
+        'langgraph.triggers': list(metadata.get('langgraph_triggers', ())),
+        'state.input_bytes': payload_size(state),
+    }
+    span = Span(node, _current_run.get(), attributes)
+    counter = TokenCounter()
+    return span, counter, _current_counter.set(counter)
+
+def _exit_node(graph: str, node: str, span: Span, counter: TokenCounter, token, output) -> None:
+    _current_counter.reset(token)
+    attributes = span.attributes
+    attributes['state.output_bytes'] = payload_size(output) if span.error is None else 0
+    attributes['llm.calls'] = counter.calls
+    attributes['llm.prompt_tokens'] = counter.prompt_tokens
+    attributes['llm.completion_tokens'] = counter.completion_tokens
+    attributes['llm.tokens_estimated'] = counter.estimated
+    seconds = span.end()
+    metrics.record(graph, node, seconds, span.error is not None, counter, attributes['state.input_bytes'], attributes['state.output_bytes'])
+
+# Function to wrap a node function (sync or async), keeping its signature for langgraph
+def trace_function(graph: str, node: str, func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def traced(state, *args, **kwargs):
+            span, counter, token = _enter_node(graph, node, state)
+            output = None
+            try:
+                output = await func(state, *args, **kwargs)
+                return output
+            except BaseException as error:
+                span.error = error
+                raise
+            finally:
+                _exit_node(graph, node, span, counter, token, output)
+    else:
+        @functools.wraps(func)
+        def traced(state, *args, **kwargs):
+            span, counter, token = _enter_node(graph, node, state)
+            output = None
+            try:
+                output = func(state, *args, **kwargs)
+                return output
+            except BaseException as error:
+                span.error = error
+                raise
+            finally:
+                _exit_node(graph, node, span, counter, token, output)
+    return traced
+
+# Function to wrap a node action: a function, a RunnableLambda or any other runnable
+def trace_action(graph: str, node: str, action):
+    if isinstance(action, RunnableLambda):
+        func, afunc = getattr(action, 'func', None), getattr(action, 'afunc', None)
+        if func is None:
+            return RunnableLambda(trace_function(graph, node, afunc), name=getattr(action, 'name', None))
+        return RunnableLambda(
+            trace_function(graph, node, func),
+            afunc=trace_function(graph, node, afunc) if afunc is not None else None,
+            name=getattr(action, 'name', None),
+        )
+    if isinstance(action, Runnable):
+        def invoke(state, config):
+            return action.invoke(state, config)
+
+        async def ainvoke(state, config):
+            return await action.ainvoke(state, config)
+
+        return RunnableLambda(trace_function(graph, node, invoke), afunc=trace_function(graph, node, ainvoke), name=node)
+    return trace_function(graph, node, action)
+
+def _run_span(graph: str, config: Optional[dict], edges: list) -> Span:
+    config = config or {}
+    attributes = {'graph.name': graph, 'graph.edges': edges}
+    if thread_id := (config.get('configurable') or {}).get('thread_id'):
+        attributes['thread.id'] = str(thread_id)
+    return Span(graph, _current_run.get(), attributes)
+
+def _end_run(graph: str, span: Span, token) -> None:
+    try:
+        _current_run.reset(token)
+    except ValueError:
+        # Generator closed from another context (abandoned stream)
+        pass
+    metrics.record(graph, None, span.end(), span.error is not None)
+
+# Function to give every run of a compiled graph a root span (invoke and ainvoke go through stream and astream)
+def trace_compiled(graph: str, compiled):
+    stream, astream = compiled.stream, compiled.astream
+    # Declared edges (conditional ones to every target they may take), so that the runs can be
+    # drawn along the real edges instead of every pair of nodes of consecutive steps
+    edges = [[edge.source, edge.target] for edge in compiled.get_graph().edges]
+
+    def traced_stream(input, config=None, **kwargs):
+        span = _run_span(graph, config, edges)
+        token = _current_run.set(span)
+        try:
+            yield from stream(input, config, **kwargs)
+        except GeneratorExit:
+            raise
+        except BaseException as error:
+            span.error = error
+            raise
+        finally:
+            _end_run(graph, span, token)
+
+    async def traced_astream(input, config=None, **kwargs):
+        span = _run_span(graph, config, edges)
+        token = _current_run.set(span)
+        try:
+            async for chunk in astream(input, config, **kwargs):
+                yield chunk
+        except GeneratorExit:
+            raise
+        except BaseException as error:
+            span.error = error
+            raise
+        finally:
+            _end_run(graph, span, token)
+
+    compiled.stream = traced_stream
+    compiled.astream = traced_astream
+    return compiled
+
+# StateGraph whose nodes and runs are traced when GRAPH_TRACING is on
+class TracedStateGraph(StateGraph):
+    def __init__(self, state_schema, *args, name: str = 'graph', **kwargs):
+        super().__init__(state_schema, *args, **kwargs)
+        self.graph_name = name
+
+    def add_node(self, node, action=None, **kwargs):
+        if not ENABLED:
+            return super().add_node(node, action, **kwargs)
+        if action is None and not isinstance(node, str):
+            # add_node(function): named after the function, as StateGraph does
+            node, action = getattr(node, 'name', None) or node.__name__, node
+        return super().add_node(node, trace_action(self.graph_name, node, action), **kwargs)
+
+    def compile(self, *args, **kwargs):
+        compiled = super().compile(*args, **kwargs)
+        if not ENABLED:
+            return compiled
+        start_metrics_server()
+        return trace_compiled(self.graph_name, compiled)
+
+# =================================================================================================
+
+# Function to read the spans of a JSONL file
+def read_spans(path: str = DEFAULT_PATH) -> list:
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Graph tracing')
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary = commands.add_parser('summary', help='Runs, p50 and p95 duration and tokens per graph and node')
+    summary.add_argument('path', nargs='?', default=os.getenv('GRAPH_TRACING_PATH', DEFAULT_PATH))
+    args = parser.parse_args()
+
+    groups = {}
+    for span in read_spans(args.path):
+        attributes = span['attributes']
+        key = (attributes['graph.name'], attributes.get('langgraph.node', '(run)'))
+        groups.setdefault(key, []).append(span)
+
+    print(f"{'graph':<28} {'node':<26} {'runs':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'prompt tok':>11} {'compl. tok':>11}")
+    for (graph, node), spans in sorted(groups.items()):
+        durations = sorted((span['end_time_unix_nano'] - span['start_time_unix_nano']) / 1e6 for span in spans)
+        errors = sum(span['status']['code'] == 'ERROR' for span in spans)
+        prompt = sum(span['attributes'].get('llm.prompt_tokens', 0) for span in spans)
+        completion = sum(span['attributes'].get('llm.completion_tokens', 0) for span in spans)
+        p50, p95 = durations[len(durations) // 2], durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        print(f'{graph:<28} {node:<26} {len(spans):>6} {errors:>6} {p50:>9.1f} {p95:>9.1f} {prompt:>11} {completion:>11}')